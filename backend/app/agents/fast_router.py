@@ -0,0 +1,284 @@
+"""Local first-stage router that answers confident cases without an LLM call.
+
+``RouterAgent.route`` asks this module first and only calls the LLM router when it
+is unsure. Two classifiers run in-process:
+
+- Keyword rules for unambiguous phrasings (greetings, questions naming the
+  uploaded documents, counts and rankings over Northwind entities). A query
+  matching the rules of exactly one route is decided with confidence 1.
+- A nearest-centroid model over query embeddings, trained offline from the
+  route decisions stored in ``chat_messages`` (see
+  ``scripts/train_fast_router.py``). Confidence is the softmax over the cosine
+  similarities to each route's centroid.
+
+Both take well under a millisecond once the query is embedded; the embedding is
+looked up in the embedding cache first and is reused by the RAG pipeline.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ROUTES = ("rag", "sql", "general_chat")
+
+# Labels stored in chat_messages.route_decision by other entry points
+LABEL_ALIASES = {"text_to_sql": "sql"}
+
+# Values of the assistant message's "route_source" metadata whose label can be
+# learned from. Messages stored before the fast path existed have none and were
+# routed by the LLM or chosen by the user.
+TRAINABLE_SOURCES = (None, "llm", "mode")
+
+# Softmax temperature over centroid cosine similarities. Embedding similarities
+# between routes differ by a few hundredths, so the scale has to be small.
+CENTROID_TEMPERATURE = 0.02
+
+_GREETING = re.compile(
+    r"^\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you|who are you)"
+    r"( there| all| everyone)?[\s!.?]*$",
+    re.IGNORECASE,
+)
+_DOCUMENT = re.compile(
+    r"\b(documents?|pdfs?|files?|uploaded|summari[sz]e|according to)\b", re.IGNORECASE
+)
+_AGGREGATE = re.compile(
+    r"\b(how many|count|total|average|sum of|top \d+|highest|lowest|most|least)\b",
+    re.IGNORECASE,
+)
+_NORTHWIND_ENTITY = re.compile(
+    r"\b(customers?|orders?|products?|employees?|suppliers?|shippers?|categor(y|ies)"
+    r"|sales|revenue|freight|invoices?)\b",
+    re.IGNORECASE,
+)
+
+# Lazy-loaded centroid model (False: looked for and not available)
+_model: "CentroidModel | None | bool" = None
+
+
+@dataclass
+class FastDecision:
+    """A route chosen without the LLM."""
+
+    destination: str
+    confidence: float
+    source: str  # rules, centroid
+
+
+def normalize_label(label: str | None) -> str | None:
+    """Map a stored route decision to a route, or None if it is not one."""
+    label = LABEL_ALIASES.get(label, label)
+    return label if label in ROUTES else None
+
+
+def match_rules(query: str) -> FastDecision | None:
+    """Route a query by keyword rules if exactly one route's rules match it."""
+    matched = set()
+    if _GREETING.match(query):
+        matched.add("general_chat")
+    if _DOCUMENT.search(query):
+        matched.add("rag")
+    if _AGGREGATE.search(query) and _NORTHWIND_ENTITY.search(query):
+        matched.add("sql")
+    if len(matched) != 1:
+        return None
+    return FastDecision(destination=matched.pop(), confidence=1.0, source="rules")
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class CentroidModel:
+    """Nearest-centroid classifier over normalized query embeddings."""
+
+    labels: list[str]
+    centroids: np.ndarray  # one unit vector per label
+    embedding_model: str
+    examples: int
+    temperature: float = CENTROID_TEMPERATURE
+
+    @classmethod
+    def fit(
+        cls,
+        vectors: np.ndarray,
+        labels: list[str],
+        embedding_model: str,
+        temperature: float = CENTROID_TEMPERATURE,
+    ) -> "CentroidModel":
+        """Fit one centroid per label from labelled query embeddings.
+
+        Raises:
+            ValueError: If there are no examples.
+        """
+        if not len(labels):
+            raise ValueError("No training examples")
+        unit = _unit(np.asarray(vectors, dtype=np.float32))
+        names = sorted(set(labels))
+        targets = np.asarray(labels)
+        centroids = np.stack([unit[targets == name].mean(axis=0) for name in names])
+        return cls(
+            labels=names,
+            centroids=_unit(centroids),
+            embedding_model=embedding_model,
+            examples=len(labels),
+            temperature=temperature,
+        )
+
+    def predict(self, vector: list[float] | np.ndarray) -> FastDecision:
+        """Return the nearest route and its softmax confidence."""
+        scores = self.centroids @ _unit(np.asarray(vector, dtype=np.float32))
+        weights = np.exp((scores - scores.max()) / self.temperature)
+        best = int(np.argmax(scores))
+        return FastDecision(
+            destination=self.labels[best],
+            confidence=float(weights[best] / weights.sum()),
+            source="centroid",
+        )
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                labels=np.asarray(self.labels),
+                centroids=self.centroids,
+                embedding_model=np.asarray(self.embedding_model),
+                examples=np.asarray(self.examples),
+                temperature=np.asarray(self.temperature),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "CentroidModel":
+        with np.load(path) as data:
+            return cls(
+                labels=[str(label) for label in data["labels"]],
+                centroids=data["centroids"].astype(np.float32),
+                embedding_model=str(data["embedding_model"]),
+                examples=int(data["examples"]),
+                temperature=float(data["temperature"]),
+            )
+
+
+def embedding_namespace() -> str:
+    """Return the embedding model a centroid model must have been trained with."""
+    return f"{settings.openai_embedding_model}:{settings.openai_embedding_dimensions}"
+
+
+def get_model() -> CentroidModel | None:
+    """Load the centroid model from ``settings.fast_router_model_path``, if usable."""
+    global _model  # noqa: PLW0603
+    if _model is None:
+        _model = False
+        path = settings.fast_router_model_path
+        if path and Path(path).exists():
+            try:
+                model = CentroidModel.load(path)
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("Could not load fast router model %s: %s", path, e)
+            else:
+                if model.embedding_model != embedding_namespace():
+                    logger.warning(
+                        "Ignoring fast router model trained with %s (now %s)",
+                        model.embedding_model,
+                        embedding_namespace(),
+                    )
+                else:
+                    logger.info("Loaded fast router model (%d examples)", model.examples)
+                    _model = model
+    return _model or None
+
+
+def reset_model() -> None:
+    """Forget the loaded model so the next call reloads it (after retraining)."""
+    global _model  # noqa: PLW0603
+    _model = None
+
+
+def training_examples(rows: list[tuple[str, str, str, str | None, dict | None]]) -> list[tuple]:
+    """Pair routed assistant messages with the user message they answered.
+
+    Args:
+        rows: ``(session_id, role, content, route_decision, metadata)`` of chat
+            messages in chronological order.
+
+    Returns:
+        ``(question, route)`` pairs in chronological order, skipping decisions made
+        by the fast path itself so it never trains on its own output.
+    """
+    last_question: dict[str, str] = {}
+    examples = []
+    for session_id, role, content, route_decision, metadata in rows:
+        if role == "user":
+            last_question[session_id] = content
+            continue
+        question = last_question.pop(session_id, None)
+        label = normalize_label(route_decision)
+        source = (metadata or {}).get("route_source")
+        if question and label and source in TRAINABLE_SOURCES:
+            examples.append((question, label))
+    return examples
+
+
+@dataclass
+class Agreement:
+    """Agreement of the fast path with the stored (LLM) routes."""
+
+    examples: int
+    decided: int  # answered by the fast path at the confidence threshold
+    agreed: int  # ...and matching the stored route
+    by_source: dict[str, tuple[int, int]]  # source -> (decided, agreed)
+    centroid_accuracy: float | None  # centroid model alone, without a threshold
+
+    @property
+    def coverage(self) -> float:
+        return self.decided / self.examples if self.examples else 0.0
+
+    @property
+    def agreement(self) -> float:
+        return self.agreed / self.decided if self.decided else 0.0
+
+
+def evaluate(
+    model: CentroidModel | None,
+    questions: list[str],
+    vectors: np.ndarray,
+    labels: list[str],
+    min_confidence: float,
+) -> Agreement:
+    """Measure how often the fast path would decide, and how often it agrees.
+
+    Args:
+        model: Centroid model, or None to evaluate the keyword rules alone.
+        questions: Held-out user questions.
+        vectors: Their embeddings.
+        labels: The routes stored for them.
+        min_confidence: Confidence below which the LLM router would be called.
+    """
+    by_source: dict[str, list[int]] = {"rules": [0, 0], "centroid": [0, 0]}
+    correct = 0
+    for question, vector, label in zip(questions, vectors, labels, strict=True):
+        predicted = model.predict(vector) if model is not None else None
+        correct += predicted is not None and predicted.destination == label
+        decision = match_rules(question)
+        if decision is None and predicted is not None and predicted.confidence >= min_confidence:
+            decision = predicted
+        if decision is not None:
+            counts = by_source[decision.source]
+            counts[0] += 1
+            counts[1] += decision.destination == label
+    return Agreement(
+        examples=len(labels),
+        decided=sum(counts[0] for counts in by_source.values()),
+        agreed=sum(counts[1] for counts in by_source.values()),
+        by_source={source: (decided, agreed) for source, (decided, agreed) in by_source.items()},
+        centroid_accuracy=correct / len(labels) if model is not None and labels else None,
+    )
@@ -3,11 +3,15 @@
 import logging
 from typing import Literal
 
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 
-from app.agents.prompts.router import router_prompt
+from app.agents import fast_router
+from app.agents.prompts.router import ROUTER_SYSTEM_PROMPT, router_prompt
 from app.config import settings
+from app.core.metrics import router_decisions_total
+from app.services import embedding_service, llm_cache
+from app.services.llm_clients import get_chat_model
 
 logger = logging.getLogger(__name__)
 
@@ -23,43 +27,100 @@ class RouteQuery(BaseModel):
         ...,
         description="Brief explanation for why this destination was chosen.",
     )
+    # Which classifier decided (rules, centroid, llm); not part of the LLM schema
+    source: SkipJsonSchema[str] = "llm"
 
 
 class RouterAgent:
     """Agent that routes queries to the appropriate pipeline."""
 
     def __init__(self):
-        llm = ChatOpenAI(
-            model=settings.openai_chat_model,
-            api_key=settings.openai_api_key,
-            temperature=0,
-        )
+        self._llm = get_chat_model(temperature=0)
+        self.router = self._build_router(self._llm)
+
+    @staticmethod
+    def _build_router(llm):
         # Use structured output for reliable routing
-        self.router = router_prompt | llm.with_structured_output(RouteQuery)
+        return router_prompt | llm.with_structured_output(RouteQuery)
+
+    async def _decide(self, query: str) -> str:
+        llm = get_chat_model(temperature=0)
+        if llm is not self._llm:
+            # The shared clients were closed (llm_clients.close) and recreated since
+            self._llm, self.router = llm, self._build_router(llm)
+        decision = await self.router.ainvoke({"input": query})
+        return RouteQuery(
+            destination=decision.destination, reasoning=decision.reasoning
+        ).model_dump_json()
+
+    async def _fast_route(self, query: str) -> fast_router.FastDecision | None:
+        """Try the local classifiers; None means the LLM has to decide."""
+        decision = fast_router.match_rules(query)
+        if decision is None:
+            model = fast_router.get_model()
+            if model is None:
+                return None
+            try:
+                vector = await embedding_service.embed_query(query)
+            except Exception as e:
+                logger.warning("Fast router could not embed the query: %s", e)
+                return None
+            decision = model.predict(vector)
+        if decision.confidence < settings.fast_router_min_confidence:
+            return None
+        return decision
 
     async def route(self, query: str) -> RouteQuery:
         """Decide where to route the query.
 
+        Confident keyword or centroid classifications (see ``fast_router``) are
+        returned without calling the LLM. LLM decisions are deterministic
+        (temperature 0), so repeated queries are served from ``llm_cache``.
+
         Args:
             query: The user's input message.
 
         Returns:
             RouteQuery object containing destination and reasoning.
         """
+        if settings.fast_router_enabled:
+            fast = await self._fast_route(query)
+            if fast is not None:
+                router_decisions_total.labels(source=fast.source).inc()
+                logger.info(
+                    "Fast router decision: %s (%s, confidence %.2f)",
+                    fast.destination,
+                    fast.source,
+                    fast.confidence,
+                )
+                return RouteQuery(
+                    destination=fast.destination,
+                    reasoning=f"Local {fast.source} classifier (confidence {fast.confidence:.2f})",
+                    source=fast.source,
+                )
+
         try:
-            decision = await self.router.ainvoke({"input": query})
+            key = llm_cache.cache_key(
+                "route", ROUTER_SYSTEM_PROMPT, settings.openai_chat_model, input=query
+            )
+            decision = RouteQuery.model_validate_json(
+                await llm_cache.cached_call(key, lambda: self._decide(query))
+            )
             logger.info(
                 "Router decision: %s (Reason: %s)",
                 decision.destination,
                 decision.reasoning,
             )
+            router_decisions_total.labels(source="llm").inc()
             return decision
         except Exception as e:
             logger.error("Router failed: %s", e)
             # Fallback to general chat or RAG on error
+            router_decisions_total.labels(source="error").inc()
             return RouteQuery(
                 destination="general_chat",
                 reasoning=f"Router error: {e}",
+                source="error",
             )
 
 
@@ -4,40 +4,54 @@ import logging
 
 from langchain_core.tools import tool
 
-from app.services import embedding_service, vector_store
+from app.services import context_packer, retrieval
+from app.services.context_packer import PackedContext
 
 logger = logging.getLogger(__name__)
 
 
-@tool
-async def search_documents(query: str) -> str:
-    """Search for relevant documents using semantic search.
+def _message(text: str) -> PackedContext:
+    return PackedContext(text=text, tokens=0, tokens_saved=0, passages=[])
+
+
+async def find_documents(query: str, token_budget: int | None = None, **options) -> PackedContext:
+    """Retrieve and pack the document context for a query.
 
     Args:
         query: The user's question or search query.
+        token_budget: Maximum context tokens (defaults to
+            ``settings.context_token_budget``).
+        **options: Per-request retrieval overrides (``top_k``, ``mmr_lambda``,
+            ``min_relative_score``, ``max_score_gap``, ``query_vector``); see
+            ``retrieval.retrieve``.
 
     Returns:
-        A formatted string containing relevant document chunks and their metadata.
+        The packed context; without passages (and a message as its text) when
+        nothing was found or the search failed.
     """
     try:
-        # Generate embedding for the query
-        query_vector = await embedding_service.embed_query(query)
-
-        # Search Qdrant
-        results = vector_store.search(query_vector, top_k=5)
+        # Hybrid (dense + BM25) search, cut off adaptively and diversified with MMR
+        results = await retrieval.retrieve(query, **options)
 
         if not results:
-            return "No relevant documents found."
-
-        # Format results for the LLM
-        context_parts = []
-        for i, res in enumerate(results, 1):
-            context_parts.append(
-                f"[Document {i}: {res.filename} (Score: {res.score:.2f})]\n{res.text}"
-            )
+            return _message("No relevant documents found.")
 
-        return "\n\n".join(context_parts)
+        # Merge neighbouring chunks and fit them into the prompt's token budget
+        return context_packer.pack_context(results, token_budget)
 
     except Exception as e:
         logger.exception("Document search failed: %s", e)
-        return f"Error searching documents: {e}"
+        return _message(f"Error searching documents: {e}")
+
+
+@tool
+async def search_documents(query: str) -> str:
+    """Search for relevant documents using semantic search.
+
+    Args:
+        query: The user's question or search query.
+
+    Returns:
+        A formatted string containing relevant document chunks and their metadata.
+    """
+    return (await find_documents(query)).text
@@ -1,18 +1,53 @@
 """SQL Database tool wrapper for Northwind."""
 
+import asyncio
 import logging
+from dataclasses import dataclass
+from typing import Any
 
+import asyncpg
 from langchain_community.utilities import SQLDatabase
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from app.config import settings
+from app.core.exceptions import SQLQueryError
 from app.core.sql_safety import validate_sql
 
 logger = logging.getLogger(__name__)
 
+BLOCKED_MESSAGE = "Query blocked by safety policy. Only SELECT statements are allowed."
+
+
+@dataclass
+class QueryResult:
+    """Rows returned by a query, with their Python types (as decoded by asyncpg)."""
+
+    columns: list[str]
+    rows: list[tuple[Any, ...]]
+    truncated: bool  # more rows than settings.northwind_max_rows were available
+
+    def to_text(self) -> str:
+        """Render the result as a plain-text table for the chat answer."""
+        if not self.rows:
+            return "(no rows)"
+        lines = [" | ".join(self.columns)]
+        lines += [
+            " | ".join("NULL" if value is None else str(value) for value in row)
+            for row in self.rows
+        ]
+        if self.truncated:
+            lines.append(f"... (first {len(self.rows)} rows)")
+        return "\n".join(lines)
+
 
 class NorthwindDatabase:
-    """Wrapper around LangChain's SQLDatabase with safety checks."""
+    """Wrapper around LangChain's SQLDatabase with safety checks.
+
+    Schema introspection uses LangChain's synchronous SQLDatabase (run in a
+    thread); generated queries run through ``execute`` on an asyncpg pool.
+    """
 
     def __init__(self):
         # We need a synchronous engine for LangChain's SQLDatabase
@@ -25,6 +60,22 @@ class NorthwindDatabase:
         )
         self.engine = create_engine(sync_url)
         self.db = SQLDatabase(self.engine)
+        self._async_engine: AsyncEngine | None = None
+        self._schema: str | None = None
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """Pool of read-only connections for generated queries (created on first use)."""
+        if self._async_engine is None:
+            url = make_url(settings.northwind_readonly_url).set(drivername="postgresql+asyncpg")
+            self._async_engine = create_async_engine(
+                url,
+                pool_size=settings.northwind_pool_size,
+                max_overflow=settings.northwind_pool_max_overflow,
+                pool_timeout=settings.northwind_pool_timeout_seconds,
+                pool_pre_ping=True,
+            )
+        return self._async_engine
 
     def list_tables(self) -> list[str]:
         """List all usable tables in the Northwind database."""
@@ -34,13 +85,74 @@ class NorthwindDatabase:
         """Get DDL schema for specific tables."""
         return self.db.get_table_info(table_names)
 
+    async def schema(self) -> str:
+        """Return the DDL of all usable tables, introspected once in a thread."""
+        if self._schema is None:
+
+            def introspect() -> str:
+                tables = self.list_tables()
+                return self.get_schema(tables) if tables else "No tables found."
+
+            self._schema = await asyncio.to_thread(introspect)
+        return self._schema
+
     def run_query(self, query: str) -> str:
         """Execute a safe SQL query."""
         if not validate_sql(query):
-            return "Error: Query blocked by safety policy. Only SELECT statements are allowed."
+            return f"Error: {BLOCKED_MESSAGE}"
 
         try:
             return self.db.run(query)
         except Exception as e:
             logger.error("Query execution failed: %s", e)
             return f"Error executing query: {e}"
+
+    async def execute(self, query: str) -> QueryResult:
+        """Execute a safe SQL query without blocking the event loop.
+
+        The query runs in a read-only transaction with
+        ``settings.northwind_statement_timeout_ms`` as its statement timeout, and
+        at most ``settings.northwind_max_rows`` rows are fetched (through a
+        server-side cursor). If the calling task is cancelled (the client went
+        away), asyncpg cancels the query on the server and the connection is
+        discarded rather than returned to the pool.
+
+        Raises:
+            SQLQueryError: If the query is blocked, fails or times out.
+        """
+        if not validate_sql(query):
+            raise SQLQueryError(BLOCKED_MESSAGE)
+
+        timeout_ms = settings.northwind_statement_timeout_ms
+        async with self.async_engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver: asyncpg.Connection = raw.driver_connection
+            try:
+                async with driver.transaction(readonly=True):
+                    await driver.fetchval(
+                        "SELECT set_config('statement_timeout', $1, true)", str(timeout_ms)
+                    )
+                    statement = await driver.prepare(query)
+                    columns = [attribute.name for attribute in statement.get_attributes()]
+                    cursor = await statement.cursor()
+                    records = await cursor.fetch(settings.northwind_max_rows + 1)
+            except asyncio.CancelledError:
+                await asyncio.shield(conn.invalidate())
+                raise
+            except asyncpg.QueryCanceledError as e:
+                logger.warning("Query timed out after %d ms: %s", timeout_ms, query)
+                raise SQLQueryError(f"Query exceeded the {timeout_ms} ms time limit") from e
+            except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.error("Query execution failed: %s", e)
+                raise SQLQueryError(f"Error executing query: {e}") from e
+
+        truncated = len(records) > settings.northwind_max_rows
+        rows = [tuple(record) for record in records[: settings.northwind_max_rows]]
+        return QueryResult(columns=columns, rows=rows, truncated=truncated)
+
+    async def close(self) -> None:
+        """Close both connection pools."""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+        await asyncio.to_thread(self.engine.dispose)
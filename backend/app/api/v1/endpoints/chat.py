@@ -1,6 +1,11 @@
 """Chat endpoint with RAG + SQL + Streaming support."""
 
-from fastapi import APIRouter, Depends
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
@@ -9,12 +14,44 @@ from app.core.auth import verify_api_key
 from app.db.session import get_db_session
 from app.services import chat_service, history_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# How often a non-streaming request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+async def _collect(stream_gen: AsyncIterator[str]) -> tuple[str, dict]:
+    """Consume the event stream into the final content and metadata."""
+    final_content = ""
+    meta = {}
+
+    async for event_str in stream_gen:
+        # event_str is a JSON string like '{"type": "token", ...}'
+        # We need to parse it to aggregate content
+        import json
+
+        try:
+            event = json.loads(event_str)
+            if event["type"] == "token":
+                final_content += event["content"]
+            elif event["type"] == "metadata":
+                meta = event["metadata"]
+            elif event["type"] == "error":
+                # In non-streaming, we might raise HTTP error or return error message
+                final_content = f"Error: {event['content']}"
+        except Exception as e:
+            # Log parsing errors but continue consuming
+            logger.warning("Failed to parse SSE event: %s", e)
+
+    return final_content, meta
+
 
 @router.post("", response_model=MessageResponse | None)
 async def chat(
     request: ChatRequest,
+    http_request: Request,
     _api_key: str = Depends(verify_api_key),
     db: AsyncSession = Depends(get_db_session),
 ):
@@ -28,7 +65,12 @@ async def chat(
     Streaming:
     - If `stream=True`, returns an SSE stream (text/event-stream).
     - Else, returns a standard JSON response.
+
+    Work in progress (such as a running SQL query) is cancelled if the client
+    disconnects: by the SSE response when streaming, by polling otherwise.
     """
+    retrieval = request.retrieval.model_dump(exclude_none=True) if request.retrieval else None
+
     if request.stream:
         # Return SSE stream
         return EventSourceResponse(
@@ -37,6 +79,7 @@ async def chat(
                 user_message=request.message,
                 db=db,
                 mode=request.mode,
+                retrieval=retrieval,
             )
         )
 
@@ -48,30 +91,20 @@ async def chat(
         user_message=request.message,
         db=db,
         mode=request.mode,
+        retrieval=retrieval,
     )
 
-    final_content = ""
-    meta = {}
-
-    async for event_str in stream_gen:
-        # event_str is a JSON string like '{"type": "token", ...}'
-        # We need to parse it to aggregate content
-        import json
-
-        try:
-            event = json.loads(event_str)
-            if event["type"] == "token":
-                final_content += event["content"]
-            elif event["type"] == "metadata":
-                meta = event["metadata"]
-            elif event["type"] == "error":
-                # In non-streaming, we might raise HTTP error or return error message
-                final_content = f"Error: {event['content']}"
-        except Exception as e:
-            # Log parsing errors but continue consuming
-            import logging
-
-            logging.getLogger(__name__).warning("Failed to parse SSE event: %s", e)
+    collect = asyncio.create_task(_collect(stream_gen))
+    while not (await asyncio.wait({collect}, timeout=DISCONNECT_POLL_SECONDS))[0]:
+        if await http_request.is_disconnected():
+            collect.cancel()
+            # Let the pipeline unwind (close its query, roll back) before the
+            # request's DB session is released
+            with contextlib.suppress(asyncio.CancelledError):
+                await collect
+            logger.info("Client disconnected, cancelled chat request")
+            return None
+    final_content, meta = collect.result()
 
     # We need to construct a MessageResponse
     # But wait, `process_message_stream` saves to DB internally.
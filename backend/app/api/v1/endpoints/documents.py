@@ -7,7 +7,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.schemas.documents import DocumentListResponse, DocumentResponse, UploadResponse
 from app.core.auth import verify_api_key
-from app.core.exceptions import DocumentProcessingError
 from app.db.session import get_db_session
 from app.services import document_service
 
@@ -15,17 +14,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-ALLOWED_TYPES = {
-    "application/pdf",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-}
 
-MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-
-
-@router.post("/upload", response_model=UploadResponse)
+@router.post("/upload", response_model=UploadResponse, status_code=202)
 async def upload_document(
     file: UploadFile,
     _api_key: str = Depends(verify_api_key),
@@ -33,29 +23,48 @@ async def upload_document(
 ):
     """Upload a document for processing.
 
-    Accepts PDF, Word, Excel, and PowerPoint files up to 50MB.
-    The document is processed asynchronously: extracted, chunked, embedded, and stored.
+    Accepts PDF, Word, Excel, and PowerPoint files up to ``MAX_UPLOAD_SIZE_BYTES`` (50MB).
+    The document is queued and processed in the background: extracted, chunked,
+    embedded, and stored. Poll ``GET /documents/{id}`` until its status is "ready".
+    Uploading a file whose content already exists returns the existing document.
+    """
+    # Stream to upload storage (size enforced while copying) and queue for the workers
+    doc, created = await document_service.submit_document(
+        filename=file.filename or "untitled",
+        content_type=file.content_type,
+        stream=file,
+        db=db,
+    )
+
+    return UploadResponse(
+        document_id=str(doc.id),
+        filename=doc.filename,
+        status=doc.status,
+        message=(
+            "Document queued for processing"
+            if created
+            else "Identical document already uploaded; returning existing document"
+        ),
+    )
+
+
+@router.put("/{document_id}", response_model=UploadResponse, status_code=202)
+async def replace_document(
+    document_id: str,
+    file: UploadFile,
+    _api_key: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Replace a document with a new version of the file.
+
+    The document keeps its ID and is re-ingested in the background. Only chunks
+    that changed are embedded again; chunks that no longer exist are removed.
     """
-    # Validate content type
-    if file.content_type not in ALLOWED_TYPES:
-        raise DocumentProcessingError(
-            f"Unsupported file type: {file.content_type}. Supported: PDF, Word, Excel, PowerPoint"
-        )
-
-    # Read file bytes
-    file_bytes = await file.read()
-
-    # Validate size
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise DocumentProcessingError(
-            f"File too large ({len(file_bytes)} bytes). Maximum: {MAX_FILE_SIZE} bytes"
-        )
-
-    # Process through the ingestion pipeline
-    doc = await document_service.process_document(
+    doc = await document_service.replace_document(
+        document_id=document_id,
         filename=file.filename or "untitled",
         content_type=file.content_type,
-        file_bytes=file_bytes,
+        stream=file,
         db=db,
     )
 
@@ -63,7 +72,11 @@ async def upload_document(
         document_id=str(doc.id),
         filename=doc.filename,
         status=doc.status,
-        message=f"Document processed: {doc.chunk_count} chunks created",
+        message=(
+            "Document queued for re-processing"
+            if doc.status == "processing"
+            else "Document unchanged"
+        ),
     )
 
 
@@ -6,6 +6,36 @@ from typing import Literal
 from pydantic import BaseModel, Field
 
 
+class RetrievalOptions(BaseModel):
+    """Per-request overrides of the retrieval settings (unset = configured default)."""
+
+    top_k: int | None = Field(default=None, ge=1, le=20)
+    mmr_lambda: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Relevance weight for MMR diversification; 1.0 disables it.",
+    )
+    min_relative_score: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Drop hits scoring below this fraction of the best hit.",
+    )
+    max_score_gap: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Stop at the first relative score drop larger than this.",
+    )
+    token_budget: int | None = Field(
+        default=None,
+        ge=100,
+        le=100_000,
+        description="Maximum prompt tokens of retrieved context.",
+    )
+
+
 class ChatRequest(BaseModel):
     session_id: str | None = None
     message: str = Field(..., min_length=1, max_length=4000)
@@ -17,6 +47,10 @@ class ChatRequest(BaseModel):
         default=False,
         description="Whether to stream the response (SSE).",
     )
+    retrieval: RetrievalOptions | None = Field(
+        default=None,
+        description="Document retrieval overrides for the RAG pipeline.",
+    )
 
 
 class ChatResponseChunk(BaseModel):
@@ -1,5 +1,7 @@
 """Application configuration loaded from environment variables."""
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -20,14 +22,151 @@ class Settings(BaseSettings):
 
     # PostgreSQL (Northwind - text-to-SQL)
     northwind_db: str = "northwind"
+    # Generated queries run as the read-only role on their own asyncpg pool, each
+    # in a read-only transaction with a statement timeout
+    northwind_pool_size: int = 5
+    northwind_pool_max_overflow: int = 5
+    northwind_pool_timeout_seconds: float = 10.0
+    northwind_statement_timeout_ms: int = 15_000
+    northwind_max_rows: int = 1000  # rows fetched per query; the rest are dropped
+
+    # Vector store backend: a Qdrant server, or "local" (in-process, persisted to
+    # local_vector_store_path; single process only, so run ingestion workers in the API)
+    vector_store_backend: Literal["qdrant", "local"] = "qdrant"
+    local_vector_store_path: str = "data/vector_store"
+    # Search is exact (brute-force) below this many points and uses an HNSW index
+    # (needs hnswlib) from there on; 0 = always exact
+    local_vector_store_hnsw_min_points: int = 50_000
+    local_vector_store_hnsw_m: int = 16
+    local_vector_store_hnsw_ef_construction: int = 200
+    local_vector_store_hnsw_ef_search: int = 128
 
     # Qdrant
     qdrant_host: str = "localhost"
     qdrant_port: int = 6333
     qdrant_collection_name: str = "documents"
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = False  # gRPC: lower per-call overhead for search/upsert
+    qdrant_timeout_seconds: int = 30
+    qdrant_upsert_batch_size: int = 100  # points per upsert request
+    qdrant_upsert_parallelism: int = 4  # upsert requests in flight per call
+    # Ingestion workers switch the collection to bulk-load mode (HNSW indexing off)
+    # while at least this many jobs are queued, and re-enable it once the queue
+    # drains (0 = never)
+    qdrant_bulk_load_min_backlog: int = 50
+    qdrant_indexing_threshold_kb: int = 10000  # restored after a bulk load if unknown
+    # Collection storage profile, applied when the collection is created
+    # (see services/collection_profiles.py)
+    qdrant_collection_profile: Literal["fast-in-ram", "int8-rescore", "binary-oversample"] = (
+        "fast-in-ram"
+    )
+    qdrant_vectors_on_disk: bool = False  # memory-map original vectors instead of RAM
+    qdrant_hnsw_on_disk: bool = False
+    qdrant_payload_on_disk: bool = True
+    qdrant_search_hnsw_ef: int = 0  # 0 = collection default
+
+    # Hybrid search: BM25 sparse vectors stored next to the dense ones, searched
+    # together and merged with reciprocal-rank fusion. Collections created before
+    # sparse vectors were added fall back to dense-only search.
+    hybrid_search_enabled: bool = True
+    hybrid_prefetch_limit: int = 50  # candidates per retriever before fusion
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    bm25_avg_chunk_terms: int = 300  # typical terms in a full chunk (~2048 chars)
+
+    # Retrieval: over-fetch candidates, cut them where relevance drops off, then
+    # pick up to retrieval_top_k with maximal marginal relevance (MMR). Cutoffs are
+    # relative to the best cosine similarity (also for hybrid searches).
+    retrieval_top_k: int = 5
+    retrieval_candidates: int = 20
+    mmr_lambda: float = 0.7  # 1.0 = relevance only, 0.0 = diversity only
+    retrieval_min_relative_score: float = 0.4  # drop hits below this fraction of the best
+    retrieval_max_score_gap: float | None = None  # stop at a relative drop larger than this
+    # Prompt tokens available for retrieved context (chunk token counts are stored
+    # at ingestion; neighbouring chunks are merged and their overlap removed)
+    context_token_budget: int = 3000
 
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # optional override (proxy, gateway, local stub server)
+    # Connection pool shared by all chat models and the embeddings client
+    openai_http2: bool = True
+    openai_http_max_connections: int = 100
+    openai_http_max_keepalive_connections: int = 20
+    openai_http_keepalive_expiry_seconds: float = 30.0
+    openai_http_connect_timeout_seconds: float = 5.0
+    openai_http_timeout_seconds: float = 120.0  # read/write/pool (long streamed answers)
+
+    # Embedding requests
+    # Inputs are split into requests bounded by both limits (tokens estimated as
+    # chars / 4) and sent concurrently; 429/5xx responses are retried with backoff.
+    embedding_batch_max_inputs: int = 256  # API limit: 2048
+    embedding_batch_max_tokens: int = 200_000  # API limit: 300k; headroom for the estimate
+    embedding_max_concurrency: int = 4  # concurrent requests per embed_texts call
+    embedding_max_retries: int = 5
+    embedding_retry_backoff_seconds: float = 1.0
+    embedding_retry_backoff_max_seconds: float = 60.0
+    # Concurrent query embeddings are coalesced into one request (0 ms = disabled)
+    embedding_coalesce_window_ms: float = 5.0
+    embedding_coalesce_max_batch_size: int = 64
+
+    # Embedding cache (local SQLite file, LRU-bounded; 0 entries = disabled)
+    embedding_cache_path: str = "data/embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 200_000  # ~1.3 GB at 1536 float32 dimensions
+
+    # Semantic answer cache: RAG answers reused for questions whose embedding is at
+    # least answer_cache_similarity (cosine) close to a cached one. Entries are
+    # dropped when a source document is deleted or re-ingested (0 entries = disabled).
+    answer_cache_path: str = "data/answer_cache.sqlite3"
+    answer_cache_max_entries: int = 10_000
+    answer_cache_similarity: float = 0.95
+    answer_cache_ttl_seconds: int = 24 * 3600
+
+    # Cache of deterministic (temperature 0) router and text-to-SQL calls: an
+    # in-process LRU (0 entries = disabled) plus an optional SQLite file shared by
+    # the processes on a host ("" = memory only)
+    llm_cache_max_entries: int = 2048
+    llm_cache_ttl_seconds: int = 24 * 3600
+    llm_cache_path: str = ""
+
+    # Local fast-path router: keyword rules plus a nearest-centroid model over query
+    # embeddings (trained with scripts/train_fast_router.py). The LLM router is only
+    # called below this confidence.
+    fast_router_enabled: bool = True
+    fast_router_model_path: str = "data/fast_router.npz"
+    fast_router_min_confidence: float = 0.8
+
+    # Start the RAG query embedding and search in parallel with routing in auto
+    # mode; the result is dropped (or the work cancelled) for other routes
+    speculative_retrieval_enabled: bool = True
+
+    # Uploads
+    max_upload_size_bytes: int = 50 * 1024 * 1024  # 50 MB
+
+    # Ingestion queue
+    # Uploads are written here and picked up by ingestion workers. When several API
+    # nodes or standalone workers share the queue this must be a shared volume.
+    upload_storage_dir: str = "data/uploads"
+    ingestion_workers_in_api: bool = True  # run the worker pool inside the API process
+    ingestion_worker_concurrency: int = 2
+    ingestion_poll_interval_seconds: float = 1.0
+    ingestion_max_attempts: int = 5
+    ingestion_retry_backoff_seconds: float = 10.0
+    ingestion_retry_backoff_max_seconds: float = 600.0
+    # A "processing" job whose lease is not renewed within this window is assumed to
+    # belong to a crashed worker and is put back on the queue.
+    ingestion_lease_seconds: float = 300.0
+    # Chunks embedded and upserted together; bounds pipeline memory per document
+    ingestion_batch_size: int = 64
+
+    # Text extraction process pool (0 workers = run in a thread, no isolation)
+    extraction_pool_workers: int = 2
+    extraction_timeout_seconds: float = 120.0
+    extraction_max_memory_mb: int = 1024  # per worker address-space cap, 0 = unlimited
+    extraction_max_tasks_per_child: int = 20  # recycle workers to release leaked memory
+    # PDFs with at least this many pages are extracted as parallel page ranges (0 = off)
+    pdf_parallel_min_pages: int = 100
+    pdf_pages_per_task: int = 50
 
     @property
     def app_database_url(self) -> str:
@@ -46,7 +185,13 @@ class Settings(BaseSettings):
         )
 
     openai_embedding_model: str = "text-embedding-3-small"
+    # Vector size requested from the embedding model. text-embedding-3 models can
+    # return shortened vectors (e.g. 512 or 256) that are much cheaper to store and
+    # search; other models must use their native size. Each model/size pair gets
+    # its own Qdrant collection, so changing this requires re-ingesting documents.
+    openai_embedding_dimensions: int = 1536
     openai_chat_model: str = "gpt-4o"
+    token_encoding: str = "o200k_base"  # tiktoken encoding of the chat model
 
     # LangSmith
     langchain_tracing_v2: bool = True
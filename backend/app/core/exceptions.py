@@ -24,6 +24,27 @@ class DocumentProcessingError(RAGSystemError):
         super().__init__(message=message, code="DOCUMENT_PROCESSING_ERROR")
 
 
+class FileTooLargeError(DocumentProcessingError):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int):
+        RAGSystemError.__init__(
+            self,
+            message=f"File exceeds maximum upload size ({max_bytes} bytes)",
+            code="FILE_TOO_LARGE",
+        )
+
+
+class ExtractionUnavailableError(RAGSystemError):
+    """Raised when the extraction pool keeps failing for reasons unrelated to the file.
+
+    Unlike DocumentProcessingError this is transient: the job should be retried.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message=message, code="EXTRACTION_UNAVAILABLE")
+
+
 class LLMError(RAGSystemError):
     """Raised when LLM API calls fail."""
 
@@ -31,6 +52,20 @@ class LLMError(RAGSystemError):
         super().__init__(message=message, code="LLM_ERROR")
 
 
+class VectorStoreError(RAGSystemError):
+    """Raised when the vector store is unusable with the current configuration."""
+
+    def __init__(self, message: str):
+        super().__init__(message=message, code="VECTOR_STORE_ERROR")
+
+
+class SQLQueryError(RAGSystemError):
+    """Raised when a generated SQL query is blocked, fails or times out."""
+
+    def __init__(self, message: str):
+        super().__init__(message=message, code="SQL_QUERY_ERROR")
+
+
 class NotFoundError(RAGSystemError):
     """Raised when a requested resource is not found."""
 
@@ -39,3 +74,10 @@ class NotFoundError(RAGSystemError):
             message=f"{resource} with id '{resource_id}' not found",
             code="NOT_FOUND",
         )
+
+
+class ConflictError(RAGSystemError):
+    """Raised when a request conflicts with the current state of a resource."""
+
+    def __init__(self, message: str):
+        super().__init__(message=message, code="CONFLICT")
@@ -11,6 +11,35 @@ documents_processed_total = Counter(
     ["status"],  # success, error
 )
 
+documents_deduplicated_total = Counter(
+    "rag_documents_deduplicated_total",
+    "Uploads short-circuited because identical content was already ingested",
+)
+
+embedding_chunks_saved_total = Counter(
+    "rag_embedding_chunks_saved_total",
+    "Chunk embeddings skipped because identical content was already stored",
+    ["source"],  # duplicate_upload, incremental (unchanged chunks on re-ingestion)
+)
+
+embedding_cache_requests_total = Counter(
+    "rag_embedding_cache_requests_total",
+    "Embedding cache lookups, per text",
+    ["result"],  # hit, miss
+)
+
+embedding_coalesce_batch_size = Histogram(
+    "rag_embedding_coalesce_batch_size",
+    "Distinct query texts per coalesced embedding request",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128],
+)
+
+embedding_coalesce_wait_seconds = Histogram(
+    "rag_embedding_coalesce_wait_seconds",
+    "Time a query embedding waited for its batch to be sent",
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1],
+)
+
 rag_queries_total = Counter(
     "rag_queries_total",
     "Total number of RAG queries",
@@ -23,3 +52,45 @@ llm_latency_seconds = Histogram(
     ["operation"],  # embed, chat, route, sql
     buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
 )
+
+retrieval_results = Histogram(
+    "rag_retrieval_results",
+    "Search hits kept for the prompt after the adaptive cutoff and MMR",
+    buckets=[0, 1, 2, 3, 4, 5, 8, 13, 20],
+)
+
+context_tokens_saved = Histogram(
+    "rag_context_tokens_saved",
+    "Prompt tokens saved per request by merging overlapping chunks and the token budget",
+    buckets=[0, 50, 100, 250, 500, 1000, 2500, 5000],
+)
+
+answer_cache_requests_total = Counter(
+    "rag_answer_cache_requests_total",
+    "Semantic answer cache lookups",
+    ["result"],  # hit, miss
+)
+
+llm_cache_requests_total = Counter(
+    "rag_llm_cache_requests_total",
+    "Deterministic LLM call cache lookups",
+    ["operation", "result"],  # result: memory, persistent, coalesced, miss
+)
+
+router_decisions_total = Counter(
+    "rag_router_decisions_total",
+    "Routing decisions by the classifier that made them",
+    ["source"],  # rules, centroid, llm, error
+)
+
+speculative_retrieval_total = Counter(
+    "rag_speculative_retrieval_total",
+    "RAG retrievals started in parallel with routing, by outcome",
+    ["outcome"],  # used, cancelled (route was not rag), discarded (finished, not rag)
+)
+
+speculative_retrieval_wasted_seconds = Histogram(
+    "rag_speculative_retrieval_wasted_seconds",
+    "Time spent on speculative retrievals whose result was not used",
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+)
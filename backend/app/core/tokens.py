@@ -0,0 +1,52 @@
+"""Token counting for prompt budgeting.
+
+Uses the tiktoken encoding of the chat model (``settings.token_encoding``). If
+the encoding cannot be loaded (tiktoken downloads it on first use), counts fall
+back to a characters-per-token estimate so ingestion never fails on it.
+"""
+
+import logging
+import math
+import threading
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+# Lazy-initialized encoding (None = unavailable, use the estimate)
+_encoding = None
+_encoding_loaded = False
+_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the configured tiktoken encoding once per process."""
+    global _encoding, _encoding_loaded  # noqa: PLW0603
+    if not _encoding_loaded:
+        with _lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(settings.token_encoding)
+                except Exception as e:
+                    logger.warning(
+                        "Tokenizer %s unavailable (%s); estimating token counts",
+                        settings.token_encoding,
+                        e,
+                    )
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Return the number of tokens in text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
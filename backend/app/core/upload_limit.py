@@ -0,0 +1,95 @@
+"""Early rejection of oversized upload bodies."""
+
+import logging
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies larger than a byte limit before they are fully received.
+
+    Starlette parses (and spools) the whole multipart body before the endpoint runs,
+    so a size check in the endpoint only fires after the upload has been received.
+    This middleware refuses a declared ``Content-Length`` over the limit up front,
+    and counts bytes as they arrive to stop chunked uploads that cross it.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int, path_prefix: str = "/"):
+        self.app = app
+        self.max_body_bytes = max_body_bytes + MULTIPART_OVERHEAD_BYTES
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PUT")
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = -1
+            if declared < 0:
+                response = JSONResponse(
+                    status_code=400,
+                    content={
+                        "error": "INVALID_CONTENT_LENGTH",
+                        "message": "Invalid Content-Length",
+                    },
+                )
+                await response(scope, receive, send)
+                return
+            if declared > self.max_body_bytes:
+                logger.warning("Rejected upload with Content-Length %d", declared)
+                await self._too_large()(scope, receive, send)
+                return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    if not response_started and not rejected:
+                        # Answer with the same body as the Content-Length check; the
+                        # app's own error response for the exception below is dropped
+                        logger.warning("Rejected streamed upload over %d bytes", received)
+                        rejected = True
+                        await self._too_large()(scope, receive, send)
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "error": "FILE_TOO_LARGE",
+                "message": f"Request body exceeds maximum size ({self.max_body_bytes} bytes)",
+            },
+        )
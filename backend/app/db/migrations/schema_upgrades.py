@@ -0,0 +1,26 @@
+"""Idempotent schema upgrades for databases created by an earlier version.
+
+``Base.metadata.create_all`` creates missing tables but never alters existing
+ones, so columns and indexes added to existing tables are listed here. Every
+statement is safe to run repeatedly.
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+UPGRADES = [
+    # Document.content_hash: SHA-256 of the upload, used to skip re-ingesting duplicates
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash varchar(64)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)",
+]
+
+
+async def upgrade_schema(conn: AsyncConnection) -> None:
+    """Apply all schema upgrades on an open connection (inside its transaction)."""
+    for statement in UPGRADES:
+        await conn.execute(text(statement))
+    logger.info("Applied %d schema upgrade statements", len(UPGRADES))
@@ -1,16 +1,21 @@
 """Document text chunking using LangChain's RecursiveCharacterTextSplitter."""
 
 import logging
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.core.tokens import count_tokens
+
 logger = logging.getLogger(__name__)
 
 # Design decision: 512 tokens (~2048 chars), 50 token overlap (~200 chars)
 # Per FloTorch benchmarks, this balances accuracy and context.
 CHUNK_SIZE = 2048  # approximate chars for ~512 tokens
 CHUNK_OVERLAP = 200  # approximate chars for ~50 tokens
+# iter_chunks splits its buffer once it holds this many chunks' worth of text
+STREAM_WINDOW_CHUNKS = 8
 
 
 @dataclass
@@ -22,6 +27,15 @@ class TextChunk:
     metadata: dict = field(default_factory=dict)
 
 
+def _make_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
 def chunk_text(
     text: str,
     document_id: str,
@@ -44,13 +58,7 @@ def chunk_text(
     if not text.strip():
         return []
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-
+    splitter = _make_splitter(chunk_size, chunk_overlap)
     raw_chunks = splitter.split_text(text)
 
     chunks = [
@@ -62,6 +70,7 @@ def chunk_text(
                 "filename": filename,
                 "chunk_index": i,
                 "total_chunks": len(raw_chunks),
+                "token_count": count_tokens(chunk_text_content),
             },
         )
         for i, chunk_text_content in enumerate(raw_chunks)
@@ -74,3 +83,67 @@ def chunk_text(
         sum(len(c.text) for c in chunks) // max(len(chunks), 1),
     )
     return chunks
+
+
+def iter_chunks(
+    segments: Iterable[str],
+    document_id: str,
+    filename: str,
+    separator: str = "\n\n",
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> Iterator[TextChunk]:
+    """Lazily chunk a stream of text segments.
+
+    Segments are joined with ``separator`` into a rolling buffer. Once the buffer
+    holds ``STREAM_WINDOW_CHUNKS`` chunks' worth of text it is split, every chunk
+    but the last is emitted, and the last is kept as the start of the next window,
+    so memory stays bounded by the window size regardless of document length.
+
+    Unlike ``chunk_text``, the total chunk count is not known while streaming, so
+    chunk metadata carries no ``total_chunks``.
+
+    Args:
+        segments: Text segments in document order (pages, rows, slides, ...).
+        document_id: UUID of the parent document.
+        filename: Original filename for metadata.
+        separator: String placed between consecutive segments.
+        chunk_size: Maximum chunk size in characters.
+        chunk_overlap: Overlap between consecutive chunks in characters.
+
+    Yields:
+        TextChunk objects with sequential chunk indices.
+    """
+    splitter = _make_splitter(chunk_size, chunk_overlap)
+    window = chunk_size * STREAM_WINDOW_CHUNKS
+    index = 0
+    buffer = ""
+
+    def make_chunk(text: str) -> TextChunk:
+        return TextChunk(
+            text=text,
+            chunk_index=index,
+            metadata={
+                "document_id": document_id,
+                "filename": filename,
+                "chunk_index": index,
+                "token_count": count_tokens(text),
+            },
+        )
+
+    for segment in segments:
+        buffer = f"{buffer}{separator}{segment}" if buffer else segment
+        if len(buffer) < window:
+            continue
+        pieces = splitter.split_text(buffer)
+        for piece in pieces[:-1]:
+            yield make_chunk(piece)
+            index += 1
+        buffer = pieces[-1] if pieces else ""
+
+    if buffer.strip():
+        for piece in splitter.split_text(buffer):
+            yield make_chunk(piece)
+            index += 1
+
+    logger.info("Streamed document %s into %d chunks", filename, index)
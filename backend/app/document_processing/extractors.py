@@ -1,7 +1,17 @@
-"""Text extraction from various document formats."""
+"""Text extraction from various document formats.
+
+Each format is extracted as a stream of segments (PDF pages, Word paragraphs and
+table rows, spreadsheet rows, slides) so callers can process a document without
+materializing its full text.
+"""
 
 import io
+import json
 import logging
+import mmap
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import IO
 
 from app.core.exceptions import DocumentProcessingError
 
@@ -15,103 +25,225 @@ SUPPORTED_TYPES = {
     "application/vnd.openxmlformats-officedocument.presentationml.presentation": "pptx",
 }
 
+# A document is given either as raw bytes or as the path of a stored file
+Source = bytes | str
 
-def extract_text(file_bytes: bytes, content_type: str) -> str:
-    """Extract text from a document based on its MIME type.
+# Separator between consecutive segments when a document is joined into one text
+SEGMENT_SEPARATORS = {
+    "pdf": "\n\n",
+    "docx": "\n",
+    "xlsx": "\n",
+    "pptx": "\n\n",
+}
 
-    Args:
-        file_bytes: Raw file bytes.
-        content_type: MIME type of the file.
 
-    Returns:
-        Extracted text content.
+def get_file_type(content_type: str) -> str:
+    """Map a MIME type to its short file type.
 
     Raises:
-        DocumentProcessingError: If extraction fails or type is unsupported.
+        DocumentProcessingError: If the type is unsupported.
     """
     file_type = SUPPORTED_TYPES.get(content_type)
     if file_type is None:
         raise DocumentProcessingError(
             f"Unsupported file type: {content_type}. Supported: {', '.join(SUPPORTED_TYPES.keys())}"
         )
+    return file_type
+
+
+def iter_segments(source: Source, content_type: str) -> Iterator[str]:
+    """Yield the text segments of a document based on its MIME type.
+
+    Args:
+        source: Raw file bytes, or the path of the file on disk.
+        content_type: MIME type of the file.
+
+    Yields:
+        Text segments in document order. Joining them with
+        ``SEGMENT_SEPARATORS[file_type]`` gives the output of ``extract_text``.
+
+    Raises:
+        DocumentProcessingError: If extraction fails or type is unsupported.
+    """
+    file_type = get_file_type(content_type)
 
     extractors = {
-        "pdf": _extract_pdf,
-        "docx": _extract_docx,
-        "xlsx": _extract_xlsx,
-        "pptx": _extract_pptx,
+        "pdf": _iter_pdf,
+        "docx": _iter_docx,
+        "xlsx": _iter_xlsx,
+        "pptx": _iter_pptx,
     }
 
     try:
-        text = extractors[file_type](file_bytes)
-        if not text.strip():
-            raise DocumentProcessingError("No text content found in document")
-        logger.info("Extracted %d characters from %s file", len(text), file_type)
-        return text
+        yield from extractors[file_type](source)
     except DocumentProcessingError:
         raise
     except Exception as e:
         raise DocumentProcessingError(f"Failed to extract text from {file_type}: {e}") from e
 
 
-def _extract_pdf(file_bytes: bytes) -> str:
-    """Extract text from a PDF file."""
+def extract_text(source: Source, content_type: str) -> str:
+    """Extract text from a document based on its MIME type.
+
+    Args:
+        source: Raw file bytes, or the path of the file on disk.
+        content_type: MIME type of the file.
+
+    Returns:
+        Extracted text content.
+
+    Raises:
+        DocumentProcessingError: If extraction fails or type is unsupported.
+    """
+    file_type = get_file_type(content_type)
+    text = SEGMENT_SEPARATORS[file_type].join(iter_segments(source, content_type))
+    if not text.strip():
+        raise DocumentProcessingError("No text content found in document")
+    logger.info("Extracted %d characters from %s file", len(text), file_type)
+    return text
+
+
+# --- Segment files -----------------------------------------------------------
+# Extraction workers stream segments to JSON-lines files (one JSON string per
+# line) that the parent process reads back lazily.
+
+
+def _write_segments(segments: Iterable[str], out_path: str) -> int:
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for segment in segments:
+            f.write(json.dumps(segment))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_segments(source: Source, content_type: str, out_path: str) -> int:
+    """Extract a document into a segment file.
+
+    Returns:
+        Number of segments written.
+    """
+    return _write_segments(iter_segments(source, content_type), out_path)
+
+
+def read_segments(path: str) -> Iterator[str]:
+    """Lazily read the segments of a segment file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+# --- Format extractors -------------------------------------------------------
+
+
+def _file_or_buffer(source: Source) -> IO[bytes] | str:
+    """Wrap bytes in a BytesIO; pass paths through so zip-based formats read from disk."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+@contextmanager
+def _mmap_source(source: Source) -> Iterator[IO[bytes] | mmap.mmap]:
+    """Open a source as a seekable stream, memory-mapping files read-only."""
+    if isinstance(source, bytes):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+
+def _pdf_page_segment(number: int, text: str) -> str:
+    return f"--- Page {number} ---\n{text}"
+
+
+def _iter_pdf(source: Source) -> Iterator[str]:
+    """Yield the text of each non-empty PDF page."""
+    from PyPDF2 import PdfReader
+
+    # PdfReader copies a file path into memory; a memory map avoids that copy
+    with _mmap_source(source) as stream:
+        reader = PdfReader(stream)
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text()
+            if text:
+                yield _pdf_page_segment(i + 1, text)
+
+
+def pdf_page_count(path: str) -> int:
+    """Return the number of pages of the PDF at ``path``."""
     from PyPDF2 import PdfReader
 
-    reader = PdfReader(io.BytesIO(file_bytes))
-    pages = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text()
-        if text:
-            pages.append(f"--- Page {i + 1} ---\n{text}")
-    return "\n\n".join(pages)
+    with _mmap_source(path) as stream:
+        return len(PdfReader(stream).pages)
 
 
-def _extract_docx(file_bytes: bytes) -> str:
-    """Extract text from a Word document, including tables."""
+def iter_pdf_pages(path: str, start: int, stop: int) -> Iterator[str]:
+    """Yield the page segments of pages ``[start, stop)`` of the PDF at ``path``.
+
+    The file is memory-mapped read-only, so parallel workers extracting different
+    page ranges share the page cache instead of each receiving a copy of the bytes.
+    """
+    from PyPDF2 import PdfReader
+
+    with _mmap_source(path) as stream:
+        reader = PdfReader(stream)
+        for i in range(start, stop):
+            text = reader.pages[i].extract_text()
+            if text:
+                yield _pdf_page_segment(i + 1, text)
+
+
+def write_pdf_page_segments(path: str, start: int, stop: int, out_path: str) -> int:
+    """Extract pages ``[start, stop)`` of a PDF into a segment file.
+
+    Returns:
+        Number of segments written.
+    """
+    try:
+        return _write_segments(iter_pdf_pages(path, start, stop), out_path)
+    except Exception as e:
+        raise DocumentProcessingError(f"Failed to extract text from pdf: {e}") from e
+
+
+def _iter_docx(source: Source) -> Iterator[str]:
+    """Yield paragraphs, then table rows, of a Word document."""
     from docx import Document
 
-    doc = Document(io.BytesIO(file_bytes))
-    parts = []
+    doc = Document(_file_or_buffer(source))
 
     for paragraph in doc.paragraphs:
         if paragraph.text.strip():
-            parts.append(paragraph.text)
+            yield paragraph.text
 
     for table in doc.tables:
         for row in table.rows:
             row_text = " | ".join(cell.text.strip() for cell in row.cells)
             if row_text.strip("| "):
-                parts.append(row_text)
-
-    return "\n".join(parts)
+                yield row_text
 
 
-def _extract_xlsx(file_bytes: bytes) -> str:
-    """Extract text from an Excel spreadsheet."""
+def _iter_xlsx(source: Source) -> Iterator[str]:
+    """Yield a header per sheet followed by its non-empty rows."""
     from openpyxl import load_workbook
 
-    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
-    parts = []
-
-    for sheet_name in wb.sheetnames:
-        sheet = wb[sheet_name]
-        parts.append(f"--- Sheet: {sheet_name} ---")
-        for row in sheet.iter_rows(values_only=True):
-            row_text = " | ".join(str(cell) for cell in row if cell is not None)
-            if row_text.strip():
-                parts.append(row_text)
-
-    wb.close()
-    return "\n".join(parts)
+    wb = load_workbook(_file_or_buffer(source), read_only=True, data_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            sheet = wb[sheet_name]
+            yield f"--- Sheet: {sheet_name} ---"
+            for row in sheet.iter_rows(values_only=True):
+                row_text = " | ".join(str(cell) for cell in row if cell is not None)
+                if row_text.strip():
+                    yield row_text
+    finally:
+        wb.close()
 
 
-def _extract_pptx(file_bytes: bytes) -> str:
-    """Extract text from a PowerPoint presentation."""
+def _iter_pptx(source: Source) -> Iterator[str]:
+    """Yield the text of each non-empty slide."""
     from pptx import Presentation
 
-    prs = Presentation(io.BytesIO(file_bytes))
-    parts = []
+    prs = Presentation(_file_or_buffer(source))
 
     for i, slide in enumerate(prs.slides):
         slide_text = []
@@ -122,6 +254,4 @@ def _extract_pptx(file_bytes: bytes) -> str:
                     if text:
                         slide_text.append(text)
         if slide_text:
-            parts.append(f"--- Slide {i + 1} ---\n" + "\n".join(slide_text))
-
-    return "\n\n".join(parts)
+            yield f"--- Slide {i + 1} ---\n" + "\n".join(slide_text)
@@ -0,0 +1,254 @@
+"""Process pool for CPU-bound text extraction.
+
+PDF/Office parsing is pure-Python and holds the GIL, so running it on the event
+loop (or in a thread) stalls every in-flight request, including SSE chat streams.
+Extraction is instead dispatched to a pool of worker processes that are capped in
+memory and recycled after a fixed number of tasks. Workers stream the extracted
+segments to temp files that the caller reads back lazily.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.core.exceptions import DocumentProcessingError, ExtractionUnavailableError
+from app.document_processing.extractors import (
+    Source,
+    get_file_type,
+    pdf_page_count,
+    read_segments,
+    write_pdf_page_segments,
+    write_segments,
+)
+
+logger = logging.getLogger(__name__)
+
+# Times a task is resubmitted after the pool broke under it (another task timed
+# out and its workers were killed, or the OS killed a worker)
+BROKEN_POOL_RETRIES = 2
+
+# Lazy-initialized executor
+_executor: ProcessPoolExecutor | None = None
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    """Apply the address-space cap inside a freshly spawned worker."""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows: no rlimits, run uncapped
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Get or create the extraction process pool."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.extraction_pool_workers,
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.extraction_max_memory_mb,),
+            max_tasks_per_child=settings.extraction_max_tasks_per_child or None,
+        )
+        logger.info(
+            "Started extraction pool (workers=%d, max_memory_mb=%d, max_tasks_per_child=%d)",
+            settings.extraction_pool_workers,
+            settings.extraction_max_memory_mb,
+            settings.extraction_max_tasks_per_child,
+        )
+    return _executor
+
+
+def start_pool() -> None:
+    """Create the pool eagerly (called from the application lifespan)."""
+    if settings.extraction_pool_workers > 0:
+        _get_executor()
+
+
+def shutdown_pool() -> None:
+    """Shut the pool down, letting running tasks finish."""
+    global _executor  # noqa: PLW0603
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Kill a pool's workers and drop it so the next call starts a fresh one.
+
+    ProcessPoolExecutor has no per-task cancellation; terminating the workers is the
+    only way to stop a parse that is already running.
+    """
+    global _executor  # noqa: PLW0603
+    if _executor is executor:
+        _executor = None
+    # _processes is None once the executor has been shut down (already discarded)
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(fn: Callable[..., Any], *args, timeout: float) -> Any:
+    """Run ``fn(*args)`` in the pool (or a thread when disabled) with a timeout.
+
+    A running parse can only be stopped by killing the pool's workers, and
+    ProcessPoolExecutor then fails every task it was running. Tasks that fail that
+    way (or because the OS killed a worker) are resubmitted to a fresh pool within
+    the same deadline.
+
+    Raises:
+        DocumentProcessingError: If this task exceeds ``timeout``.
+        ExtractionUnavailableError: If the pool broke under it too many times.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    for attempt in itertools.count(1):
+        if settings.extraction_pool_workers <= 0:
+            # Pool disabled: keep the loop responsive with a thread, without isolation
+            executor = None
+            future = asyncio.to_thread(fn, *args)
+        else:
+            executor = _get_executor()
+            future = loop.run_in_executor(executor, fn, *args)
+
+        try:
+            return await asyncio.wait_for(future, timeout=deadline - loop.time())
+        except TimeoutError as e:
+            logger.error("Extraction exceeded %.1fs, recycling extraction pool", timeout)
+            if executor is not None:
+                _discard_executor(executor)
+            raise DocumentProcessingError(f"Text extraction timed out after {timeout:.1f}s") from e
+        except BrokenProcessPool as e:
+            # Collateral damage: the task itself may be fine
+            _discard_executor(executor)
+            if attempt > BROKEN_POOL_RETRIES or deadline <= loop.time():
+                raise ExtractionUnavailableError(
+                    "Extraction pool was restarted while processing the document"
+                ) from e
+            logger.warning("Extraction pool broken, retrying task on a fresh pool")
+
+
+@asynccontextmanager
+async def extracted_segments(source: Source, content_type: str) -> AsyncIterator[Iterator[str]]:
+    """Extract a document off the event loop and stream its segments back.
+
+    Workers write segments to temp files instead of returning the document's text,
+    so neither process holds the full extracted text. Large PDFs are split into page
+    ranges extracted in parallel across the pool. Temp files are removed on exit.
+
+    Usage:
+        async with extracted_segments(path, content_type) as segments:
+            for segment in segments: ...
+
+    Args:
+        source: Path of the stored file (preferred: workers open it themselves), or
+            raw bytes, which are pickled into the worker.
+        content_type: MIME type of the file.
+
+    Yields:
+        A lazy iterator over the document's segments, in order.
+
+    Raises:
+        DocumentProcessingError: If extraction fails or exceeds the timeout.
+    """
+    file_type = get_file_type(content_type)
+    work_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="rag-extract-")
+    try:
+        if (
+            file_type == "pdf"
+            and settings.extraction_pool_workers > 1
+            and settings.pdf_parallel_min_pages > 0
+        ):
+            paths = await _extract_pdf_parallel(source, content_type, work_dir)
+        else:
+            out_path = os.path.join(work_dir, "segments.jsonl")
+            await _run(
+                write_segments,
+                source,
+                content_type,
+                out_path,
+                timeout=settings.extraction_timeout_seconds,
+            )
+            paths = [out_path]
+        yield itertools.chain.from_iterable(read_segments(path) for path in paths)
+    finally:
+        await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+
+def _page_ranges(page_count: int, pages_per_task: int) -> list[tuple[int, int]]:
+    """Split ``[0, page_count)`` into consecutive ranges of at most ``pages_per_task``."""
+    step = max(pages_per_task, 1)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+
+async def _extract_pdf_parallel(source: Source, content_type: str, work_dir: str) -> list[str]:
+    """Extract a PDF page-range by page-range across the pool.
+
+    Every worker memory-maps the same file rather than receiving a pickled copy of
+    the document; bytes sources are written to a temp file first. Small PDFs fall
+    back to the single-task path.
+
+    Returns:
+        Segment file paths in page order.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.extraction_timeout_seconds
+    if isinstance(source, bytes):
+        pdf_path = os.path.join(work_dir, "document.pdf")
+        await asyncio.to_thread(Path(pdf_path).write_bytes, source)
+    else:
+        pdf_path = source
+
+    try:
+        page_count = await _run(pdf_page_count, pdf_path, timeout=deadline - loop.time())
+    except (DocumentProcessingError, ExtractionUnavailableError):
+        raise
+    except Exception as e:
+        raise DocumentProcessingError(f"Failed to extract text from pdf: {e}") from e
+
+    if page_count < settings.pdf_parallel_min_pages:
+        out_path = os.path.join(work_dir, "segments.jsonl")
+        await _run(write_segments, source, content_type, out_path, timeout=deadline - loop.time())
+        return [out_path]
+
+    ranges = _page_ranges(page_count, settings.pdf_pages_per_task)
+    paths = [os.path.join(work_dir, f"pages-{start:06d}.jsonl") for start, _ in ranges]
+    logger.info("Extracting %d PDF pages in %d parallel ranges", page_count, len(ranges))
+    tasks = [
+        asyncio.create_task(
+            _run(
+                write_pdf_page_segments,
+                pdf_path,
+                start,
+                stop,
+                out_path,
+                timeout=deadline - loop.time(),
+            )
+        )
+        for (start, stop), out_path in zip(ranges, paths, strict=True)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # The document has failed: stop resubmitting its other ranges
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return paths
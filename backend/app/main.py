@@ -1,5 +1,6 @@
 """FastAPI application factory with lifespan management."""
 
+import asyncio
 import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
@@ -11,8 +12,25 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.api.v1.router import api_router
 from app.config import settings
-from app.core.exceptions import AuthenticationError, NotFoundError, RAGSystemError
+from app.core.exceptions import (
+    AuthenticationError,
+    ConflictError,
+    FileTooLargeError,
+    NotFoundError,
+    RAGSystemError,
+    VectorStoreError,
+)
 from app.core.logging import setup_logging
+from app.core.upload_limit import UploadSizeLimitMiddleware
+from app.document_processing import pool as extraction_pool
+from app.services import (
+    answer_cache,
+    embedding_cache,
+    llm_cache,
+    llm_clients,
+    sql_service,
+    vector_store,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +42,40 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     setup_logging()
     logger.info("Starting %s v%s", settings.app_name, settings.app_version)
 
-    # Initialize Qdrant collection (lazy — services will call ensure_collection)
     logger.info("Qdrant configured at %s:%s", settings.qdrant_host, settings.qdrant_port)
+    try:
+        await vector_store.ensure_collection()
+    except VectorStoreError:
+        # Misconfigured (e.g. embedding size mismatch): refuse to start
+        raise
+    except Exception:
+        # Not fatal: ingestion retries the bootstrap before its first write
+        logger.warning("Qdrant collection bootstrap failed, deferring to first use", exc_info=True)
     logger.info("PostgreSQL configured at %s:%s", settings.postgres_host, settings.postgres_port)
 
+    extraction_pool.start_pool()
+
+    worker_pool = None
+    if settings.ingestion_workers_in_api and settings.ingestion_worker_concurrency > 0:
+        from app.worker import IngestionWorkerPool
+
+        worker_pool = IngestionWorkerPool()
+        await worker_pool.start()
+
     yield
 
     # --- Shutdown ---
     logger.info("Shutting down %s", settings.app_name)
+    if worker_pool is not None:
+        await worker_pool.stop()
+    await asyncio.to_thread(extraction_pool.shutdown_pool)
+    embedding_cache.close_cache()
+    answer_cache.close_cache()
+    llm_cache.close_cache()
+    await llm_clients.close()
+    await sql_service.close_northwind_db()
+    await vector_store.close()
+
     from app.db.session import engine
 
     await engine.dispose()
@@ -49,6 +93,15 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    # --- Upload size limit (before the multipart body is parsed) ---
+    # Added first so that CORS, added after it, wraps it: the middleware added last
+    # runs outermost, and its 413/400 responses must carry CORS headers too
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_body_bytes=settings.max_upload_size_bytes,
+        path_prefix="/api/v1/documents",
+    )
+
     # --- CORS ---
     app.add_middleware(
         CORSMiddleware,
@@ -68,6 +121,15 @@ def create_app() -> FastAPI:
             content={"error": exc.code, "message": exc.message},
         )
 
+    @app.exception_handler(FileTooLargeError)
+    async def file_too_large_error_handler(
+        request: Request, exc: FileTooLargeError
+    ) -> JSONResponse:
+        return JSONResponse(
+            status_code=413,
+            content={"error": exc.code, "message": exc.message},
+        )
+
     @app.exception_handler(NotFoundError)
     async def not_found_error_handler(request: Request, exc: NotFoundError) -> JSONResponse:
         return JSONResponse(
@@ -75,6 +137,13 @@ def create_app() -> FastAPI:
             content={"error": exc.code, "message": exc.message},
         )
 
+    @app.exception_handler(ConflictError)
+    async def conflict_error_handler(request: Request, exc: ConflictError) -> JSONResponse:
+        return JSONResponse(
+            status_code=409,
+            content={"error": exc.code, "message": exc.message},
+        )
+
     @app.exception_handler(RAGSystemError)
     async def rag_system_error_handler(request: Request, exc: RAGSystemError) -> JSONResponse:
         logger.error("Application error: %s — %s", exc.code, exc.message)
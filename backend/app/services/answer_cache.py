@@ -0,0 +1,365 @@
+"""Semantic cache of RAG answers.
+
+Answers are stored with the embedding of the question they answered, and a new
+question is served from the cache when its embedding is within
+``settings.answer_cache_similarity`` (cosine) of a cached one, skipping the
+search and the completion. Each entry records the chunks its context came from;
+deleting or re-ingesting any of their documents drops the entry. Entries also
+expire after ``settings.answer_cache_ttl_seconds`` and the least recently used
+ones are evicted beyond ``settings.answer_cache_max_entries``.
+
+Entries live in a local SQLite file (WAL mode, shared with workers on the same
+host, which invalidate entries when they re-ingest documents). Each process
+keeps the cached question vectors in a NumPy matrix for lookups, and reloads it
+when another process has changed the file, which it detects by a generation
+counter bumped on every write.
+
+``AnswerCache`` methods are blocking; the module-level coroutines run them in a
+thread and do nothing when the cache is disabled.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import answer_cache_requests_total
+
+logger = logging.getLogger(__name__)
+
+# Cached answers are replayed to the client in pieces of this many characters
+REPLAY_CHUNK_CHARS = 256
+
+# As in the embedding cache, evict down to this fraction of max_entries at a time
+EVICTION_LOW_WATERMARK = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    question TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_answers_last_used ON answers (last_used);
+CREATE TABLE IF NOT EXISTS answer_documents (
+    answer_id INTEGER NOT NULL REFERENCES answers (id) ON DELETE CASCADE,
+    document_id TEXT NOT NULL,
+    PRIMARY KEY (document_id, answer_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('generation', 0);
+"""
+
+# Lazy-initialized cache
+_cache: "AnswerCache | None" = None
+
+
+@dataclass
+class CachedAnswer:
+    """A cache hit."""
+
+    answer: str
+    sources: list[str]  # point IDs of the chunks the answer was based on
+    question: str  # the cached question that matched
+    similarity: float
+
+
+def namespace() -> str:
+    """Return the cache namespace: answers are only reused for the same models."""
+    return (
+        f"{settings.openai_chat_model}|{settings.openai_embedding_model}"
+        f":{settings.openai_embedding_dimensions}"
+    )
+
+
+def replay(answer: str) -> Iterator[str]:
+    """Split a cached answer into pieces to stream to the client."""
+    for start in range(0, len(answer), REPLAY_CHUNK_CHARS):
+        yield answer[start : start + REPLAY_CHUNK_CHARS]
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector, axis=-1, keepdims=True)
+    return vector / np.where(norm == 0, 1, norm)
+
+
+class AnswerCache:
+    """SQLite-backed semantic answer cache with TTL and LRU eviction.
+
+    Args:
+        path: Location of the SQLite database file (created if missing).
+        max_entries: Maximum number of cached answers.
+        ttl_seconds: Age after which an entry is no longer served.
+        namespace: Only entries stored under this namespace are looked up.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, namespace: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        # In-memory copy of this namespace's entries, valid for _generation
+        self._generation: int | None = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._created = np.empty(0, dtype=np.float64)
+        self._matrix: np.ndarray | None = None
+
+    # In-memory index
+
+    def _stored_generation(self) -> int:
+        (generation,) = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'generation'"
+        ).fetchone()
+        return generation
+
+    def _refresh(self) -> None:
+        """Reload the question vectors if another process changed the file."""
+        generation = self._stored_generation()
+        if generation == self._generation:
+            return
+        rows = self._conn.execute(
+            "SELECT id, created_at, vector FROM answers WHERE namespace = ?", (self.namespace,)
+        ).fetchall()
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._created = np.array([row[1] for row in rows], dtype=np.float64)
+        self._matrix = (
+            np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows]) if rows else None
+        )
+        self._generation = generation
+
+    def _bump_generation(self) -> bool:
+        """Bump the generation inside a write transaction.
+
+        Returns:
+            Whether the in-memory copy was current, so the caller may update it in
+            place instead of forcing a reload.
+        """
+        generation = self._stored_generation()
+        self._conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (generation + 1,))
+        current = generation == self._generation
+        self._generation = generation + 1 if current else None
+        return current
+
+    def _drop(self, ids: np.ndarray) -> None:
+        keep = ~np.isin(self._ids, ids)
+        self._ids, self._created = self._ids[keep], self._created[keep]
+        self._matrix = self._matrix[keep] if self._matrix is not None and keep.any() else None
+
+    # Operations
+
+    def lookup(self, vector: list[float], threshold: float) -> CachedAnswer | None:
+        """Return the cached answer to the most similar question, if similar enough.
+
+        Args:
+            vector: Embedding of the new question.
+            threshold: Minimum cosine similarity to the cached question.
+        """
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or self._matrix.shape[1] != len(query):
+                return None
+            scores = self._matrix @ query
+            scores[self._created < time.time() - self.ttl_seconds] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            entry_id = int(self._ids[best])
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT answer, sources, question FROM answers WHERE id = ?", (entry_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), entry_id)
+                )
+        answer, sources, question = row
+        return CachedAnswer(
+            answer=answer,
+            sources=json.loads(sources),
+            question=question,
+            similarity=float(scores[best]),
+        )
+
+    def put(
+        self,
+        question: str,
+        vector: list[float],
+        answer: str,
+        sources: list[str],
+        document_ids: list[str],
+    ) -> None:
+        """Cache an answer.
+
+        Args:
+            question: The question answered.
+            vector: Embedding of the question.
+            answer: The answer text.
+            sources: Point IDs of the chunks in the answer's context.
+            document_ids: Documents those chunks belong to (for invalidation).
+        """
+        normalized = _normalize(np.asarray(vector, dtype=np.float32))
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO answers "
+                "(namespace, question, vector, answer, sources, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    question,
+                    normalized.tobytes(),
+                    answer,
+                    json.dumps(sources),
+                    now,
+                    now,
+                ),
+            )
+            entry_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO answer_documents VALUES (?, ?)",
+                [(entry_id, document_id) for document_id in dict.fromkeys(document_ids)],
+            )
+            if self._bump_generation():
+                self._ids = np.append(self._ids, entry_id)
+                self._created = np.append(self._created, now)
+                row = normalized[None, :]
+                self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            if size > self.max_entries:
+                self._evict(size)
+
+    def invalidate_document(self, document_id: str) -> int:
+        """Drop every answer based on a document's chunks.
+
+        Returns:
+            Number of answers dropped.
+        """
+        with self._lock, self._conn:
+            ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT answer_id FROM answer_documents WHERE document_id = ?", (document_id,)
+                )
+            ]
+            if not ids:
+                return 0
+            self._delete(ids)
+        logger.info("Invalidated %d cached answers for document %s", len(ids), document_id)
+        return len(ids)
+
+    def _delete(self, ids: list[int]) -> None:
+        for i in range(0, len(ids), 500):
+            batch = ids[i : i + 500]
+            self._conn.execute(
+                f"DELETE FROM answers WHERE id IN ({','.join('?' * len(batch))})",  # noqa: S608
+                batch,
+            )
+        if self._bump_generation():
+            self._drop(np.asarray(ids, dtype=np.int64))
+
+    def _evict(self, size: int) -> None:
+        """Delete expired entries, then least recently used ones down to the low watermark."""
+        expired = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT id FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        ]
+        excess = size - len(expired) - int(self.max_entries * EVICTION_LOW_WATERMARK)
+        lru = []
+        if excess > 0:
+            lru = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM answers WHERE created_at >= ? ORDER BY last_used LIMIT ?",
+                    (time.time() - self.ttl_seconds, excess),
+                )
+            ]
+        if not expired and not lru:
+            return
+        self._delete(expired + lru)
+        logger.info("Evicted %d cached answers (%d expired)", len(expired) + len(lru), len(expired))
+
+    def __len__(self) -> int:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            return size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_cache() -> AnswerCache | None:
+    """Get or open the answer cache, or None when it is disabled."""
+    global _cache  # noqa: PLW0603
+    if settings.answer_cache_max_entries <= 0:
+        return None
+    if _cache is None:
+        _cache = AnswerCache(
+            settings.answer_cache_path,
+            settings.answer_cache_max_entries,
+            settings.answer_cache_ttl_seconds,
+            namespace(),
+        )
+        logger.info(
+            "Opened answer cache at %s (%d entries, max %d)",
+            settings.answer_cache_path,
+            len(_cache),
+            settings.answer_cache_max_entries,
+        )
+    return _cache
+
+
+def close_cache() -> None:
+    """Close the cache file (called from the application lifespan)."""
+    global _cache  # noqa: PLW0603
+    cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
+
+
+async def lookup(vector: list[float]) -> CachedAnswer | None:
+    """Return a cached answer to a question similar to the one embedded as ``vector``."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    hit = await asyncio.to_thread(cache.lookup, vector, settings.answer_cache_similarity)
+    answer_cache_requests_total.labels(result="hit" if hit else "miss").inc()
+    return hit
+
+
+async def store(
+    question: str, vector: list[float], answer: str, sources: list[str], document_ids: list[str]
+) -> None:
+    """Cache an answer (see ``AnswerCache.put``)."""
+    cache = get_cache()
+    if cache is not None and sources:
+        await asyncio.to_thread(cache.put, question, vector, answer, sources, document_ids)
+
+
+async def invalidate_document(document_id: str) -> None:
+    """Drop the cached answers based on a document that was deleted or re-ingested."""
+    cache = get_cache()
+    if cache is not None:
+        await asyncio.to_thread(cache.invalidate_document, document_id)
@@ -0,0 +1,47 @@
+"""Cluster-wide lease on the vector collection's bulk-load mode.
+
+Bulk-load mode (see ``vector_store.begin_bulk_load``) turns off indexing for the
+whole collection, which every API and worker node shares. Only the holder of this
+lease may switch it on and off; other nodes keep ingesting normally meanwhile.
+
+The lease is a Postgres session-level advisory lock held on a dedicated
+connection. Postgres releases it when that connection goes away, so a holder that
+is killed (SIGKILL, OOM, node loss) cannot keep it, and the next node to start can
+restore indexing the holder left off (see ``qdrant_store.bootstrap_collection``).
+"""
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key ("ragbulk" in ASCII); must not collide with other advisory locks
+LOCK_KEY = 0x72616762756C6B
+
+
+@asynccontextmanager
+async def hold() -> AsyncIterator[bool]:
+    """Try to take the lease for the duration of the block, without waiting.
+
+    Yields:
+        True if this process now holds the lease, False if another one does.
+    """
+    async with engine.connect() as conn:
+        acquired = (
+            await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY})
+        ).scalar_one()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+                except BaseException:
+                    # Never return a connection that may still hold the lock to the pool
+                    await conn.invalidate()
+                    raise
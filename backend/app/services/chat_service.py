@@ -1,41 +1,115 @@
 """Chat service orchestration with Routing and Streaming."""
 
+import asyncio
 import logging
+import time
 from collections.abc import AsyncGenerator
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.prompts.document_qa import prompt_template as rag_prompt
-from app.agents.prompts.text_to_sql import text_to_sql_prompt
 from app.agents.router_agent import get_router_agent
-from app.agents.tools.document_search import search_documents
+from app.agents.tools.document_search import find_documents
 from app.config import settings
-from app.services import history_service
-from app.services.sql_service import get_northwind_db
+from app.core.metrics import speculative_retrieval_total, speculative_retrieval_wasted_seconds
+from app.services import answer_cache, embedding_service, history_service
+from app.services.answer_cache import CachedAnswer
+from app.services.context_packer import PackedContext
+from app.services.llm_clients import get_chat_model
+from app.services.sql_service import answer_sql_question
 
 logger = logging.getLogger(__name__)
 
+RagInputs = tuple[list[float], CachedAnswer | None, PackedContext | None]
+
+
+async def _prepare_rag(user_message: str, retrieval: dict | None, use_cache: bool) -> RagInputs:
+    """Embed the question, then look up a cached answer or search the documents.
+
+    Args:
+        user_message: The user's question.
+        retrieval: Per-request retrieval overrides.
+        use_cache: Whether a cached answer may be served (see ``_cacheable``).
+
+    Returns:
+        The query vector, the cached answer (if any) and otherwise the context.
+    """
+    query_vector = await embedding_service.embed_query(user_message)
+
+    cached = await answer_cache.lookup(query_vector) if use_cache else None
+    if cached is not None:
+        return query_vector, cached, None
+    context = await find_documents(user_message, query_vector=query_vector, **(retrieval or {}))
+    return query_vector, None, context
+
+
+def _cacheable(retrieval: dict | None, has_history: bool) -> bool:
+    """Whether a RAG answer may be served from, and stored in, the answer cache.
+
+    Cached answers are keyed by the question alone, so they are only valid for
+    the default retrieval options and for the first turn of a session: later
+    answers are generated with the conversation so far ("and the second one?").
+    """
+    return not retrieval and not has_history
+
+
+class _Speculation:
+    """RAG retrieval started before the route is known."""
+
+    def __init__(self, user_message: str, retrieval: dict | None, use_cache: bool):
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.task = asyncio.create_task(_prepare_rag(user_message, retrieval, use_cache))
+        self.task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self.finished = time.perf_counter()
+        if not task.cancelled():
+            task.exception()  # retrieved: a discarded speculation's error is not logged
+
+    async def result(self) -> RagInputs:
+        speculative_retrieval_total.labels(outcome="used").inc()
+        return await self.task
+
+    def discard(self) -> None:
+        """Cancel the retrieval (or drop its result) and record the wasted time."""
+        if self.task.done():
+            outcome = "discarded"
+        else:
+            self.task.cancel()
+            outcome = "cancelled"
+        speculative_retrieval_total.labels(outcome=outcome).inc()
+        speculative_retrieval_wasted_seconds.observe(
+            (self.finished or time.perf_counter()) - self.started
+        )
+
 
 async def process_message_stream(
     session_id: str | None,
     user_message: str,
     db: AsyncSession,
     mode: str = "auto",
+    retrieval: dict | None = None,
 ) -> AsyncGenerator[str, None]:
     """Process a message and yield SSE event data strings.
 
+    ``retrieval`` holds per-request overrides for document retrieval (see
+    ``retrieval.retrieve``).
+
     Yields JSON strings in SSE format:
     data: {"type": "token", "content": "..."}
     data: {"type": "metadata", "metadata": {...}}
     data: {"type": "done", "content": ""}
     data: {"type": "error", "content": "..."}
     """
+    speculation: _Speculation | None = None
     try:
         # 1. Session Management
         session = await history_service.get_or_create_session(session_id, db)
+        has_history = bool(await history_service.get_session_history(str(session.id), db, limit=1))
+        use_cache = _cacheable(retrieval, has_history)
 
         # Save User Message
         await history_service.add_message(
@@ -47,14 +121,22 @@ async def process_message_stream(
 
         # 2. Routing
         route_decision = mode
+        route_source = "mode"
         if mode == "auto":
+            # RAG is the most common route: retrieve while the router decides
+            if settings.speculative_retrieval_enabled:
+                speculation = _Speculation(user_message, retrieval, use_cache)
             router = get_router_agent()
             decision = await router.route(user_message)
             route_decision = decision.destination
+            route_source = decision.source
+            if speculation is not None and route_decision != "rag":
+                speculation.discard()
+                speculation = None
             # Emit routing metadata
             yield (
                 f'{{"type": "metadata", "metadata": {{"route": "{route_decision}", '
-                f'"reasoning": "{decision.reasoning}"}}}}'
+                f'"reasoning": "{decision.reasoning}", "route_source": "{route_source}"}}}}'
             )
 
         # 3. Execution Pipeline (RAG vs SQL vs General)
@@ -64,69 +146,69 @@ async def process_message_stream(
             # We'll stream the "thinking" steps optionally, but for now just yield
             # the result chunked.
 
-            nw_db = get_northwind_db()
-            tables = nw_db.list_tables()
-            schema_str = nw_db.get_schema(tables) if tables else ""
-
-            llm = ChatOpenAI(
-                model=settings.openai_chat_model,
-                api_key=settings.openai_api_key,
-                temperature=0,
-                streaming=True,
-            )
-            chain = text_to_sql_prompt | llm | StrOutputParser()
-
-            # Generate SQL
-            generated_sql = ""
-            async for chunk in chain.astream({"schema": schema_str, "question": user_message}):
-                # We don't stream the SQL generation to the user typically, unless debugging.
-                # Let's collect it.
-                generated_sql += chunk
-
-            generated_sql = generated_sql.replace("```sql", "").replace("```", "").strip()
-
-            # Execute
-            result_str = nw_db.run_query(generated_sql)
-            answer = f"Executed Query: {generated_sql}\n\nResult:\n{result_str}"
+            # Generate SQL (repeats come from the LLM cache) and run it on the
+            # Northwind pool; cancelled with this stream if the client disconnects
+            answer, metadata = await answer_sql_question(user_message)
 
             # Streaming the "answer" (which is static here, but we treat it as a stream)
             yield f'{{"type": "token", "content": "{answer.replace(chr(10), "\\\\n")}"}}'
 
-            metadata = {"query": generated_sql, "context_source": "northwind_db"}
-
         elif route_decision == "rag":
             # --- RAG PIPELINE ---
-            context_str = await search_documents.ainvoke(user_message)
+            if speculation is not None:
+                query_vector, cached, context = await speculation.result()
+                speculation = None
+            else:
+                query_vector, cached, context = await _prepare_rag(
+                    user_message, retrieval, use_cache
+                )
 
-            # Retrieve History
-            history_orm = await history_service.get_session_history(str(session.id), db, limit=10)
-            history_lc = [
-                (
-                    HumanMessage(content=m.content)
-                    if m.role == "user"
-                    else AIMessage(content=m.content)
+            if cached is not None:
+                answer = cached.answer
+                for piece in answer_cache.replay(answer):
+                    safe_chunk = piece.replace("\n", "\\n").replace('"', '\\"')
+                    yield f'{{"type": "token", "content": "{safe_chunk}"}}'
+                metadata = {
+                    "context_source": "answer_cache",
+                    "sources": cached.sources,
+                    "cache_similarity": round(cached.similarity, 4),
+                }
+            else:
+                # Retrieve History
+                history_orm = await history_service.get_session_history(
+                    str(session.id), db, limit=10
                 )
-                for m in history_orm
-            ]
+                history_lc = [
+                    (
+                        HumanMessage(content=m.content)
+                        if m.role == "user"
+                        else AIMessage(content=m.content)
+                    )
+                    for m in history_orm
+                ]
 
-            llm = ChatOpenAI(
-                model=settings.openai_chat_model,
-                api_key=settings.openai_api_key,
-                temperature=0,
-                streaming=True,
-            )
-            chain = rag_prompt | llm | StrOutputParser()
+                llm = get_chat_model(temperature=0, streaming=True)
+                chain = rag_prompt | llm | StrOutputParser()
 
-            answer = ""
-            async for chunk in chain.astream(
-                {"context": context_str, "history": history_lc, "input": user_message}
-            ):
-                answer += chunk
-                # Escape newlines for JSON usage in data: field
-                safe_chunk = chunk.replace("\n", "\\n").replace('"', '\\"')
-                yield f'{{"type": "token", "content": "{safe_chunk}"}}'
+                answer = ""
+                async for chunk in chain.astream(
+                    {"context": context.text, "history": history_lc, "input": user_message}
+                ):
+                    answer += chunk
+                    # Escape newlines for JSON usage in data: field
+                    safe_chunk = chunk.replace("\n", "\\n").replace('"', '\\"')
+                    yield f'{{"type": "token", "content": "{safe_chunk}"}}'
 
-            metadata = {"context_source": "document_search"}
+                sources = [cid for p in context.passages for cid in p.chunk_ids]
+                metadata = {"context_source": "document_search", "sources": sources}
+                if use_cache:
+                    await answer_cache.store(
+                        user_message,
+                        query_vector,
+                        answer,
+                        sources,
+                        [p.document_id for p in context.passages],
+                    )
 
         else:
             # --- GENERAL CHAT PIPELINE ---
@@ -141,12 +223,7 @@ async def process_message_stream(
             ]
             history_lc.append(HumanMessage(content=user_message))
 
-            llm = ChatOpenAI(
-                model=settings.openai_chat_model,
-                api_key=settings.openai_api_key,
-                temperature=0.7,
-                streaming=True,
-            )
+            llm = get_chat_model(temperature=0.7, streaming=True)
 
             answer = ""
             async for chunk in llm.astream(history_lc):
@@ -157,7 +234,9 @@ async def process_message_stream(
 
             metadata = {"context_source": "general_chat"}
 
-        # 4. Save Assistant Message
+        # 4. Save Assistant Message (route_source tells the fast router's training
+        # script which decisions came from the LLM)
+        metadata["route_source"] = route_source
         await history_service.add_message(
             session_id=session.id,
             role="assistant",
@@ -173,3 +252,7 @@ async def process_message_stream(
     except Exception as e:
         logger.exception("Streaming failed")
         yield f'{{"type": "error", "content": "{str(e)}"}}'
+    finally:
+        # Routing failed or the client went away before the result was used
+        if speculation is not None:
+            speculation.discard()
@@ -0,0 +1,98 @@
+"""Named Qdrant collection profiles: how vectors are stored and searched.
+
+A profile trades memory for speed and accuracy:
+
+- ``fast-in-ram``: float32 vectors and HNSW graph in RAM, exact scores.
+  ~6 KB per 1536-dim vector.
+- ``int8-rescore``: int8 scalar-quantized copies kept in RAM (4x smaller) are
+  searched, then the top candidates are rescored with the original vectors.
+- ``binary-oversample``: 1-bit quantized copies in RAM (32x smaller) are searched
+  with oversampling, then rescored. Best suited to high-dimensional OpenAI
+  embeddings.
+
+For the quantized profiles the original vectors are only read for rescoring, so
+they can live on disk (``qdrant_vectors_on_disk``, memory-mapped) with little
+latency cost; this is where the RAM savings come from.
+"""
+
+from dataclasses import dataclass
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Storage and default search settings for a collection."""
+
+    quantization: ScalarQuantization | BinaryQuantization | None = None
+    # Re-rank quantized candidates with the original vectors
+    rescore: bool = False
+    # Fetch top_k * oversampling quantized candidates before rescoring
+    oversampling: float | None = None
+
+
+COLLECTION_PROFILES = {
+    "fast-in-ram": CollectionProfile(),
+    "int8-rescore": CollectionProfile(
+        quantization=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+        rescore=True,
+        oversampling=2.0,
+    ),
+    "binary-oversample": CollectionProfile(
+        quantization=BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True)),
+        rescore=True,
+        oversampling=3.0,
+    ),
+}
+
+
+def get_profile(name: str) -> CollectionProfile:
+    """Look up a collection profile by name.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    try:
+        return COLLECTION_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown collection profile: {name}. Available: {', '.join(COLLECTION_PROFILES)}"
+        ) from None
+
+
+def search_params(
+    profile: CollectionProfile,
+    hnsw_ef: int | None = None,
+    rescore: bool | None = None,
+    oversampling: float | None = None,
+) -> SearchParams | None:
+    """Build query-time search params from a profile and per-call overrides.
+
+    Args:
+        profile: Profile the collection was created with.
+        hnsw_ef: HNSW beam width (None or 0 = collection default).
+        rescore: Override the profile's rescoring.
+        oversampling: Override the profile's oversampling factor.
+
+    Returns:
+        SearchParams, or None when every value is the server default.
+    """
+    quantization = None
+    if profile.quantization is not None:
+        quantization = QuantizationSearchParams(
+            rescore=profile.rescore if rescore is None else rescore,
+            oversampling=profile.oversampling if oversampling is None else oversampling,
+        )
+    if not hnsw_ef and quantization is None:
+        return None
+    return SearchParams(hnsw_ef=hnsw_ef or None, quantization=quantization)
@@ -0,0 +1,159 @@
+"""Token-budgeted packing of search results into prompt context.
+
+Hits on consecutive chunks of one document are merged into a single passage with
+the text the chunker repeated between them (``CHUNK_OVERLAP``) removed, so it is
+sent once. Passages are then added best first until ``context_token_budget`` is
+spent, using the chunk token counts stored at ingestion rather than tokenizing
+the context again.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from app.config import settings
+from app.core.metrics import context_tokens_saved
+from app.core.tokens import count_tokens
+from app.document_processing.chunker import CHUNK_OVERLAP
+from app.services.vector_store import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Shorter suffix/prefix matches between neighbouring chunks are treated as
+# coincidence rather than chunk overlap
+MIN_OVERLAP_CHARS = 10
+
+
+@dataclass
+class Passage:
+    """One or more consecutive chunks of a document."""
+
+    document_id: str
+    filename: str
+    first_chunk: int
+    last_chunk: int
+    text: str
+    tokens: int
+    score: float
+    rank: int  # position of its best hit in the search results
+    chunk_ids: list[str]  # point IDs of the merged chunks
+
+
+@dataclass
+class PackedContext:
+    """Prompt context built from search results."""
+
+    text: str
+    tokens: int
+    tokens_saved: int  # versus sending every hit in full
+    passages: list[Passage]
+
+
+def strip_overlap(previous: str, following: str, max_overlap: int = CHUNK_OVERLAP) -> str:
+    """Return ``following`` without the prefix it repeats from the end of ``previous``."""
+    for size in range(min(len(previous), len(following), max_overlap), MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(following[:size]):
+            return following[size:]
+    return following
+
+
+def _tokens(hit: SearchResult) -> int:
+    # Chunks stored before token counts were recorded are counted now
+    return hit.token_count or count_tokens(hit.text)
+
+
+def _header(number: int, filename: str, score: float) -> str:
+    return f"[Document {number}: {filename} (Score: {score:.2f})]"
+
+
+def merge_passages(results: list[SearchResult]) -> list[Passage]:
+    """Merge hits on consecutive chunks of the same document.
+
+    Args:
+        results: Search results, best first.
+
+    Returns:
+        Passages ordered by their best hit.
+    """
+    ranked: dict[tuple[str, int], tuple[int, SearchResult]] = {}
+    for rank, hit in enumerate(results):
+        ranked.setdefault((hit.document_id, hit.chunk_index), (rank, hit))
+
+    passages: list[Passage] = []
+    previous: SearchResult | None = None
+    for key in sorted(ranked):
+        rank, hit = ranked[key]
+        passage = passages[-1] if passages else None
+        if (
+            passage is not None
+            and previous is not None
+            and hit.document_id == passage.document_id
+            and hit.chunk_index == passage.last_chunk + 1
+        ):
+            rest = strip_overlap(previous.text, hit.text)
+            overlap = hit.text[: len(hit.text) - len(rest)]
+            passage.text += rest if overlap else f"\n{hit.text}"
+            passage.tokens += _tokens(hit) - count_tokens(overlap)
+            passage.last_chunk = hit.chunk_index
+            passage.score = max(passage.score, hit.score)
+            passage.rank = min(passage.rank, rank)
+            passage.chunk_ids.append(hit.id)
+        else:
+            passages.append(
+                Passage(
+                    document_id=hit.document_id,
+                    filename=hit.filename,
+                    first_chunk=hit.chunk_index,
+                    last_chunk=hit.chunk_index,
+                    text=hit.text,
+                    tokens=_tokens(hit),
+                    score=hit.score,
+                    rank=rank,
+                    chunk_ids=[hit.id],
+                )
+            )
+        previous = hit
+
+    return sorted(passages, key=lambda p: p.rank)
+
+
+def pack_context(results: list[SearchResult], token_budget: int | None = None) -> PackedContext:
+    """Pack search results into prompt context within a token budget.
+
+    Passages that do not fit in the remaining budget are skipped, so a smaller
+    lower-ranked passage can still use it.
+
+    Args:
+        results: Search results, best first.
+        token_budget: Maximum context tokens (defaults to
+            ``settings.context_token_budget``).
+
+    Returns:
+        The packed context, its size and the tokens saved.
+    """
+    budget = settings.context_token_budget if token_budget is None else token_budget
+    unpacked = sum(_tokens(hit) for hit in results) + sum(
+        count_tokens(_header(i, hit.filename, hit.score)) for i, hit in enumerate(results, 1)
+    )
+
+    parts: list[str] = []
+    packed: list[Passage] = []
+    used = 0
+    for passage in merge_passages(results):
+        header = _header(len(packed) + 1, passage.filename, passage.score)
+        cost = count_tokens(header) + passage.tokens
+        if used + cost > budget:
+            continue
+        parts.append(f"{header}\n{passage.text}")
+        packed.append(passage)
+        used += cost
+
+    saved = max(unpacked - used, 0)
+    context_tokens_saved.observe(saved)
+    logger.debug(
+        "Packed %d hits into %d passages (%d tokens, %d saved)",
+        len(results),
+        len(packed),
+        used,
+        saved,
+    )
+    return PackedContext(text="\n\n".join(parts), tokens=used, tokens_saved=saved, passages=packed)
@@ -1,97 +1,448 @@
 """Document service — orchestrates the ingestion pipeline."""
 
+import asyncio
+import hashlib
+import itertools
 import logging
 import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Protocol
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import DocumentProcessingError, NotFoundError
+from app.config import settings
+from app.core.exceptions import (
+    ConflictError,
+    DocumentProcessingError,
+    FileTooLargeError,
+    NotFoundError,
+)
+from app.core.metrics import documents_deduplicated_total, embedding_chunks_saved_total
 from app.db.models import Document
-from app.document_processing.chunker import chunk_text
-from app.document_processing.extractors import SUPPORTED_TYPES, extract_text
-from app.services import embedding_service, vector_store
+from app.document_processing.chunker import TextChunk, iter_chunks
+from app.document_processing.extractors import (
+    SEGMENT_SEPARATORS,
+    SUPPORTED_TYPES,
+    Source,
+    get_file_type,
+)
+from app.document_processing.pool import extracted_segments
+from app.services import answer_cache, embedding_service, ingestion_queue, vector_store
 
 logger = logging.getLogger(__name__)
 
-MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
+# Uploads are copied to storage in pieces of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
 
 
-async def process_document(
-    filename: str,
-    content_type: str,
-    file_bytes: bytes,
-    db: AsyncSession,
-) -> Document:
-    """Process an uploaded document through the full ingestion pipeline.
+class AsyncReadable(Protocol):
+    """An upload stream, such as FastAPI's ``UploadFile``."""
 
-    Pipeline: validate → save metadata → extract → chunk → embed → store vectors → update status.
+    async def read(self, size: int = -1) -> bytes: ...
 
-    Args:
-        filename: Original filename.
-        content_type: MIME type.
-        file_bytes: Raw file content.
-        db: Async database session.
 
-    Returns:
-        The Document ORM object with final status.
+def _validate_content_type(content_type: str) -> None:
+    """Reject unsupported MIME types.
 
     Raises:
-        DocumentProcessingError: If validation or processing fails.
+        DocumentProcessingError: If the type is unsupported.
     """
-    # 1. Validate
     if content_type not in SUPPORTED_TYPES:
         raise DocumentProcessingError(
             f"Unsupported file type: {content_type}. Supported: {', '.join(SUPPORTED_TYPES.keys())}"
         )
 
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise DocumentProcessingError(
-            f"File size ({len(file_bytes)} bytes) exceeds maximum ({MAX_FILE_SIZE} bytes)"
-        )
 
-    if len(file_bytes) == 0:
+def _validate_size(file_size: int) -> None:
+    """Reject oversized or empty uploads.
+
+    Raises:
+        DocumentProcessingError: If the upload is not acceptable.
+    """
+    if file_size > settings.max_upload_size_bytes:
+        raise FileTooLargeError(settings.max_upload_size_bytes)
+
+    if file_size == 0:
         raise DocumentProcessingError("File is empty")
 
-    # 2. Save metadata to PostgreSQL (status = "processing")
+
+async def _create_document(
+    filename: str,
+    content_type: str,
+    file_size: int,
+    db: AsyncSession,
+    document_id: uuid.UUID | None = None,
+    content_hash: str | None = None,
+) -> Document:
+    """Save document metadata to PostgreSQL with status "processing"."""
     doc = Document(
-        id=uuid.uuid4(),
+        id=document_id or uuid.uuid4(),
         filename=filename,
         file_type=SUPPORTED_TYPES[content_type],
-        file_size_bytes=len(file_bytes),
+        file_size_bytes=file_size,
+        content_hash=content_hash,
         status="processing",
     )
     db.add(doc)
     await db.flush()  # Get the ID without committing
+    return doc
 
-    doc_id = str(doc.id)
-    logger.info("Processing document %s (%s, %d bytes)", doc_id, filename, len(file_bytes))
 
+def _storage_path(document_id: uuid.UUID | str, upload_id: str | None = None) -> Path:
+    """Where an upload is stored until ingested (replacements get their own file)."""
+    name = str(document_id) if upload_id is None else f"{document_id}-{upload_id}"
+    return Path(settings.upload_storage_dir) / name
+
+
+def _remove_stored_uploads(document_id: str) -> None:
+    for path in Path(settings.upload_storage_dir).glob(f"{document_id}*"):
+        path.unlink(missing_ok=True)
+
+
+def _write_piece(f, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+async def _spool_upload(stream: AsyncReadable, file_path: Path) -> tuple[int, str]:
+    """Copy an upload stream to ``file_path`` piece by piece, hashing it on the way.
+
+    The running size is checked after every piece, so an oversized upload is
+    rejected as soon as it crosses the limit instead of after being buffered whole.
+
+    Returns:
+        Number of bytes written and the SHA-256 hex digest of the content.
+
+    Raises:
+        FileTooLargeError: If the stream exceeds ``settings.max_upload_size_bytes``.
+    """
+    part_path = file_path.with_name(f"{file_path.name}.part")
+    await asyncio.to_thread(file_path.parent.mkdir, parents=True, exist_ok=True)
+    f = await asyncio.to_thread(open, part_path, "wb")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await stream.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.max_upload_size_bytes:
+                raise FileTooLargeError(settings.max_upload_size_bytes)
+            await asyncio.to_thread(_write_piece, f, hasher, chunk)
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(part_path.replace, file_path)
+    except BaseException:
+        f.close()
+        await asyncio.to_thread(part_path.unlink, missing_ok=True)
+        raise
+    return size, hasher.hexdigest()
+
+
+async def _find_duplicate(content_hash: str, db: AsyncSession) -> Document | None:
+    """Return the oldest successfully ingested document with the same content.
+
+    Documents still processing are not matched: their ingestion may yet fail, and
+    the re-upload would then point at a failed document.
+    """
+    return await db.scalar(
+        select(Document)
+        .where(Document.content_hash == content_hash, Document.status == "ready")
+        .order_by(Document.created_at)
+        .limit(1)
+    )
+
+
+async def submit_document(
+    filename: str,
+    content_type: str,
+    stream: AsyncReadable,
+    db: AsyncSession,
+) -> tuple[Document, bool]:
+    """Store an upload and queue it for background ingestion.
+
+    The upload is streamed to ``settings.upload_storage_dir`` without being held in
+    memory, and an ingestion job is enqueued in the same transaction as the Document
+    row, so the job becomes visible to workers only once the request commits.
+
+    Re-uploads of content that is already ingested are short-circuited: the stored
+    copy is discarded and the existing document is returned, so the file is neither
+    extracted nor embedded again.
+
+    Args:
+        filename: Original filename.
+        content_type: MIME type.
+        stream: Upload stream to read the file content from.
+        db: Async database session.
+
+    Returns:
+        A ``(document, created)`` tuple: the new Document in "processing" status and
+        True, or the existing Document with identical content and False.
+
+    Raises:
+        DocumentProcessingError: If validation fails.
+    """
+    _validate_content_type(content_type)
+
+    document_id = uuid.uuid4()
+    file_path = _storage_path(document_id)
+    file_size, content_hash = await _spool_upload(stream, file_path)
     try:
-        # 3. Extract text
-        text = extract_text(file_bytes, content_type)
-        logger.info("Extracted %d chars from %s", len(text), filename)
-
-        # 4. Chunk
-        chunks = chunk_text(text, doc_id, filename)
-        logger.info("Created %d chunks from %s", len(chunks), filename)
-
-        # 5. Embed
-        chunk_texts = [c.text for c in chunks]
-        embeddings = await embedding_service.embed_texts(chunk_texts)
-
-        # 6. Ensure Qdrant collection exists, then upsert vectors
-        vector_store.ensure_collection()
-        chunk_dicts = [
-            {"text": c.text, "chunk_index": c.chunk_index, "metadata": c.metadata} for c in chunks
-        ]
-        vector_store.upsert_chunks(doc_id, chunk_dicts, embeddings)
-
-        # 7. Update status to "ready"
-        doc.status = "ready"
-        doc.chunk_count = len(chunks)
-        logger.info("Document %s processed successfully (%d chunks)", doc_id, len(chunks))
+        _validate_size(file_size)
+        existing = await _find_duplicate(content_hash, db)
+        if existing is not None:
+            await asyncio.to_thread(file_path.unlink, missing_ok=True)
+            documents_deduplicated_total.inc()
+            embedding_chunks_saved_total.labels(source="duplicate_upload").inc(
+                existing.chunk_count or 0
+            )
+            logger.info(
+                "Upload %s is identical to document %s (%s), skipping ingestion",
+                filename,
+                existing.id,
+                existing.filename,
+            )
+            return existing, False
+
+        doc = await _create_document(
+            filename, content_type, file_size, db, document_id, content_hash=content_hash
+        )
+        await ingestion_queue.enqueue(doc.id, str(file_path), content_type, db)
+    except BaseException:
+        await asyncio.to_thread(file_path.unlink, missing_ok=True)
+        raise
+
+    logger.info("Queued document %s (%s, %d bytes)", doc.id, filename, file_size)
+    return doc, True
+
 
+async def replace_document(
+    document_id: str,
+    filename: str,
+    content_type: str,
+    stream: AsyncReadable,
+    db: AsyncSession,
+) -> Document:
+    """Replace the content of an existing document and queue it for re-ingestion.
+
+    The document keeps its ID. Re-ingestion is incremental (see ``ingest_document``):
+    only chunks that changed are embedded, and chunks that disappeared are deleted.
+
+    Args:
+        document_id: UUID string of the document to replace.
+        filename: Filename of the new version.
+        content_type: MIME type of the new version.
+        stream: Upload stream to read the new content from.
+        db: Async database session.
+
+    Returns:
+        The Document, in "processing" status unless the upload is unchanged.
+
+    Raises:
+        NotFoundError: If the document does not exist.
+        ConflictError: If the document is still being processed.
+        DocumentProcessingError: If validation fails.
+    """
+    doc = await db.get(Document, uuid.UUID(document_id))
+    _check_replaceable(doc, document_id)
+    _validate_content_type(content_type)
+
+    # Spool before locking the row: the upload may take a long time to stream in
+    file_path = _storage_path(doc.id, uuid.uuid4().hex)
+    file_size, content_hash = await _spool_upload(stream, file_path)
+    try:
+        _validate_size(file_size)
+        # Lock the row and re-check it, since it may have changed during the spool
+        doc = await db.get(Document, doc.id, with_for_update=True, populate_existing=True)
+        _check_replaceable(doc, document_id)
+        if doc.status == "ready" and (content_hash, filename) == (doc.content_hash, doc.filename):
+            await asyncio.to_thread(file_path.unlink, missing_ok=True)
+            logger.info("Replacement for document %s is unchanged, skipping", document_id)
+            return doc
+
+        doc.filename = filename
+        doc.file_type = SUPPORTED_TYPES[content_type]
+        doc.file_size_bytes = file_size
+        doc.content_hash = content_hash
+        doc.status = "processing"
+        doc.error_message = None
+        await ingestion_queue.enqueue(doc.id, str(file_path), content_type, db)
+    except BaseException:
+        await asyncio.to_thread(file_path.unlink, missing_ok=True)
+        raise
+
+    logger.info("Queued replacement of document %s (%s, %d bytes)", doc.id, filename, file_size)
+    return doc
+
+
+def _check_replaceable(doc: Document | None, document_id: str) -> None:
+    if doc is None:
+        raise NotFoundError("Document", document_id)
+    if doc.status == "processing":
+        raise ConflictError(f"Document {document_id} is still being processed")
+
+
+def _next_batch(chunks: Iterator[TextChunk], size: int) -> list[TextChunk]:
+    return list(itertools.islice(chunks, size))
+
+
+async def ingest_document(doc: Document, source: Source, content_type: str) -> Document:
+    """Run extract → chunk → embed → store vectors for an existing Document.
+
+    The pipeline is streamed: extracted segments are chunked lazily and embedded and
+    upserted in micro-batches of ``settings.ingestion_batch_size`` chunks, so memory
+    stays flat regardless of document size.
+
+    Ingestion is incremental. Point IDs are derived from the document and each
+    chunk's content, so chunks already stored (from an earlier version of the
+    document, or an interrupted attempt) are kept without being embedded again;
+    only new chunks are embedded and upserted, and stored chunks that no longer
+    occur are deleted at the end.
+
+    On success the document is moved to "ready". Failures are left to the caller:
+    DocumentProcessingError signals bad content that will not succeed on retry, any
+    other exception is treated as transient (network, rate limits, ...).
+
+    Args:
+        doc: Document ORM object in "processing" status.
+        source: Path of the stored file, or raw file content.
+        content_type: MIME type.
+
+    Returns:
+        The Document with final status.
+    """
+    doc_id = str(doc.id)
+    filename = doc.filename
+    separator = SEGMENT_SEPARATORS[get_file_type(content_type)]
+    logger.info("Processing document %s (%s, %d bytes)", doc_id, filename, doc.file_size_bytes)
+
+    await vector_store.ensure_collection()
+    stored = await vector_store.get_document_points(doc_id)
+
+    # Per-document state is bounded by the stored points, plus a 32-byte digest per
+    # distinct chunk; chunk text is never held beyond its batch
+    unseen = set(stored)
+    occurrences: dict[bytes, int] = {}  # chunk_digest -> occurrences so far
+    moved: dict[str, int] = {}  # kept points whose chunk_index changed
+    total_chunks = embedded = 0
+    upload: asyncio.Task | None = None
+    try:
+        # 1. Extract segments (in the extraction process pool, off the event loop)
+        async with extracted_segments(source, content_type) as segments:
+            # 2. Chunk lazily
+            chunks = iter_chunks(segments, doc_id, filename, separator=separator)
+            while True:
+                # Reading and splitting the next window is blocking work; keep it off the loop
+                batch = await asyncio.to_thread(_next_batch, chunks, settings.ingestion_batch_size)
+                if not batch:
+                    break
+                total_chunks += len(batch)
+
+                # 3. Diff against the stored chunks
+                new_chunks = []
+                for c in batch:
+                    digest = vector_store.chunk_digest(c.text)
+                    occurrence = occurrences.get(digest, 0)
+                    occurrences[digest] = occurrence + 1
+                    pid = vector_store.point_id(doc_id, c.text, occurrence, digest=digest)
+                    unseen.discard(pid)
+                    if pid not in stored:
+                        new_chunks.append(
+                            {
+                                "id": pid,
+                                "text": c.text,
+                                "chunk_index": c.chunk_index,
+                                "metadata": c.metadata,
+                            }
+                        )
+                    elif stored[pid] != c.chunk_index:
+                        moved[pid] = c.chunk_index
+                if not new_chunks:
+                    continue
+
+                # 4. Embed (overlaps with the previous batch's upload)
+                embeddings = await embedding_service.embed_texts([c["text"] for c in new_chunks])
+                embedded += len(new_chunks)
+
+                # 5. Upsert vectors without waiting for indexing; the final payload
+                # update below waits, and doubles as the barrier for every batch
+                if upload is not None:
+                    await upload
+                upload = asyncio.create_task(
+                    vector_store.upsert_chunks(doc_id, new_chunks, embeddings, wait=False)
+                )
+        if upload is not None:
+            await upload
+    finally:
+        if upload is not None and not upload.done():
+            upload.cancel()
+
+    if total_chunks == 0:
+        raise DocumentProcessingError("No text content found in document")
+
+    # 6. Drop chunks that are gone, renumber the kept ones
+    removed = [pid for pid in stored if pid in unseen]
+    if removed:
+        await vector_store.delete_points(removed)
+    if moved:
+        await vector_store.set_chunk_indexes(moved)
+    await vector_store.set_document_payload(
+        doc_id, {"total_chunks": total_chunks, "filename": filename, "file_type": doc.file_type}
+    )
+    embedding_chunks_saved_total.labels(source="incremental").inc(total_chunks - embedded)
+    if stored:
+        # Re-ingested: answers built from the previous version are stale
+        await answer_cache.invalidate_document(doc_id)
+
+    # 7. Update status to "ready"
+    doc.status = "ready"
+    doc.chunk_count = total_chunks
+    doc.error_message = None
+    logger.info(
+        "Document %s processed successfully (%d chunks: %d embedded, %d kept, %d removed)",
+        doc_id,
+        total_chunks,
+        embedded,
+        total_chunks - embedded,
+        len(removed),
+    )
+    return doc
+
+
+async def process_document(
+    filename: str,
+    content_type: str,
+    file_bytes: bytes,
+    db: AsyncSession,
+) -> Document:
+    """Process an uploaded document through the full ingestion pipeline inline.
+
+    Pipeline: validate → save metadata → extract → chunk → embed → store vectors → update status.
+    Uploads via the API go through ``submit_document`` and the ingestion queue instead.
+
+    Args:
+        filename: Original filename.
+        content_type: MIME type.
+        file_bytes: Raw file content.
+        db: Async database session.
+
+    Returns:
+        The Document ORM object with final status.
+
+    Raises:
+        DocumentProcessingError: If validation or processing fails.
+    """
+    _validate_content_type(content_type)
+    _validate_size(len(file_bytes))
+    doc = await _create_document(
+        filename,
+        content_type,
+        len(file_bytes),
+        db,
+        content_hash=hashlib.sha256(file_bytes).hexdigest(),
+    )
+
+    try:
+        await ingest_document(doc, file_bytes, content_type)
     except DocumentProcessingError:
         doc.status = "error"
         doc.error_message = "Document processing failed"
@@ -99,7 +450,7 @@ async def process_document(
     except Exception as e:
         doc.status = "error"
         doc.error_message = str(e)
-        logger.exception("Failed to process document %s: %s", doc_id, e)
+        logger.exception("Failed to process document %s: %s", doc.id, e)
         raise DocumentProcessingError(f"Processing failed: {e}") from e
 
     return doc
@@ -151,9 +502,13 @@ async def delete_document(document_id: str, db: AsyncSession) -> None:
 
     # Delete vectors from Qdrant
     try:
-        vector_store.delete_by_document(document_id)
+        await vector_store.delete_by_document(document_id)
     except Exception:
         logger.warning("Failed to delete vectors for document %s (may not exist)", document_id)
+    await answer_cache.invalidate_document(document_id)
+
+    # Drop stored uploads that were never ingested (pending jobs cascade with the row)
+    await asyncio.to_thread(_remove_stored_uploads, document_id)
 
     # Delete from PostgreSQL
     await db.delete(doc)
@@ -0,0 +1,179 @@
+"""Persistent cache of text embeddings.
+
+Embeddings are stored in a local SQLite file keyed by ``(sha256(text), model,
+dimensions)``, with vectors packed as float32 blobs (6 KB for 1536 dimensions).
+The cache is bounded by entry count and evicts least-recently-used entries.
+SQLite runs in WAL mode, so the API process and standalone workers on the same
+host can share one cache file.
+
+All methods are blocking; call them from ``asyncio.to_thread``.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Once the cache is full, evict down to this fraction of max_entries at a time so
+# eviction runs once per many inserts rather than on every one.
+EVICTION_LOW_WATERMARK = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    text_hash BLOB NOT NULL,
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (text_hash, model, dimensions)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used);
+"""
+
+# Lazy-initialized cache
+_cache: "EmbeddingCache | None" = None
+
+
+def text_key(text: str) -> bytes:
+    """Return the cache key (SHA-256 digest) of a text."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache with LRU eviction.
+
+    Args:
+        path: Location of the SQLite database file (created if missing).
+        max_entries: Maximum number of cached vectors across all models.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, keys: list[bytes], model: str, dimensions: int) -> dict[bytes, list[float]]:
+        """Look up vectors and mark the hits as recently used.
+
+        Args:
+            keys: Text keys from ``text_key``.
+            model: Embedding model name.
+            dimensions: Vector dimensions (0 for the model default).
+
+        Returns:
+            Mapping of the keys found to their vectors.
+        """
+        unique = list(dict.fromkeys(keys))
+        found: dict[bytes, list[float]] = {}
+        with self._lock, self._conn:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "  # noqa: S608
+                    f"WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    (model, dimensions, *batch),
+                )
+                found.update((key, _unpack(blob)) for key, blob in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE text_hash = ? AND model = ? AND dimensions = ?",
+                    [(now, key, model, dimensions) for key in found],
+                )
+        return found
+
+    def put_many(self, items: dict[bytes, list[float]], model: str, dimensions: int) -> None:
+        """Store vectors, evicting the least recently used entries when full.
+
+        Args:
+            items: Mapping of text keys to vectors.
+            model: Embedding model name.
+            dimensions: Vector dimensions (0 for the model default).
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings "
+                "(text_hash, model, dimensions, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(key, model, dimensions, _pack(v), now) for key, v in items.items()],
+            )
+            self._size += self._conn.total_changes - before
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to the low watermark."""
+        target = int(self.max_entries * EVICTION_LOW_WATERMARK)
+        # Other processes may have written too; re-count before deleting
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = self._size - target
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE (text_hash, model, dimensions) IN ("
+            "SELECT text_hash, model, dimensions FROM embeddings "
+            "ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._size = target
+        logger.info("Evicted %d embeddings from cache", excess)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_cache() -> EmbeddingCache | None:
+    """Get or open the embedding cache, or None when it is disabled."""
+    global _cache  # noqa: PLW0603
+    if settings.embedding_cache_max_entries <= 0:
+        return None
+    if _cache is None:
+        _cache = EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_max_entries)
+        logger.info(
+            "Opened embedding cache at %s (%d entries, max %d)",
+            settings.embedding_cache_path,
+            len(_cache),
+            settings.embedding_cache_max_entries,
+        )
+    return _cache
+
+
+def close_cache() -> None:
+    """Close the cache file (called from the application lifespan)."""
+    global _cache  # noqa: PLW0603
+    cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
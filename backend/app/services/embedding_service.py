@@ -1,63 +1,332 @@
 """OpenAI embedding service for text vectorization."""
 
+import asyncio
+import itertools
 import logging
+import random
+import sqlite3
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 
+import httpx
+import openai
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.core.exceptions import LLMError
+from app.core.metrics import (
+    embedding_cache_requests_total,
+    embedding_coalesce_batch_size,
+    embedding_coalesce_wait_seconds,
+    llm_latency_seconds,
+)
+from app.services import embedding_cache, llm_clients
 
 logger = logging.getLogger(__name__)
 
-# Lazy-initialized client
-_client: AsyncOpenAI | None = None
+# Rough characters-per-token ratio used to size batches without tokenizing
+CHARS_PER_TOKEN = 4
+
+# Transient failures worth retrying: 429, 5xx, timeouts and connection errors
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
 
 
 def _get_client() -> AsyncOpenAI:
-    """Get or create the async OpenAI client."""
-    global _client  # noqa: PLW0603
-    if _client is None:
-        _client = AsyncOpenAI(api_key=settings.openai_api_key)
-    return _client
+    """Get the shared async OpenAI client.
+
+    It does not retry; retries are handled per batch in _embed_batch, which honors
+    Retry-After.
+    """
+    return llm_clients.get_openai_client()
 
 
 async def embed_texts(texts: list[str]) -> list[list[float]]:
     """Generate embeddings for a batch of texts.
 
+    Vectors are looked up in the persistent embedding cache first; only texts that
+    miss (deduplicated) are sent to OpenAI, and their vectors are cached.
+
     Args:
         texts: List of text strings to embed.
 
     Returns:
-        List of embedding vectors (1536 dimensions for text-embedding-3-small).
+        List of embedding vectors of ``settings.openai_embedding_dimensions``.
     """
     if not texts:
         return []
 
+    cache = embedding_cache.get_cache()
+    if cache is None:
+        return await _create_embeddings(texts)
+
+    model = settings.openai_embedding_model
+    dimensions = settings.openai_embedding_dimensions
+    keys = [embedding_cache.text_key(t) for t in texts]
+    try:
+        found = await asyncio.to_thread(cache.get_many, keys, model, dimensions)
+    except sqlite3.Error:
+        logger.warning("Embedding cache lookup failed, embedding without cache", exc_info=True)
+        return await _create_embeddings(texts)
+
+    hits = sum(1 for key in keys if key in found)
+    embedding_cache_requests_total.labels(result="hit").inc(hits)
+    embedding_cache_requests_total.labels(result="miss").inc(len(keys) - hits)
+
+    missing = {key: text for key, text in zip(keys, texts, strict=True) if key not in found}
+    if missing:
+        vectors = await _create_embeddings(list(missing.values()))
+        fresh = dict(zip(missing, vectors, strict=True))
+        try:
+            await asyncio.to_thread(cache.put_many, fresh, model, dimensions)
+        except sqlite3.Error:
+            logger.warning("Failed to store embeddings in cache", exc_info=True)
+        found.update(fresh)
+
+    return [found[key] for key in keys]
+
+
+def _dimensions_param() -> int | openai.NotGiven:
+    """Return the ``dimensions`` request parameter for the configured model.
+
+    Only text-embedding-3 models accept it; older models always return their native
+    size (which ``settings.openai_embedding_dimensions`` must then match).
+    """
+    if settings.openai_embedding_model.startswith("text-embedding-3"):
+        return settings.openai_embedding_dimensions
+    return openai.NOT_GIVEN
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _batch_ranges(texts: list[str], max_inputs: int, max_tokens: int) -> list[tuple[int, int]]:
+    """Split texts into consecutive ``[start, stop)`` ranges for embedding requests.
+
+    Each range holds at most ``max_inputs`` texts and at most ``max_tokens``
+    estimated tokens, except that a single text over the token budget gets a range
+    of its own.
+    """
+    ranges = []
+    start = tokens = 0
+    for i, text in enumerate(texts):
+        estimate = _estimate_tokens(text)
+        if i > start and (i - start >= max_inputs or tokens + estimate > max_tokens):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += estimate
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _parse_retry_after(headers: httpx.Headers) -> float | None:
+    """Read the server's requested delay from ``Retry-After-Ms``/``Retry-After``."""
+    if value := headers.get("retry-after-ms"):
+        try:
+            return float(value) / 1000
+        except ValueError:
+            return None
+    if value := headers.get("retry-after"):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:  # HTTP-date form
+            return (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Return how long to wait before retrying a failed request.
+
+    Uses the server's Retry-After headers when present, otherwise exponential
+    backoff with jitter.
+    """
+    delay = None
+    if isinstance(error, openai.APIStatusError):
+        delay = _parse_retry_after(error.response.headers)
+    if delay is None:
+        delay = settings.embedding_retry_backoff_seconds * 2 ** (attempt - 1)
+        delay *= random.uniform(0.5, 1.0)  # noqa: S311
+    return min(max(delay, 0.0), settings.embedding_retry_backoff_max_seconds)
+
+
+async def _embed_batch(texts: list[str]) -> list[list[float]]:
+    """Embed one request's worth of texts, retrying transient failures."""
     client = _get_client()
+    for attempt in itertools.count(1):
+        try:
+            with llm_latency_seconds.labels(operation="embed").time():
+                response = await client.embeddings.create(
+                    model=settings.openai_embedding_model,
+                    input=texts,
+                    dimensions=_dimensions_param(),
+                )
+            break
+        except RETRYABLE_ERRORS as e:
+            if attempt > settings.embedding_max_retries:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(
+                "Embedding request failed (%s), retry %d/%d in %.1fs",
+                type(e).__name__,
+                attempt,
+                settings.embedding_max_retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
 
-    # OpenAI supports batch embedding — send all at once
-    response = await client.embeddings.create(
-        model=settings.openai_embedding_model,
-        input=texts,
+async def _create_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed texts with the OpenAI API.
+
+    Texts are split into requests bounded by input count and estimated tokens,
+    which run concurrently (up to ``settings.embedding_max_concurrency`` per call)
+    and are reassembled in input order.
+    """
+    ranges = _batch_ranges(
+        texts, settings.embedding_batch_max_inputs, settings.embedding_batch_max_tokens
     )
+    semaphore = asyncio.Semaphore(max(settings.embedding_max_concurrency, 1))
+
+    async def run(start: int, stop: int) -> list[list[float]]:
+        async with semaphore:
+            return await _embed_batch(texts[start:stop])
+
+    tasks = [asyncio.ensure_future(run(start, stop)) for start, stop in ranges]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # One batch failed for good: don't leave its siblings spending quota
+        for task in tasks:
+            task.cancel()
+        raise
 
-    embeddings = [item.embedding for item in response.data]
+    embeddings = [vector for batch in results for vector in batch]
+    if embeddings and len(embeddings[0]) != settings.openai_embedding_dimensions:
+        # Never let wrongly sized vectors reach the cache or the collection
+        raise LLMError(
+            f"{settings.openai_embedding_model} returned {len(embeddings[0])}-dimensional "
+            f"embeddings, expected {settings.openai_embedding_dimensions}"
+        )
     logger.info(
-        "Generated %d embeddings using %s (dims=%d)",
+        "Generated %d embeddings in %d requests using %s (dims=%d)",
         len(embeddings),
+        len(ranges),
         settings.openai_embedding_model,
         len(embeddings[0]) if embeddings else 0,
     )
     return embeddings
 
 
+class _PendingQuery:
+    __slots__ = ("arrivals", "future")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.arrivals: list[float] = []
+
+
+class EmbeddingCoalescer:
+    """Coalesce concurrent single-text embedding calls into batched requests.
+
+    Calls arriving within ``window_seconds`` of the first pending one (or until
+    ``max_batch_size`` distinct texts are pending) are sent as one ``embed_texts``
+    call, and each caller receives its vector through a future. Identical texts
+    pending at the same time share one input and one future.
+
+    Args:
+        window_seconds: How long the first call of a batch waits for company.
+        max_batch_size: Distinct texts that trigger an immediate flush.
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(max_batch_size, 1)
+        self._loop = asyncio.get_running_loop()
+        self._pending: dict[str, _PendingQuery] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed one text as part of the next batch."""
+        entry = self._pending.get(text)
+        if entry is None:
+            entry = self._pending[text] = _PendingQuery(self._loop.create_future())
+        entry.arrivals.append(self._loop.time())
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.window_seconds, self._flush)
+
+        # Shielded: a cancelled caller must not cancel a vector others are awaiting
+        return await asyncio.shield(entry.future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = self._loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: dict[str, _PendingQuery]) -> None:
+        now = self._loop.time()
+        embedding_coalesce_batch_size.observe(len(batch))
+        for entry in batch.values():
+            for arrived in entry.arrivals:
+                embedding_coalesce_wait_seconds.observe(now - arrived)
+
+        try:
+            vectors = await embed_texts(list(batch))
+        except BaseException as e:
+            for entry in batch.values():
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+
+        for entry, vector in zip(batch.values(), vectors, strict=True):
+            if not entry.future.done():
+                entry.future.set_result(vector)
+
+
+# Lazy-initialized coalescer, bound to the event loop that created it
+_coalescer: EmbeddingCoalescer | None = None
+
+
+def _get_coalescer() -> EmbeddingCoalescer:
+    """Get or create the query coalescer for the running event loop."""
+    global _coalescer  # noqa: PLW0603
+    if _coalescer is None or _coalescer._loop is not asyncio.get_running_loop():
+        _coalescer = EmbeddingCoalescer(
+            settings.embedding_coalesce_window_ms / 1000,
+            settings.embedding_coalesce_max_batch_size,
+        )
+    return _coalescer
+
+
 async def embed_query(text: str) -> list[float]:
     """Generate an embedding for a single query text.
 
+    Concurrent queries are coalesced into shared embedding requests (see
+    ``EmbeddingCoalescer``) unless ``settings.embedding_coalesce_window_ms`` is 0.
+
     Args:
         text: Query text to embed.
 
     Returns:
         Embedding vector.
     """
-    results = await embed_texts([text])
-    return results[0]
+    if settings.embedding_coalesce_window_ms <= 0:
+        results = await embed_texts([text])
+        return results[0]
+    return await _get_coalescer().embed(text)
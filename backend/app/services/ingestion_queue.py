@@ -0,0 +1,230 @@
+"""Postgres-backed ingestion job queue.
+
+Jobs live in the ``ingestion_jobs`` table and are claimed with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of workers, in any number of
+processes or nodes, can share the queue without handing the same job out twice.
+"""
+
+import logging
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import Document, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Return the retry delay in seconds after the given number of failed attempts.
+
+    Args:
+        attempts: Number of attempts made so far (>= 1).
+
+    Returns:
+        Exponential backoff delay, capped at ``ingestion_retry_backoff_max_seconds``.
+    """
+    delay = settings.ingestion_retry_backoff_seconds * 2 ** max(attempts - 1, 0)
+    return min(delay, settings.ingestion_retry_backoff_max_seconds)
+
+
+async def enqueue(
+    document_id: uuid.UUID,
+    file_path: str,
+    content_type: str,
+    db: AsyncSession,
+) -> IngestionJob:
+    """Add an ingestion job for a document to the queue.
+
+    The job becomes visible to workers once the caller commits the session.
+
+    Args:
+        document_id: UUID of the Document to ingest.
+        file_path: Path of the stored upload.
+        content_type: MIME type of the upload.
+        db: Async database session.
+
+    Returns:
+        The queued IngestionJob ORM object.
+    """
+    job = IngestionJob(
+        id=uuid.uuid4(),
+        document_id=document_id,
+        file_path=file_path,
+        content_type=content_type,
+        status="queued",
+        max_attempts=settings.ingestion_max_attempts,
+        run_after=datetime.now(UTC),
+    )
+    db.add(job)
+    await db.flush()
+    logger.info("Queued ingestion job %s for document %s", job.id, document_id)
+    return job
+
+
+async def claim_next(worker_id: str, db: AsyncSession) -> IngestionJob | None:
+    """Claim the next runnable job for a worker.
+
+    Args:
+        worker_id: Identifier of the claiming worker (stored in ``locked_by``).
+        db: Async database session. Committed before returning.
+
+    Returns:
+        The claimed IngestionJob, or None if no job is due.
+    """
+    now = datetime.now(UTC)
+    stmt = (
+        select(IngestionJob)
+        .where(IngestionJob.status == "queued", IngestionJob.run_after <= now)
+        .order_by(IngestionJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = (await db.execute(stmt)).scalars().first()
+    if job is None:
+        await db.rollback()
+        return None
+
+    job.status = "processing"
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.attempts += 1
+    await db.commit()
+    logger.info("Worker %s claimed job %s (attempt %d)", worker_id, job.id, job.attempts)
+    return job
+
+
+async def renew_lease(job_id: uuid.UUID, worker_id: str, db: AsyncSession) -> bool:
+    """Extend the lease on a job the worker is still processing.
+
+    Returns:
+        False if the job is no longer held by this worker.
+    """
+    result = await db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            IngestionJob.status == "processing",
+            IngestionJob.locked_by == worker_id,
+        )
+        .values(locked_at=datetime.now(UTC))
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def complete(job_id: uuid.UUID, worker_id: str, db: AsyncSession) -> None:
+    """Mark a job as done."""
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.locked_by == worker_id)
+        .values(status="done", locked_by=None, locked_at=None, last_error=None)
+    )
+    await db.commit()
+
+
+async def fail(
+    job: IngestionJob,
+    worker_id: str,
+    error: str,
+    db: AsyncSession,
+    retryable: bool = True,
+) -> bool:
+    """Record a failed attempt and either reschedule the job or give up.
+
+    When the job is given up, its Document is moved to ``error`` status.
+
+    Args:
+        job: The job that failed.
+        worker_id: Identifier of the worker holding the job.
+        error: Error description stored on the job.
+        db: Async database session.
+        retryable: False for permanent errors (e.g. unreadable files).
+
+    Returns:
+        True if the job was rescheduled for another attempt.
+    """
+    will_retry = retryable and job.attempts < job.max_attempts
+    values: dict = {"locked_by": None, "locked_at": None, "last_error": error}
+    if will_retry:
+        values["status"] = "queued"
+        values["run_after"] = datetime.now(UTC) + timedelta(seconds=backoff_delay(job.attempts))
+    else:
+        values["status"] = "failed"
+
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job.id, IngestionJob.locked_by == worker_id)
+        .values(**values)
+    )
+    if not will_retry:
+        await _mark_document_failed(job.document_id, error, db)
+    await db.commit()
+
+    if will_retry:
+        logger.warning(
+            "Job %s failed (attempt %d/%d), retrying at %s: %s",
+            job.id,
+            job.attempts,
+            job.max_attempts,
+            values["run_after"].isoformat(),
+            error,
+        )
+    else:
+        logger.error("Job %s failed permanently after %d attempts: %s", job.id, job.attempts, error)
+    return will_retry
+
+
+async def backlog(db: AsyncSession) -> int:
+    """Return the number of jobs waiting in the queue (due or scheduled for retry)."""
+    stmt = select(func.count()).select_from(IngestionJob).where(IngestionJob.status == "queued")
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def recover_stale(db: AsyncSession) -> int:
+    """Requeue jobs left in ``processing`` by crashed workers.
+
+    A job is stale when its lease (``locked_at``) is older than
+    ``ingestion_lease_seconds``. Stale jobs that have used up their attempts are
+    failed instead of requeued.
+
+    Args:
+        db: Async database session. Committed before returning.
+
+    Returns:
+        Number of jobs recovered (requeued or failed).
+    """
+    cutoff = datetime.now(UTC) - timedelta(seconds=settings.ingestion_lease_seconds)
+    stmt = (
+        select(IngestionJob)
+        .where(IngestionJob.status == "processing", IngestionJob.locked_at < cutoff)
+        .with_for_update(skip_locked=True)
+    )
+    stale = list((await db.execute(stmt)).scalars().all())
+
+    for job in stale:
+        error = f"Lease held by {job.locked_by} expired"
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = error
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = datetime.now(UTC) + timedelta(seconds=backoff_delay(job.attempts))
+        else:
+            job.status = "failed"
+            await _mark_document_failed(job.document_id, error, db)
+        logger.warning("Recovered stale job %s (now %s)", job.id, job.status)
+
+    await db.commit()
+    return len(stale)
+
+
+async def _mark_document_failed(document_id: uuid.UUID, error: str, db: AsyncSession) -> None:
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id)
+        .values(status="error", error_message=error)
+    )
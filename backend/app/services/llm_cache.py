@@ -0,0 +1,238 @@
+"""Cache for deterministic (temperature 0) LLM calls.
+
+The router and text-to-SQL chains run at temperature 0, so the same prompt,
+model and input give the same output; repeats are served from this cache instead
+of a new completion. Keys hash the operation, a fingerprint of the prompt
+template (editing a prompt invalidates its entries), the model and the
+whitespace-normalized inputs, plus any extra context the caller passes (such as
+a database schema fingerprint).
+
+Two tiers: an in-process LRU (``settings.llm_cache_max_entries``) and, when
+``settings.llm_cache_path`` is set, a SQLite file shared by the processes on a
+host. Entries expire after ``settings.llm_cache_ttl_seconds`` in both.
+Concurrent calls with the same key share one upstream request (single flight).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from app.config import settings
+from app.core.metrics import llm_cache_requests_total
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are purged from the SQLite tier once every this many writes
+PURGE_INTERVAL = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Lazy-initialized cache
+_cache: "LLMCache | None" = None
+
+
+def normalize_input(text: str) -> str:
+    """Normalize Unicode forms and collapse whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def fingerprint(text: str) -> str:
+    """Return a short stable fingerprint of a text (prompt template, schema, ...)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(operation: str, template: str, model: str, **inputs: str) -> str:
+    """Build the cache key of a call.
+
+    Args:
+        operation: Name of the calling chain (for metrics and key separation).
+        template: The prompt template text; its fingerprint acts as the prompt
+            version.
+        model: Chat model name.
+        **inputs: Prompt inputs and extra context, normalized before hashing.
+    """
+    parts = {
+        "operation": operation,
+        "prompt": fingerprint(template),
+        "model": model,
+        "inputs": {name: normalize_input(value) for name, value in sorted(inputs.items())},
+    }
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{operation}:{digest}"
+
+
+class _SqliteTier:
+    """Persistent tier: key/value rows with an expiry time."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, expires_at FROM llm_calls WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+
+    def put(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_calls VALUES (?, ?, ?)", (key, value, expires_at)
+            )
+            self._writes += 1
+            if self._writes % PURGE_INTERVAL == 0:
+                self._conn.execute("DELETE FROM llm_calls WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """Two-tier cache of LLM outputs with single-flight deduplication.
+
+    Args:
+        max_entries: Size of the in-process LRU tier.
+        ttl_seconds: Lifetime of an entry.
+        path: SQLite file of the persistent tier, or None for memory only.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        self._persistent = _SqliteTier(path) if path else None
+
+    def _get_memory(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_call(self, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached output for ``key``, or run ``call`` and cache its result.
+
+        Errors are not cached. If another call with the same key is in flight, this
+        waits for its result instead of calling upstream again.
+
+        Args:
+            key: Key from ``cache_key``.
+            call: Makes the upstream request and returns its (serialized) output.
+        """
+        operation = key.partition(":")[0]
+        value = self._get_memory(key)
+        if value is not None:
+            llm_cache_requests_total.labels(operation=operation, result="memory").inc()
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            llm_cache_requests_total.labels(operation=operation, result="coalesced").inc()
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leading call was cancelled, not us: take over
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get_or_call(key, call)
+                raise
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            stored = None
+            if self._persistent is not None:
+                stored = await asyncio.to_thread(self._persistent.get, key)
+            if stored is not None:
+                value, expires_at = stored
+                result = "persistent"
+            else:
+                value = await call()
+                expires_at = time.time() + self.ttl_seconds
+                if self._persistent is not None:
+                    try:
+                        await asyncio.to_thread(self._persistent.put, key, value, expires_at)
+                    except sqlite3.Error as e:
+                        logger.warning("Could not persist LLM cache entry: %s", e)
+                result = "miss"
+            self._put_memory(key, value, expires_at)
+            llm_cache_requests_total.labels(operation=operation, result=result).inc()
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: waiters re-raise it, none is fine too
+            raise
+        finally:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        if self._persistent is not None:
+            self._persistent.close()
+
+
+def get_cache() -> LLMCache | None:
+    """Get or create the LLM call cache, or None when it is disabled."""
+    global _cache  # noqa: PLW0603
+    if settings.llm_cache_max_entries <= 0:
+        return None
+    if _cache is None:
+        _cache = LLMCache(
+            settings.llm_cache_max_entries,
+            settings.llm_cache_ttl_seconds,
+            settings.llm_cache_path or None,
+        )
+    return _cache
+
+
+async def cached_call(key: str, call: Callable[[], Awaitable[str]]) -> str:
+    """Run a deterministic LLM call through the cache (directly if it is disabled)."""
+    cache = get_cache()
+    if cache is None:
+        return await call()
+    return await cache.get_or_call(key, call)
+
+
+def close_cache() -> None:
+    """Close the persistent tier (called from the application lifespan)."""
+    global _cache  # noqa: PLW0603
+    cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,97 @@
+"""Shared OpenAI clients over one pooled HTTP connection pool.
+
+Building a ``ChatOpenAI`` per request creates new OpenAI and HTTP clients, so
+every request pays for client setup, and for a new TCP connection and TLS
+handshake. This module keeps one chat model per (model, temperature, streaming)
+profile and one embeddings client for the process lifetime, all sending their
+requests through a single ``httpx.AsyncClient``. That client negotiates HTTP/2
+and keeps connections alive. Its pool limits and timeouts come from the
+``openai_http_*`` settings.
+
+Clients are created on first use and closed by ``close`` from the application
+and worker lifespans.
+"""
+
+import logging
+
+import httpx
+from langchain_openai import ChatOpenAI
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lazy-initialized shared clients
+_http_client: httpx.AsyncClient | None = None
+_chat_models: dict[tuple[str, float, bool], ChatOpenAI] = {}
+_openai_client: AsyncOpenAI | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the pooled HTTP client for OpenAI requests."""
+    global _http_client  # noqa: PLW0603
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=settings.openai_http2,
+            limits=httpx.Limits(
+                max_connections=settings.openai_http_max_connections,
+                max_keepalive_connections=settings.openai_http_max_keepalive_connections,
+                keepalive_expiry=settings.openai_http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                settings.openai_http_timeout_seconds,
+                connect=settings.openai_http_connect_timeout_seconds,
+            ),
+        )
+    return _http_client
+
+
+def get_chat_model(temperature: float = 0, streaming: bool = False) -> ChatOpenAI:
+    """Get the shared chat model for a temperature/streaming profile.
+
+    Args:
+        temperature: Sampling temperature (0 for deterministic chains).
+        streaming: Whether the model is used with ``astream``.
+    """
+    key = (settings.openai_chat_model, temperature, streaming)
+    llm = _chat_models.get(key)
+    if llm is None:
+        llm = ChatOpenAI(
+            model=settings.openai_chat_model,
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            temperature=temperature,
+            streaming=streaming,
+            http_async_client=get_http_client(),
+        )
+        _chat_models[key] = llm
+        logger.debug("Created chat model %s (temperature %s, streaming %s)", *key)
+    return llm
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared async OpenAI client (used for embeddings).
+
+    Its requests are not retried; ``embedding_service`` retries per batch and
+    honors Retry-After.
+    """
+    global _openai_client  # noqa: PLW0603
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            max_retries=0,
+            http_client=get_http_client(),
+        )
+    return _openai_client
+
+
+async def close() -> None:
+    """Drop the shared clients and close their connections (called at shutdown)."""
+    global _http_client, _openai_client  # noqa: PLW0603
+    http_client, _http_client = _http_client, None
+    _openai_client = None
+    _chat_models.clear()
+    if http_client is not None:
+        await http_client.aclose()
@@ -0,0 +1,722 @@
+"""In-process vector store backend persisted to a local directory.
+
+Vectors live in a memory-mapped float32 matrix (``vectors.f32``), normalized on
+insert so cosine similarity is a dot product, and point payloads in SQLite
+(``points.sqlite3``). Searches are exact, scoring the matrix block by block with
+NumPy, until the store holds ``local_vector_store_hnsw_min_points`` points; from
+then on an HNSW index (``hnsw.bin``, needs the optional ``hnswlib`` package) is
+built and kept up to date alongside the matrix.
+
+The filterable fields (``vector_store.FILTER_FIELDS``) are also held in memory as
+interned integer codes, so filters are vectorized mask operations. The store
+belongs to one process: never point several processes at the same directory.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.config import settings
+from app.core.exceptions import VectorStoreError
+from app.services import sparse_encoder
+from app.services.vector_store import (
+    FILTER_FIELDS,
+    SearchResult,
+    point_id,
+    reciprocal_rank_fusion,
+)
+
+try:
+    import hnswlib
+except ImportError:  # optional: without it every search is exact
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 1024
+
+# Rows scored per matrix-vector product; bounds temporary memory during a search
+SEARCH_BLOCK_ROWS = 65_536
+
+# Filtered HNSW and full-text searches fetch this many times the wanted candidates
+# before filtering, and filters matching a smaller fraction of the points than
+# HNSW_FILTER_MIN_SELECTIVITY are searched exactly instead
+FILTER_OVERSAMPLING = 4
+HNSW_FILTER_MIN_SELECTIVITY = 0.05
+
+# Payload fields that set_document_payload can change
+PAYLOAD_COLUMNS = ("filename", "file_type", "total_chunks")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    slot INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    document_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    token_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_points_document_id ON points (document_id);
+-- Full-text index over chunk text (BM25 ranking), kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS points_fts USING fts5(
+    text, content='points', content_rowid='slot'
+);
+CREATE TRIGGER IF NOT EXISTS points_fts_insert AFTER INSERT ON points BEGIN
+    INSERT INTO points_fts (rowid, text) VALUES (new.slot, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS points_fts_delete AFTER DELETE ON points BEGIN
+    INSERT INTO points_fts (points_fts, rowid, text) VALUES ('delete', old.slot, old.text);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Lazy-initialized store
+_store: "LocalVectorStore | None" = None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(slots: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[int, float]]:
+    best = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(slots[i]), float(scores[i])) for i in best if scores[i] > -np.inf]
+
+
+class LocalVectorStore:
+    """Vector store backed by a memory-mapped matrix, SQLite and optional HNSW.
+
+    Implements the ``vector_store.VectorStore`` protocol. Files are opened on
+    first use; blocking work runs in a thread.
+
+    Args:
+        path: Directory holding the store (created if missing).
+        dimensions: Vector size; must match the vectors already stored.
+        hnsw_min_points: Point count from which searches use HNSW (0 = never).
+        hnsw_m: HNSW graph degree.
+        hnsw_ef_construction: HNSW build-time beam width.
+        hnsw_ef_search: Default HNSW query beam width.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        dimensions: int,
+        hnsw_min_points: int = 50_000,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 128,
+    ):
+        self.path = Path(path)
+        self.dimensions = dimensions
+        self.hnsw_min_points = hnsw_min_points
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._bulk_load_depth = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._matrix: np.memmap | None = None
+        self._index = None
+        self._capacity = 0
+        self._size = 0  # slots in use, including freed ones
+        self._live = 0
+        self._ids: list[str | None] = []
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._codes = {field: np.zeros(0, dtype=np.int32) for field in FILTER_FIELDS}
+        self._vocab: dict[str, dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        # Slots written during a bulk load, added to the HNSW index when it ends
+        self._unindexed: set[int] = set()
+        self._version = 0
+        self._index_version = -1
+        self._warned_no_hnsw = False
+
+    # Opening, growth and persistence
+
+    def _open(self) -> None:
+        if self._conn is not None:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path / "points.sqlite3", check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE must fire the delete trigger for the replaced row
+        conn.execute("PRAGMA recursive_triggers=ON")
+        has_fts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'points_fts'").fetchone()
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(points)")}
+        if "token_count" not in columns:  # store created before token counts were kept
+            with conn:
+                conn.execute("ALTER TABLE points ADD COLUMN token_count INTEGER NOT NULL DEFAULT 0")
+        if not has_fts:  # store created before full-text search was added
+            with conn:
+                conn.execute("INSERT INTO points_fts (points_fts) VALUES ('rebuild')")
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        stored = int(meta.get("dimensions", self.dimensions))
+        if stored != self.dimensions:
+            conn.close()
+            raise VectorStoreError(
+                f"Local vector store at {self.path} holds {stored}-dimensional vectors but "
+                f"embeddings are configured for {self.dimensions}; use a new "
+                f"LOCAL_VECTOR_STORE_PATH and re-ingest"
+            )
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('dimensions', ?)", (str(self.dimensions),)
+            )
+        self._conn = conn
+        self._version = int(meta.get("version", 0))
+
+        rows = conn.execute("SELECT slot, id, document_id, filename, file_type FROM points")
+        rows = rows.fetchall()
+        self._size = max((row[0] for row in rows), default=-1) + 1
+        self._grow(self._size)
+        for slot, pid, *values in rows:
+            self._set_slot(slot, pid, values)
+        self._live = len(rows)
+        self._free = [slot for slot in range(self._size) if not self._alive[slot]]
+
+        index_file = self.path / "hnsw.bin"
+        if (
+            self._hnsw_available()
+            and index_file.exists()
+            and meta.get("index_version") == str(self._version)
+        ):
+            index = hnswlib.Index(space="ip", dim=self.dimensions)
+            index.load_index(str(index_file), max_elements=self._capacity)
+            self._index = index
+            self._index_version = self._version
+        else:
+            self._maybe_build_index()
+        logger.info(
+            "Opened local vector store at %s (%d points, dims=%d, hnsw=%s)",
+            self.path,
+            self._live,
+            self.dimensions,
+            self._index is not None,
+        )
+
+    def _grow(self, needed: int) -> None:
+        """Make room for ``needed`` slots, doubling the matrix file as required."""
+        if needed <= self._capacity and self._matrix is not None:
+            return
+        file = self.path / "vectors.f32"
+        row_bytes = self.dimensions * 4
+        file.touch()
+        capacity = max(self._capacity, INITIAL_CAPACITY, file.stat().st_size // row_bytes)
+        while capacity < needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        if file.stat().st_size < capacity * row_bytes:
+            os.truncate(file, capacity * row_bytes)
+        self._matrix = np.memmap(
+            file, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions)
+        )
+
+        extra = capacity - self._capacity
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        for field in FILTER_FIELDS:
+            self._codes[field] = np.concatenate(
+                [self._codes[field], np.full(extra, -1, dtype=np.int32)]
+            )
+        self._ids.extend([None] * extra)
+        if self._index is not None:
+            self._index.resize_index(capacity)
+        self._capacity = capacity
+
+    def _code(self, field: str, value: str) -> int:
+        vocab = self._vocab[field]
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        return code
+
+    def _set_slot(self, slot: int, pid: str, values: list[str]) -> None:
+        """Record a live point's ID and filter fields (in ``FILTER_FIELDS`` order)."""
+        self._ids[slot] = pid
+        self._slots[pid] = slot
+        self._alive[slot] = True
+        for field, value in zip(FILTER_FIELDS, values, strict=True):
+            self._codes[field][slot] = self._code(field, value)
+
+    def _bump_version(self) -> None:
+        """Count a write (inside its transaction) so a stale HNSW file is detected."""
+        self._version += 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(self._version),)
+        )
+
+    def _hnsw_available(self) -> bool:
+        if self.hnsw_min_points <= 0:
+            return False
+        if hnswlib is None:
+            if not self._warned_no_hnsw and self._live >= self.hnsw_min_points:
+                logger.warning("hnswlib is not installed; local vector search stays exact")
+                self._warned_no_hnsw = True
+            return False
+        return True
+
+    def _maybe_build_index(self) -> None:
+        """Build the HNSW index once the store is large enough for it to pay off."""
+        if (
+            self._index is not None
+            or self._bulk_load_depth
+            or self._live < self.hnsw_min_points
+            or not self._hnsw_available()
+        ):
+            return
+        start = time.perf_counter()
+        slots = np.flatnonzero(self._alive[: self._size])
+        index = hnswlib.Index(space="ip", dim=self.dimensions)
+        index.init_index(
+            max_elements=self._capacity, ef_construction=self.hnsw_ef_construction, M=self.hnsw_m
+        )
+        for i in range(0, len(slots), SEARCH_BLOCK_ROWS):
+            block = slots[i : i + SEARCH_BLOCK_ROWS]
+            index.add_items(self._matrix[block], block)
+        self._index = index
+        self._unindexed.clear()
+        logger.info(
+            "Built HNSW index over %d points in %.1fs", len(slots), time.perf_counter() - start
+        )
+        self._save_index()
+
+    def _save_index(self) -> None:
+        if self._index is None or self._index_version == self._version:
+            return
+        self._matrix.flush()
+        self._index.save_index(str(self.path / "hnsw.bin"))
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('index_version', ?)", (str(self._version),)
+            )
+        self._index_version = self._version
+
+    # Blocking operations (run via asyncio.to_thread)
+
+    def _ensure_open(self) -> None:
+        with self._lock:
+            self._open()
+
+    def _upsert(self, document_id: str, chunks: list[dict], embeddings: list[list[float]]) -> int:
+        if not chunks:
+            return 0
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(chunks), -1)
+        if vectors.shape[1] != self.dimensions:
+            raise VectorStoreError(
+                f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}"
+            )
+        # Last write wins for repeated IDs, as in Qdrant
+        latest = {
+            chunk.get("id") or point_id(document_id, chunk["text"]): i
+            for i, chunk in enumerate(chunks)
+        }
+        with self._lock:
+            self._open()
+            new = [pid for pid in latest if pid not in self._slots]
+            reused = self._free[len(self._free) - min(len(new), len(self._free)) :]
+            fresh = len(new) - len(reused)
+            assigned = dict(
+                zip(new, [*reused, *range(self._size, self._size + fresh)], strict=True)
+            )
+            slots = np.array(
+                [self._slots.get(pid, assigned.get(pid)) for pid in latest], dtype=np.int64
+            )
+            self._grow(self._size + fresh)
+            self._matrix[slots] = _normalize(vectors[list(latest.values())])
+
+            rows = []
+            for pid, i in latest.items():
+                chunk = chunks[i]
+                metadata = chunk["metadata"]
+                rows.append(
+                    (
+                        int(slots[len(rows)]),
+                        pid,
+                        document_id,
+                        metadata.get("filename", ""),
+                        metadata.get("file_type", ""),
+                        chunk["chunk_index"],
+                        metadata.get("total_chunks", 0),
+                        chunk["text"],
+                        metadata.get("token_count", 0),
+                    )
+                )
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self._bump_version()
+
+            if reused:
+                del self._free[-len(reused) :]
+            self._size += fresh
+            self._live += len(new)
+            for row in rows:
+                self._set_slot(row[0], row[1], [row[2], row[3], row[4]])
+
+            if self._index is None:
+                self._maybe_build_index()
+            elif self._bulk_load_depth:
+                self._unindexed.update(slots.tolist())
+            else:
+                self._index.add_items(self._matrix[slots], slots)
+        return len(chunks)
+
+    def _delete_slots(self, slots: list[int]) -> None:
+        if not slots:
+            return
+        with self._conn:
+            self._conn.executemany("DELETE FROM points WHERE slot = ?", [(s,) for s in slots])
+            self._bump_version()
+        for slot in slots:
+            del self._slots[self._ids[slot]]
+            self._ids[slot] = None
+            if self._index is not None and slot not in self._unindexed:
+                with contextlib.suppress(RuntimeError):  # not in the index
+                    self._index.mark_deleted(slot)
+        self._alive[slots] = False
+        for field in FILTER_FIELDS:
+            self._codes[field][slots] = -1
+        self._unindexed.difference_update(slots)
+        self._free.extend(slots)
+        self._live -= len(slots)
+
+    def _delete_points(self, point_ids: list[str]) -> None:
+        with self._lock:
+            self._open()
+            self._delete_slots([self._slots[pid] for pid in set(point_ids) if pid in self._slots])
+
+    def _delete_document(self, document_id: str) -> int:
+        with self._lock:
+            self._open()
+            slots = self._document_slots(document_id)
+            self._delete_slots(slots.tolist())
+            return len(slots)
+
+    def _document_slots(self, document_id: str) -> np.ndarray:
+        code = self._vocab["document_id"].get(document_id)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self._codes["document_id"][: self._size] == code)
+
+    def _set_document_payload(self, document_id: str, payload: dict) -> None:
+        unknown = set(payload) - set(PAYLOAD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported payload fields: {', '.join(sorted(unknown))}")
+        if not payload:
+            return
+        with self._lock:
+            self._open()
+            assignments = ", ".join(f"{column} = ?" for column in payload)
+            with self._conn:
+                self._conn.execute(
+                    f"UPDATE points SET {assignments} WHERE document_id = ?",  # noqa: S608
+                    (*payload.values(), document_id),
+                )
+                self._bump_version()
+            slots = self._document_slots(document_id)
+            for field in FILTER_FIELDS:
+                if field in payload:
+                    self._codes[field][slots] = self._code(field, payload[field])
+            self._matrix.flush()
+
+    def _get_document_points(self, document_id: str) -> dict[str, int]:
+        with self._lock:
+            self._open()
+            rows = self._conn.execute(
+                "SELECT id, chunk_index FROM points WHERE document_id = ?", (document_id,)
+            )
+            return dict(rows.fetchall())
+
+    def _set_chunk_indexes(self, chunk_indexes: dict[str, int]) -> None:
+        with self._lock:
+            self._open()
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE points SET chunk_index = ? WHERE id = ?",
+                    [(index, pid) for pid, index in chunk_indexes.items()],
+                )
+                self._bump_version()
+
+    def _filter_mask(self, filters: dict[str, str]) -> np.ndarray:
+        keep = self._alive[: self._size].copy()
+        for field, value in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Cannot filter on {field}; use one of {', '.join(FILTER_FIELDS)}")
+            code = self._vocab[field].get(value)
+            if code is None:
+                return np.zeros(self._size, dtype=bool)
+            keep &= self._codes[field][: self._size] == code
+        return keep
+
+    def _search_exact(self, query: np.ndarray, top_k: int, keep: np.ndarray) -> list:
+        """Brute-force top-k over the slots where ``keep`` is True."""
+        candidates = int(keep.sum())
+        if candidates < self._size // 4:
+            # Selective: score only the matching rows
+            slots = np.flatnonzero(keep)
+            scores = np.concatenate(
+                [
+                    self._matrix[slots[i : i + SEARCH_BLOCK_ROWS]] @ query
+                    for i in range(0, len(slots), SEARCH_BLOCK_ROWS)
+                ]
+                or [np.zeros(0, dtype=np.float32)]
+            )
+            return _top_k(slots, scores, top_k)
+
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self._size)
+            scores[start:stop] = self._matrix[start:stop] @ query
+        scores[~keep] = -np.inf
+        return _top_k(np.arange(self._size), scores, top_k)
+
+    def _search_index(
+        self, query: np.ndarray, top_k: int, keep: np.ndarray | None, hnsw_ef: int | None
+    ) -> list | None:
+        """Approximate top-k from the HNSW index, or None if it cannot answer."""
+        indexed = self._live - len(self._unindexed)
+        fetch = min(top_k * (FILTER_OVERSAMPLING if keep is not None else 1), indexed)
+        if fetch <= 0:
+            return []
+        self._index.set_ef(max(hnsw_ef or self.hnsw_ef_search, fetch))
+        try:
+            labels, distances = self._index.knn_query(query, k=fetch)
+        except RuntimeError:  # graph too sparse around deletions to return `fetch` points
+            return None
+        hits = [
+            (int(label), 1.0 - float(distance))
+            for label, distance in zip(labels[0], distances[0], strict=True)
+            if keep is None or keep[label]
+        ]
+        if keep is not None and len(hits) < top_k and int(keep.sum()) > len(hits):
+            return None
+        return hits[:top_k]
+
+    def _dense_hits(
+        self, query: np.ndarray, top_k: int, keep: np.ndarray | None, hnsw_ef: int | None
+    ) -> list[tuple[int, float]]:
+        matching = self._live if keep is None else int(keep.sum())
+        hits = None
+        if self._index is not None and matching >= self._live * HNSW_FILTER_MIN_SELECTIVITY:
+            hits = self._search_index(query, top_k, keep, hnsw_ef)
+            if hits is not None and self._unindexed:
+                # Points written during a bulk load: the index is stale for them
+                pending = np.zeros(self._size, dtype=bool)
+                pending[list(self._unindexed)] = True
+                if keep is not None:
+                    pending &= keep
+                hits = sorted(
+                    [hit for hit in hits if hit[0] not in self._unindexed]
+                    + self._search_exact(query, top_k, pending),
+                    key=lambda hit: -hit[1],
+                )[:top_k]
+        if hits is None:
+            hits = self._search_exact(
+                query, top_k, self._alive[: self._size] if keep is None else keep
+            )
+        return hits
+
+    def _lexical_hits(self, query_text: str, limit: int, keep: np.ndarray | None) -> list[int]:
+        """Return the slots best matching the query terms by BM25, best first."""
+        terms = dict.fromkeys(sparse_encoder.tokenize(query_text))
+        if not terms:
+            return []
+        rows = self._conn.execute(
+            "SELECT rowid FROM points_fts WHERE points_fts MATCH ? ORDER BY rank LIMIT ?",
+            (
+                " OR ".join(f'"{term}"' for term in terms),
+                limit * (FILTER_OVERSAMPLING if keep is not None else 1),
+            ),
+        )
+        return [slot for (slot,) in rows if keep is None or keep[slot]][:limit]
+
+    def _search(
+        self,
+        query_embedding: list[float],
+        top_k: int,
+        filters: dict[str, str] | None,
+        query_text: str | None,
+        with_vectors: bool,
+        hnsw_ef: int | None,
+    ) -> list[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (self.dimensions,):
+            raise VectorStoreError(
+                f"Expected a {self.dimensions}-dimensional query, got {query.shape[-1]}"
+            )
+        query = _normalize(query)
+        with self._lock:
+            self._open()
+            if self._live == 0 or top_k <= 0:
+                return []
+            keep = self._filter_mask(filters) if filters else None
+            if keep is not None and not keep.any():
+                return []
+
+            if query_text and settings.hybrid_search_enabled:
+                limit = max(settings.hybrid_prefetch_limit, top_k)
+                lexical = self._lexical_hits(query_text, limit, keep)
+                if lexical:
+                    dense = [slot for slot, _ in self._dense_hits(query, limit, keep, hnsw_ef)]
+                    fused = reciprocal_rank_fusion([dense, lexical])[:top_k]
+                    return self._results(fused, query, with_vectors)
+            return self._results(self._dense_hits(query, top_k, keep, hnsw_ef), query, with_vectors)
+
+    def _results(
+        self, hits: list[tuple[int, float]], query: np.ndarray, with_vectors: bool = False
+    ) -> list[SearchResult]:
+        if not hits:
+            return []
+        placeholders = ",".join("?" * len(hits))
+        rows = self._conn.execute(
+            f"SELECT slot, text, document_id, filename, chunk_index, token_count "  # noqa: S608
+            f"FROM points "
+            f"WHERE slot IN ({placeholders})",
+            [slot for slot, _ in hits],
+        )
+        payloads = {slot: values for slot, *values in rows}
+        return [
+            SearchResult(
+                text=text,
+                score=score,
+                document_id=document_id,
+                filename=filename,
+                chunk_index=chunk_index,
+                id=self._ids[slot],
+                token_count=token_count,
+                vector=self._matrix[slot].tolist() if with_vectors else None,
+                dense_score=float(self._matrix[slot] @ query),
+            )
+            for slot, score in hits
+            for text, document_id, filename, chunk_index, token_count in [payloads[slot]]
+        ]
+
+    def _begin_bulk_load(self) -> None:
+        with self._lock:
+            self._bulk_load_depth += 1
+
+    def _end_bulk_load(self) -> None:
+        with self._lock:
+            if self._bulk_load_depth == 0:
+                return
+            self._bulk_load_depth -= 1
+            if self._bulk_load_depth or self._conn is None:
+                return
+            if self._index is not None and self._unindexed:
+                slots = np.array(sorted(self._unindexed), dtype=np.int64)
+                self._index.add_items(self._matrix[slots], slots)
+                self._unindexed.clear()
+            self._maybe_build_index()
+            self._save_index()
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._bulk_load_depth:
+                self._bulk_load_depth = 1
+                self._end_bulk_load()
+            self._save_index()
+            self._matrix.flush()
+            self._conn.close()
+            self._conn = None
+            self._reset()
+
+    # VectorStore protocol
+
+    async def ensure_collection(self) -> None:
+        await asyncio.to_thread(self._ensure_open)
+
+    async def upsert_chunks(
+        self,
+        document_id: str,
+        chunks: list[dict],
+        embeddings: list[list[float]],
+        wait: bool = True,
+    ) -> int:
+        count = await asyncio.to_thread(self._upsert, document_id, chunks, embeddings)
+        logger.info("Upserted %d chunks for document %s into local store", count, document_id)
+        return count
+
+    async def set_document_payload(self, document_id: str, payload: dict) -> None:
+        await asyncio.to_thread(self._set_document_payload, document_id, payload)
+
+    async def get_document_points(self, document_id: str) -> dict[str, int]:
+        return await asyncio.to_thread(self._get_document_points, document_id)
+
+    async def delete_points(self, point_ids: list[str]) -> None:
+        await asyncio.to_thread(self._delete_points, point_ids)
+
+    async def set_chunk_indexes(self, chunk_indexes: dict[str, int]) -> None:
+        await asyncio.to_thread(self._set_chunk_indexes, chunk_indexes)
+
+    async def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        filters: dict[str, str] | None = None,
+        query_text: str | None = None,
+        with_vectors: bool = False,
+        hnsw_ef: int | None = None,
+        **params: Any,
+    ) -> list[SearchResult]:
+        """Search for similar chunks.
+
+        With ``query_text`` (and hybrid search enabled), dense hits are fused with
+        full-text BM25 hits by reciprocal-rank fusion. Returned vectors are
+        unit-normalized. Qdrant-only parameters
+        (``rescore``, ``oversampling``) are ignored.
+        """
+        return await asyncio.to_thread(
+            self._search, query_embedding, top_k, filters, query_text, with_vectors, hnsw_ef
+        )
+
+    async def delete_by_document(self, document_id: str) -> None:
+        count = await asyncio.to_thread(self._delete_document, document_id)
+        logger.info("Deleted %d vectors for document %s from local store", count, document_id)
+
+    async def begin_bulk_load(self) -> None:
+        await asyncio.to_thread(self._begin_bulk_load)
+
+    async def end_bulk_load(self) -> None:
+        await asyncio.to_thread(self._end_bulk_load)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+
+def get_store() -> LocalVectorStore:
+    """Get or create the local vector store from settings."""
+    global _store  # noqa: PLW0603
+    if _store is None:
+        _store = LocalVectorStore(
+            settings.local_vector_store_path,
+            settings.openai_embedding_dimensions,
+            hnsw_min_points=settings.local_vector_store_hnsw_min_points,
+            hnsw_m=settings.local_vector_store_hnsw_m,
+            hnsw_ef_construction=settings.local_vector_store_hnsw_ef_construction,
+            hnsw_ef_search=settings.local_vector_store_hnsw_ef_search,
+        )
+    return _store
@@ -0,0 +1,662 @@
+"""Qdrant vector store backend.
+
+Implements the ``vector_store.VectorStore`` protocol at module level. All
+operations are async and share one ``AsyncQdrantClient`` (and its connection
+pool), so vector searches never block the event loop.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    Fusion,
+    FusionQuery,
+    HnswConfigDiff,
+    MatchValue,
+    Modifier,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    Prefetch,
+    SetPayload,
+    SetPayloadOperation,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams,
+)
+
+from app.config import settings
+from app.core.exceptions import VectorStoreError
+from app.services import sparse_encoder
+from app.services.collection_profiles import get_profile, search_params
+from app.services.vector_store import SearchResult, point_id
+
+logger = logging.getLogger(__name__)
+
+# Lazy-initialized client
+_client: AsyncQdrantClient | None = None
+
+# Bump when the collection schema (such as PAYLOAD_INDEXES) changes
+SCHEMA_VERSION = 1
+
+# Payload fields that are filtered on. Keyword indexes turn per-document deletes,
+# scrolls and metadata filters into index lookups instead of full scans.
+PAYLOAD_INDEXES = {
+    "document_id": PayloadSchemaType.KEYWORD,
+    "filename": PayloadSchemaType.KEYWORD,
+    "file_type": PayloadSchemaType.KEYWORD,
+}
+
+# Named sparse vector holding each chunk's BM25 term weights (see sparse_encoder)
+SPARSE_VECTOR = "bm25"
+
+# Set once the collection is known to exist with the current schema
+_collection_ready = False
+# Whether the collection has SPARSE_VECTOR (collections created before it was
+# introduced cannot gain it and are searched dense-only)
+_sparse_ready = False
+_bootstrap_lock = asyncio.Lock()
+
+# Collection metadata key recording the indexing threshold a bulk load turned off,
+# so that it can be restored even if the loading process dies
+SAVED_THRESHOLD_KEY = "bulk_load_indexing_threshold"
+
+# Bulk-load bookkeeping: nesting depth in this process and the threshold to restore
+_bulk_load_depth = 0
+_saved_indexing_threshold: int | None = None
+_bulk_load_lock = asyncio.Lock()
+
+
+def _get_client() -> AsyncQdrantClient:
+    """Get or create the async Qdrant client."""
+    global _client  # noqa: PLW0603
+    if _client is None:
+        _client = AsyncQdrantClient(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            timeout=settings.qdrant_timeout_seconds,
+        )
+    return _client
+
+
+async def close() -> None:
+    """Close the Qdrant client and its connections (called from the application lifespan)."""
+    global _client, _collection_ready, _sparse_ready  # noqa: PLW0603
+    client, _client = _client, None
+    _collection_ready = _sparse_ready = False
+    if client is not None:
+        await client.close()
+
+
+def _document_filter(document_id: str) -> Filter:
+    return _match_filter({"document_id": document_id})
+
+
+def _match_filter(conditions: dict[str, str]) -> Filter:
+    return Filter(
+        must=[
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in conditions.items()
+        ]
+    )
+
+
+async def ensure_collection() -> None:
+    """Make sure the collection exists with the current schema.
+
+    Runs ``bootstrap_collection`` once per process (at startup, from the application
+    lifespan and the worker); later calls return immediately without a round trip.
+    """
+    global _collection_ready  # noqa: PLW0603
+    if _collection_ready:
+        return
+    async with _bootstrap_lock:
+        if not _collection_ready:
+            await bootstrap_collection()
+            _collection_ready = True
+
+
+def embedding_collection_name() -> str:
+    """Return the physical collection for the configured embedding model and size.
+
+    ``settings.qdrant_collection_name`` is an alias for it (for example ``documents``
+    -> ``documents__text-embedding-3-small__512``), so vectors of different models
+    or sizes never share a collection and switching back is instant.
+    """
+    model = re.sub(r"[^a-z0-9-]+", "-", settings.openai_embedding_model.lower()).strip("-")
+    return f"{settings.qdrant_collection_name}__{model}__{settings.openai_embedding_dimensions}"
+
+
+async def _create_collection(client: AsyncQdrantClient, name: str) -> None:
+    profile = get_profile(settings.qdrant_collection_profile)
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(
+            size=settings.openai_embedding_dimensions,
+            distance=Distance.COSINE,
+            on_disk=settings.qdrant_vectors_on_disk,
+        ),
+        # IDF is computed by Qdrant over the live collection
+        sparse_vectors_config={SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)},
+        quantization_config=profile.quantization,
+        hnsw_config=HnswConfigDiff(on_disk=settings.qdrant_hnsw_on_disk),
+        on_disk_payload=settings.qdrant_payload_on_disk,
+    )
+    logger.info(
+        "Created Qdrant collection %s (dims=%d, profile=%s, vectors_on_disk=%s)",
+        name,
+        settings.openai_embedding_dimensions,
+        settings.qdrant_collection_profile,
+        settings.qdrant_vectors_on_disk,
+    )
+
+
+async def _resolve_collection(client: AsyncQdrantClient) -> str:
+    """Point the collection alias at ``embedding_collection_name``, creating it if needed.
+
+    A collection created before aliases were introduced (a real collection named
+    ``settings.qdrant_collection_name``) is kept and used in place.
+
+    Returns:
+        Name of the physical collection behind the alias.
+    """
+    alias = settings.qdrant_collection_name
+    target = embedding_collection_name()
+    response = await client.get_aliases()
+    current = next((a.collection_name for a in response.aliases if a.alias_name == alias), None)
+    if current is None and await client.collection_exists(alias):
+        return alias
+
+    if not await client.collection_exists(target):
+        await _create_collection(client, target)
+    if current != target:
+        operations: list[CreateAliasOperation | DeleteAliasOperation] = []
+        if current is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        operations.append(
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias))
+        )
+        # Applied atomically: searches never see the alias missing
+        await client.update_collection_aliases(change_aliases_operations=operations)
+        if current is not None:
+            logger.warning(
+                "Collection alias %s moved from %s to %s; documents embedded with the "
+                "previous model or size must be re-ingested to be searchable",
+                alias,
+                current,
+                target,
+            )
+    return target
+
+
+def _vector_size(info) -> int | None:
+    vectors = info.config.params.vectors
+    return vectors.size if isinstance(vectors, VectorParams) else None
+
+
+async def bootstrap_collection() -> None:
+    """Create the collection if needed and bring its schema up to date.
+
+    The alias ``settings.qdrant_collection_name`` is pointed at the collection for
+    the configured embedding model and size (see ``embedding_collection_name``),
+    whose vector size is validated. Missing payload indexes from
+    ``PAYLOAD_INDEXES`` are created on existing collections, and ``SCHEMA_VERSION``
+    is recorded in the collection metadata (Qdrant 1.16+; older servers are checked
+    by their payload schema alone). Indexing left off by a bulk load whose process
+    died is turned back on, unless the bulk-load lease is held.
+
+    Raises:
+        VectorStoreError: If the collection's vector size does not match
+            ``settings.openai_embedding_dimensions``.
+    """
+    global _sparse_ready  # noqa: PLW0603
+    client = _get_client()
+    name = await _resolve_collection(client)
+
+    info = await client.get_collection(name)
+    size = _vector_size(info)
+    if size != settings.openai_embedding_dimensions:
+        raise VectorStoreError(
+            f"Collection {name} stores {size}-dimensional vectors but embeddings are "
+            f"configured for {settings.openai_embedding_dimensions}; re-create it or set "
+            f"QDRANT_COLLECTION_NAME to a new name and re-ingest"
+        )
+    _sparse_ready = SPARSE_VECTOR in (info.config.params.sparse_vectors or {})
+    if not _sparse_ready and settings.hybrid_search_enabled:
+        logger.warning(
+            "Collection %s has no %s sparse vectors; hybrid search is disabled until it "
+            "is re-created",
+            name,
+            SPARSE_VECTOR,
+        )
+    version = (getattr(info.config, "metadata", None) or {}).get("schema_version", 0)
+    if version > SCHEMA_VERSION:
+        logger.warning(
+            "Collection %s has schema v%d, newer than this build's v%d",
+            name,
+            version,
+            SCHEMA_VERSION,
+        )
+
+    existing = info.payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field not in existing:
+            await client.create_payload_index(
+                collection_name=name,
+                field_name=field,
+                field_schema=schema,
+                wait=True,
+            )
+            logger.info("Created %s payload index on %s.%s", schema.value, name, field)
+
+    if version < SCHEMA_VERSION:
+        try:
+            await client.update_collection(name, metadata={"schema_version": SCHEMA_VERSION})
+        except Exception:
+            logger.debug("Could not record schema version on %s", name, exc_info=True)
+    if _indexing_threshold(info) == 0 and _bulk_load_depth == 0:
+        await _restore_abandoned_bulk_load(client, name, info)
+    logger.info("Qdrant collection %s ready (schema v%d)", name, SCHEMA_VERSION)
+
+
+def _indexing_threshold(info) -> int | None:
+    optimizer_config = getattr(info.config, "optimizer_config", None)
+    return getattr(optimizer_config, "indexing_threshold", None)
+
+
+def _threshold_to_restore(info) -> int:
+    """Return the indexing threshold to use once a bulk load is over."""
+    threshold = _indexing_threshold(info)
+    if threshold:
+        return threshold
+    saved = (getattr(info.config, "metadata", None) or {}).get(SAVED_THRESHOLD_KEY)
+    return saved or settings.qdrant_indexing_threshold_kb
+
+
+async def _restore_abandoned_bulk_load(client: AsyncQdrantClient, name: str, info) -> None:
+    """Turn indexing back on if the bulk load that turned it off is gone.
+
+    Only the holder of the bulk-load lease switches indexing off, so if nobody
+    holds it, the loader died before it could restore indexing.
+    """
+    from app.services import bulk_load_lease
+
+    try:
+        async with bulk_load_lease.hold() as held:
+            if not held:
+                logger.info("Bulk load in progress elsewhere; indexing on %s stays off", name)
+                return
+            threshold = _threshold_to_restore(info)
+            await client.update_collection(
+                collection_name=name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold),
+            )
+    except Exception:
+        logger.warning("Could not check for an interrupted bulk load on %s", name, exc_info=True)
+        return
+    logger.warning(
+        "Indexing on %s was left off by an interrupted bulk load; restored threshold to %s KB",
+        name,
+        threshold,
+    )
+
+
+def _build_points(
+    document_id: str, chunks: list[dict], embeddings: list[list[float]]
+) -> list[PointStruct]:
+    points = []
+    for chunk, embedding in zip(chunks, embeddings, strict=True):
+        vector: list[float] | dict = embedding
+        if _sparse_ready:
+            indices, values = sparse_encoder.encode_document(chunk["text"])
+            vector = {"": embedding, SPARSE_VECTOR: SparseVector(indices=indices, values=values)}
+        points.append(
+            PointStruct(
+                id=chunk.get("id") or point_id(document_id, chunk["text"]),
+                vector=vector,
+                payload={
+                    "text": chunk["text"],
+                    "document_id": document_id,
+                    "filename": chunk["metadata"].get("filename", ""),
+                    "chunk_index": chunk["chunk_index"],
+                    "total_chunks": chunk["metadata"].get("total_chunks", 0),
+                    "token_count": chunk["metadata"].get("token_count", 0),
+                },
+            )
+        )
+    return points
+
+
+async def upsert_chunks(
+    document_id: str,
+    chunks: list[dict],
+    embeddings: list[list[float]],
+    wait: bool = True,
+) -> int:
+    """Upsert document chunks with their embeddings into Qdrant.
+
+    Points are sent in batches of ``settings.qdrant_upsert_batch_size``, up to
+    ``settings.qdrant_upsert_parallelism`` at a time, without waiting for Qdrant to
+    apply each one (``wait=False`` returns once the update is in its WAL). Qdrant
+    applies updates in order, so the last batch, sent with ``wait=True`` after the
+    others are acknowledged, acts as a barrier for all of them.
+
+    Args:
+        document_id: UUID of the parent document.
+        chunks: List of dicts with 'text', 'chunk_index', 'metadata' keys, and
+            optionally the point 'id' (defaults to ``point_id(document_id, text)``).
+        embeddings: Corresponding embedding vectors.
+        wait: Wait until the points are applied (searchable) before returning. Pass
+            False when a later waited operation will serve as the barrier.
+
+    Returns:
+        Number of points upserted.
+    """
+    client = _get_client()
+    # Building points (and BM25 encoding) is CPU work; keep it off the event loop
+    points = await asyncio.to_thread(_build_points, document_id, chunks, embeddings)
+
+    batch_size = max(settings.qdrant_upsert_batch_size, 1)
+    batches = [points[i : i + batch_size] for i in range(0, len(points), batch_size)]
+    semaphore = asyncio.Semaphore(max(settings.qdrant_upsert_parallelism, 1))
+
+    async def send(batch: list[PointStruct], wait_for_batch: bool) -> None:
+        async with semaphore:
+            await client.upsert(
+                collection_name=settings.qdrant_collection_name,
+                points=batch,
+                wait=wait_for_batch,
+            )
+
+    tasks = [asyncio.ensure_future(send(batch, False)) for batch in batches[:-1]]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    if batches:
+        await send(batches[-1], wait)
+
+    logger.info(
+        "Upserted %d chunks for document %s into Qdrant",
+        len(points),
+        document_id,
+    )
+    return len(points)
+
+
+async def set_document_payload(document_id: str, payload: dict) -> None:
+    """Set payload fields on every point of a document.
+
+    Used to backfill values only known once a document has been fully streamed in,
+    such as ``total_chunks``.
+
+    Args:
+        document_id: UUID of the document.
+        payload: Payload fields to set.
+    """
+    client = _get_client()
+
+    # Waited: also serves as the barrier for preceding unwaited upserts
+    await client.set_payload(
+        collection_name=settings.qdrant_collection_name,
+        payload=payload,
+        points=_document_filter(document_id),
+        wait=True,
+    )
+
+
+async def get_document_points(document_id: str) -> dict[str, int]:
+    """Return the stored points of a document.
+
+    Returns:
+        Mapping of point ID to ``chunk_index``.
+    """
+    client = _get_client()
+    points: dict[str, int] = {}
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=settings.qdrant_collection_name,
+            scroll_filter=_document_filter(document_id),
+            limit=1000,
+            offset=offset,
+            with_payload=["chunk_index"],
+            with_vectors=False,
+        )
+        points.update((str(r.id), r.payload.get("chunk_index", 0)) for r in records)
+        if offset is None:
+            return points
+
+
+async def delete_points(point_ids: list[str]) -> None:
+    """Delete points by ID (not waited on; follow with a waited operation)."""
+    client = _get_client()
+    for i in range(0, len(point_ids), 1000):
+        await client.delete(
+            collection_name=settings.qdrant_collection_name,
+            points_selector=PointIdsList(points=point_ids[i : i + 1000]),
+            wait=False,
+        )
+
+
+async def set_chunk_indexes(chunk_indexes: dict[str, int]) -> None:
+    """Update the ``chunk_index`` payload of existing points without re-uploading them.
+
+    Not waited on; follow with a waited operation.
+
+    Args:
+        chunk_indexes: Mapping of point ID to its new chunk index.
+    """
+    client = _get_client()
+    operations = [
+        SetPayloadOperation(set_payload=SetPayload(payload={"chunk_index": index}, points=[pid]))
+        for pid, index in chunk_indexes.items()
+    ]
+    for i in range(0, len(operations), 500):
+        await client.batch_update_points(
+            collection_name=settings.qdrant_collection_name,
+            update_operations=operations[i : i + 500],
+            wait=False,
+        )
+
+
+async def begin_bulk_load() -> None:
+    """Turn off HNSW indexing on the collection for a large import.
+
+    Points written while indexing is off are stored unindexed (cheap appends);
+    ``end_bulk_load`` restores the threshold and the optimizer then builds the index
+    once. Calls nest within a process; only the outermost pair touches the collection.
+
+    The setting is collection-wide: callers must hold ``bulk_load_lease``. The
+    threshold being replaced is recorded in the collection metadata, so a node
+    restarting after the loader died restores it (see ``bootstrap_collection``).
+    """
+    global _bulk_load_depth, _saved_indexing_threshold  # noqa: PLW0603
+    async with _bulk_load_lock:
+        if _bulk_load_depth > 0:
+            _bulk_load_depth += 1
+            return
+
+        client = _get_client()
+        info = await client.get_collection(settings.qdrant_collection_name)
+        # 0 means an earlier bulk load died; restore what it recorded instead
+        saved = _threshold_to_restore(info)
+        if _indexing_threshold(info):
+            try:
+                await client.update_collection(
+                    collection_name=settings.qdrant_collection_name,
+                    metadata={SAVED_THRESHOLD_KEY: saved},
+                )
+            except Exception:
+                logger.debug("Could not record the indexing threshold", exc_info=True)
+        await client.update_collection(
+            collection_name=settings.qdrant_collection_name,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+        )
+        # Counted only once indexing is off, so a failed call can simply be retried
+        _saved_indexing_threshold = saved
+        _bulk_load_depth = 1
+    logger.info("Bulk load started: indexing disabled on %s", settings.qdrant_collection_name)
+
+
+async def end_bulk_load() -> None:
+    """Restore indexing after ``begin_bulk_load``."""
+    global _bulk_load_depth  # noqa: PLW0603
+    async with _bulk_load_lock:
+        if _bulk_load_depth == 0:
+            return
+        if _bulk_load_depth > 1:
+            _bulk_load_depth -= 1
+            return
+
+        client = _get_client()
+        await client.update_collection(
+            collection_name=settings.qdrant_collection_name,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=_saved_indexing_threshold),
+        )
+        _bulk_load_depth = 0
+    logger.info(
+        "Bulk load finished: indexing threshold on %s restored to %s KB",
+        settings.qdrant_collection_name,
+        _saved_indexing_threshold,
+    )
+
+
+async def search(
+    query_embedding: list[float],
+    top_k: int = 5,
+    filters: dict[str, str] | None = None,
+    query_text: str | None = None,
+    with_vectors: bool = False,
+    hnsw_ef: int | None = None,
+    rescore: bool | None = None,
+    oversampling: float | None = None,
+) -> list[SearchResult]:
+    """Search for similar chunks in Qdrant.
+
+    Search params default to the configured collection profile (see
+    ``collection_profiles``) and ``settings.qdrant_search_hnsw_ef``. With
+    ``query_text`` (and hybrid search enabled), the dense and BM25 sparse searches
+    run as prefetches of a single request and Qdrant merges them with
+    reciprocal-rank fusion.
+
+    Args:
+        query_embedding: Query vector.
+        top_k: Number of results to return.
+        filters: Exact-match payload conditions (indexed fields are fastest).
+        query_text: Query text for the lexical half of a hybrid search.
+        with_vectors: Also return each hit's dense embedding.
+        hnsw_ef: HNSW beam width; higher is more accurate and slower.
+        rescore: Re-rank quantized candidates with the original vectors.
+        oversampling: Quantized candidates fetched per result before rescoring.
+
+    Returns:
+        List of SearchResult objects ordered by relevance.
+    """
+    client = _get_client()
+    query_filter = _match_filter(filters) if filters else None
+    params = search_params(
+        get_profile(settings.qdrant_collection_profile),
+        hnsw_ef=hnsw_ef if hnsw_ef is not None else settings.qdrant_search_hnsw_ef,
+        rescore=rescore,
+        oversampling=oversampling,
+    )
+
+    indices: list[int] = []
+    fused = False
+    if query_text and settings.hybrid_search_enabled:
+        indices, values = sparse_encoder.encode_query(query_text)
+        await ensure_collection()  # learn whether the collection has sparse vectors
+    if indices and _sparse_ready:
+        fused = True
+        limit = max(settings.hybrid_prefetch_limit, top_k)
+        response = await client.query_points(
+            collection_name=settings.qdrant_collection_name,
+            prefetch=[
+                Prefetch(query=query_embedding, filter=query_filter, params=params, limit=limit),
+                Prefetch(
+                    query=SparseVector(indices=indices, values=values),
+                    using=SPARSE_VECTOR,
+                    filter=query_filter,
+                    limit=limit,
+                ),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=top_k,
+            with_vectors=with_vectors,
+        )
+    else:
+        response = await client.query_points(
+            collection_name=settings.qdrant_collection_name,
+            query=query_embedding,
+            query_filter=query_filter,
+            limit=top_k,
+            search_params=params,
+            with_vectors=with_vectors,
+        )
+
+    results = []
+    for hit in response.points:
+        vector = _dense_vector(hit.vector)
+        results.append(
+            SearchResult(
+                text=hit.payload.get("text", ""),
+                score=hit.score,
+                document_id=hit.payload.get("document_id", ""),
+                filename=hit.payload.get("filename", ""),
+                chunk_index=hit.payload.get("chunk_index", 0),
+                id=str(hit.id),
+                token_count=hit.payload.get("token_count", 0),
+                vector=vector,
+                dense_score=_cosine(query_embedding, vector) if fused else hit.score,
+            )
+        )
+    return results
+
+
+def _cosine(query: list[float], vector: list[float] | None) -> float | None:
+    """Cosine similarity of a fused hit to the query (RRF scores do not carry it)."""
+    if vector is None:
+        return None
+    a = np.asarray(query, dtype=np.float32)
+    b = np.asarray(vector, dtype=np.float32)
+    norms = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norms if norms else 0.0
+
+
+def _dense_vector(vector: Any) -> list[float] | None:
+    """Return the dense vector of a point (collections with sparse vectors name it "")."""
+    if isinstance(vector, dict):
+        return vector.get("")
+    return vector
+
+
+async def delete_by_document(document_id: str) -> None:
+    """Delete all vectors belonging to a specific document.
+
+    Args:
+        document_id: UUID of the document whose vectors should be deleted.
+    """
+    client = _get_client()
+
+    await client.delete(
+        collection_name=settings.qdrant_collection_name,
+        points_selector=_document_filter(document_id),
+    )
+    logger.info("Deleted vectors for document %s from Qdrant", document_id)
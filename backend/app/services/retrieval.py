@@ -0,0 +1,153 @@
+"""Post-retrieval selection of the chunks passed to the LLM.
+
+A plain top-k search often returns near-duplicates (overlapping chunks of the
+same passage) and pads the prompt with weak hits. ``retrieve`` over-fetches
+candidates with their embeddings, cuts the ranking where relevance drops off,
+then picks the final chunks with maximal marginal relevance (MMR), trading
+relevance against similarity to the chunks already picked.
+
+Relevance is each hit's cosine similarity to the query relative to the best
+one. Hybrid searches are ordered by their fused reciprocal-rank scores, which
+only encode rank, so relevance uses the hits' dense cosine scores instead: the
+cutoff drops hits that are semantically far from the query (keeping the fused
+order of the rest) and MMR weighs real similarities.
+"""
+
+import logging
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import retrieval_results
+from app.services import embedding_service, vector_store
+from app.services.vector_store import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+def relative_scores(scores: list[float]) -> np.ndarray:
+    """Scale scores so that the best one is 1."""
+    values = np.asarray(scores, dtype=np.float64)
+    if not len(values) or values.max() <= 0:
+        return np.ones_like(values)
+    return values / values.max()
+
+
+def adaptive_cutoff(
+    relevance: np.ndarray, min_relative_score: float, max_score_gap: float | None
+) -> int:
+    """Return how many leading hits to keep.
+
+    Hits are kept while their relevance is at least ``min_relative_score`` and,
+    if ``max_score_gap`` is set, until the first drop between consecutive hits
+    larger than it. The best hit is always kept.
+
+    Args:
+        relevance: Relative scores, sorted best first (see ``relative_scores``).
+        min_relative_score: Minimum relevance of a kept hit.
+        max_score_gap: Largest allowed relevance drop between neighbours.
+    """
+    if not len(relevance):
+        return 0
+    keep = max(int(np.sum(relevance >= min_relative_score)), 1)
+    if max_score_gap is not None:
+        gaps = np.flatnonzero(-np.diff(relevance[:keep]) > max_score_gap)
+        if len(gaps):
+            keep = int(gaps[0]) + 1
+    return keep
+
+
+def mmr(vectors: np.ndarray, relevance: np.ndarray, k: int, lambda_: float) -> list[int]:
+    """Select ``k`` rows by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    ``lambda_ * relevance - (1 - lambda_) * max cosine similarity to the picks``.
+
+    Args:
+        vectors: Candidate embeddings, one per row.
+        relevance: Relevance of each candidate.
+        k: Number of candidates to select.
+        lambda_: Relevance weight; 1.0 reproduces the relevance order.
+
+    Returns:
+        Row indices in selection order.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    similarity = unit @ unit.T
+    redundancy = np.full(len(vectors), -np.inf)
+    available = np.ones(len(vectors), dtype=bool)
+    selected: list[int] = []
+    for _ in range(min(k, len(vectors))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        gain = np.where(available, lambda_ * relevance - (1 - lambda_) * penalty, -np.inf)
+        pick = int(np.argmax(gain))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+    return selected
+
+
+def _dense_score(hit: SearchResult) -> float:
+    return hit.score if hit.dense_score is None else hit.dense_score
+
+
+async def retrieve(
+    query: str,
+    top_k: int | None = None,
+    mmr_lambda: float | None = None,
+    min_relative_score: float | None = None,
+    max_score_gap: float | None = None,
+    filters: dict[str, str] | None = None,
+    query_vector: list[float] | None = None,
+) -> list[SearchResult]:
+    """Search for the chunks to answer a query with.
+
+    Unset arguments default to the ``retrieval_*`` and ``mmr_lambda`` settings.
+
+    Args:
+        query: The user's question.
+        top_k: Maximum number of chunks to return.
+        mmr_lambda: Relevance weight for MMR; 1.0 disables diversification.
+        min_relative_score: Drop hits scoring below this fraction of the best.
+        max_score_gap: Stop at the first relative score drop larger than this.
+        filters: Exact-match conditions on ``vector_store.FILTER_FIELDS``.
+        query_vector: Embedding of the query, if the caller already has it.
+
+    Returns:
+        Up to ``top_k`` results, in selection order.
+    """
+    top_k = top_k or settings.retrieval_top_k
+    mmr_lambda = settings.mmr_lambda if mmr_lambda is None else mmr_lambda
+    if min_relative_score is None:
+        min_relative_score = settings.retrieval_min_relative_score
+    if max_score_gap is None:
+        max_score_gap = settings.retrieval_max_score_gap
+
+    if query_vector is None:
+        query_vector = await embedding_service.embed_query(query)
+    diversify = mmr_lambda < 1
+    candidates = await vector_store.search(
+        query_vector,
+        top_k=max(settings.retrieval_candidates, top_k),
+        filters=filters,
+        query_text=query,
+        # Fused hits only get a dense score from Qdrant along with their vectors
+        with_vectors=diversify or settings.hybrid_search_enabled,
+    )
+
+    fetched = len(candidates)
+    relevance = relative_scores([_dense_score(hit) for hit in candidates])
+    # Fused hits are not in cosine order: cut on the sorted scores, keep search order
+    order = np.argsort(-relevance, kind="stable")
+    kept = np.sort(order[: adaptive_cutoff(relevance[order], min_relative_score, max_score_gap)])
+    candidates, relevance = [candidates[i] for i in kept], relevance[kept]
+    if diversify and len(candidates) > 1 and all(hit.vector for hit in candidates):
+        vectors = np.asarray([hit.vector for hit in candidates], dtype=np.float32)
+        results = [candidates[i] for i in mmr(vectors, relevance, top_k, mmr_lambda)]
+    else:
+        results = candidates[:top_k]
+
+    retrieval_results.observe(len(results))
+    logger.debug("Kept %d of %d candidates for %r", len(results), fetched, query)
+    return results
@@ -0,0 +1,78 @@
+"""BM25 sparse vectors for lexical retrieval.
+
+Dense embeddings blur exact tokens such as part numbers, identifiers and
+acronyms; a BM25 sparse vector per chunk lets hybrid search match them
+literally. Document vectors carry the BM25 term-frequency component
+(saturated by ``k1`` and length-normalized by ``b``); query vectors weight each
+term 1. The IDF component is applied by Qdrant at query time (``Modifier.IDF``
+on the sparse vector), so it always reflects the live collection.
+
+Terms are mapped to sparse indices with CRC32, so no vocabulary has to be
+stored or shared between processes.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+from app.config import settings
+
+# Words, numbers and compound identifiers such as "x-200", "v1.2.3" or "order_id"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+COMPOUND_SEPARATORS = re.compile(r"[-_./]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to "  # noqa: SIM905
+    "was were what when where which who will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase and split text into terms.
+
+    Compound identifiers are kept whole and also contribute their parts, so
+    "XJ-900" matches both "xj-900" and "xj 900".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if COMPOUND_SEPARATORS.search(token):
+            terms.append(token)
+            terms.extend(COMPOUND_SEPARATORS.split(token))
+        elif token not in STOPWORDS:
+            terms.append(token)
+    return terms
+
+
+def term_index(term: str) -> int:
+    """Return the sparse vector index of a term."""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def _to_sparse(weights: dict[int, float]) -> tuple[list[int], list[float]]:
+    indices = sorted(weights)
+    return indices, [weights[i] for i in indices]
+
+
+def encode_document(text: str) -> tuple[list[int], list[float]]:
+    """Encode a chunk as BM25 term-frequency weights.
+
+    Returns:
+        Sparse vector as ``(indices, values)``.
+    """
+    terms = tokenize(text)
+    k1, b = settings.bm25_k1, settings.bm25_b
+    length_norm = 1 - b + b * len(terms) / settings.bm25_avg_chunk_terms
+    weights: dict[int, float] = {}
+    for term, tf in Counter(terms).items():
+        index = term_index(term)
+        weights[index] = weights.get(index, 0.0) + tf * (k1 + 1) / (tf + k1 * length_norm)
+    return _to_sparse(weights)
+
+
+def encode_query(text: str) -> tuple[list[int], list[float]]:
+    """Encode a query as a binary term vector.
+
+    Returns:
+        Sparse vector as ``(indices, values)``; empty if the query has no terms.
+    """
+    return _to_sparse({term_index(term): 1.0 for term in tokenize(text)})
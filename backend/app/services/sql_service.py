@@ -3,14 +3,15 @@
 import logging
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.prompts.text_to_sql import text_to_sql_prompt
+from app.agents.prompts.text_to_sql import SYSTEM_PROMPT, text_to_sql_prompt
 from app.agents.tools.sql_db import NorthwindDatabase
 from app.api.v1.schemas.chat import MessageResponse
 from app.config import settings
-from app.services import history_service
+from app.core.exceptions import SQLQueryError
+from app.services import history_service, llm_cache
+from app.services.llm_clients import get_chat_model
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,74 @@ def get_northwind_db() -> NorthwindDatabase:
     return _northwind_db
 
 
+async def generate_sql(schema: str, question: str) -> str:
+    """Generate a SQL query answering a question over the given schema.
+
+    Generation is deterministic (temperature 0), so results are cached by
+    question and schema fingerprint in ``llm_cache``.
+
+    Args:
+        schema: Table definitions shown to the model.
+        question: The user's question.
+
+    Returns:
+        The SQL query, without markdown fences.
+    """
+
+    async def generate() -> str:
+        chain = text_to_sql_prompt | get_chat_model(temperature=0) | StrOutputParser()
+        generated_sql = await chain.ainvoke({"schema": schema, "question": question})
+        return generated_sql.replace("```sql", "").replace("```", "").strip()
+
+    key = llm_cache.cache_key(
+        "text_to_sql",
+        SYSTEM_PROMPT,
+        settings.openai_chat_model,
+        question=question,
+        schema=llm_cache.fingerprint(schema),
+    )
+    return await llm_cache.cached_call(key, generate)
+
+
+async def answer_sql_question(question: str) -> tuple[str, dict]:
+    """Generate and run a SQL query for a question over Northwind.
+
+    Errors from the query itself (blocked, failed, timed out) are reported in the
+    answer; other errors (schema introspection, SQL generation) propagate.
+
+    Args:
+        question: The user's question.
+
+    Returns:
+        The answer text and the metadata to store with it.
+    """
+    nw_db = get_northwind_db()
+    # All table schemas are shown to the model (introspected once per process)
+    schema_str = await nw_db.schema()
+
+    generated_sql = await generate_sql(schema_str, question)
+    logger.info("Generated SQL: %s", generated_sql)
+    metadata = {"query": generated_sql, "context_source": "northwind_db"}
+
+    try:
+        result = await nw_db.execute(generated_sql)
+    except SQLQueryError as e:
+        metadata["error"] = e.message
+        return f"Executed Query: {generated_sql}\n\nResult:\nError: {e.message}", metadata
+
+    # Future: Use LLM to rephrase result naturalistically.
+    metadata.update(columns=result.columns, row_count=len(result.rows), truncated=result.truncated)
+    return f"Executed Query: {generated_sql}\n\nResult:\n{result.to_text()}", metadata
+
+
+async def close_northwind_db() -> None:
+    """Close the Northwind connection pools (called from the application lifespan)."""
+    global _northwind_db
+    nw_db, _northwind_db = _northwind_db, None
+    if nw_db is not None:
+        await nw_db.close()
+
+
 async def process_sql_question(
     session_id: str | None,
     user_message: str,
@@ -36,12 +105,9 @@ async def process_sql_question(
 
     Flow:
     1. Save user message.
-    2. Get SQL schema.
-    3. Generate SQL using LLM.
-    4. Validate and Execute SQL.
-    5. Synthesize answer (optional, or return raw result for now).
-       (For Phase 4, we'll return the result description as the answer).
-    6. Save assistant answer.
+    2. Get SQL schema, generate SQL using LLM, validate and execute it
+       (see ``answer_sql_question``).
+    3. Save assistant answer.
 
     Args:
         session_id: Client-provided session ID.
@@ -60,45 +126,16 @@ async def process_sql_question(
         db=db,
     )
 
-    # 2. Get DB & Schema
-    nw_db = get_northwind_db()
-    # For Phase 4, we just dump all table schemas.
-    # In a real app, we might check which tables are relevant first.
-    tables = nw_db.list_tables()
-    schema_str = nw_db.get_schema(tables) if tables else "No tables found."
-
-    # 3. Generate SQL
-    llm = ChatOpenAI(
-        model=settings.openai_chat_model,
-        api_key=settings.openai_api_key,
-        temperature=0,
-    )
-    chain = text_to_sql_prompt | llm | StrOutputParser()
-
     try:
-        generated_sql = await chain.ainvoke({"schema": schema_str, "question": user_message})
-        generated_sql = generated_sql.replace("```sql", "").replace("```", "").strip()
-        logger.info("Generated SQL: %s", generated_sql)
-
-        # 4. Execute SQL
-        result_str = nw_db.run_query(generated_sql)
-
-        # 5. Synthesize Answer
-        # We'll just format the result nicely for now.
-        # Future: Use LLM to rephrase result naturalistically.
-        answer = f"Executed Query: {generated_sql}\n\nResult:\n{result_str}"
-
-        metadata = {
-            "query": generated_sql,
-            "context_source": "northwind_db",
-        }
+        # 2. Generate and execute SQL
+        answer, metadata = await answer_sql_question(user_message)
 
     except Exception as e:
         logger.exception("Text-to-SQL failed")
         answer = f"I encountered an error trying to query the database: {e}"
         metadata = {"error": str(e)}
 
-    # 6. Save Assistant Message
+    # 3. Save Assistant Message
     saved_msg = await history_service.add_message(
         session_id=session.id,
         role="assistant",
@@ -1,161 +1,271 @@
-"""Qdrant vector store wrapper for document storage and retrieval."""
+"""Vector store for document chunks, with pluggable backends.
 
-import logging
+``settings.vector_store_backend`` selects the implementation:
+
+- ``qdrant`` (default): a Qdrant server (``qdrant_store``).
+- ``local``: an in-process store persisted to a local directory
+  (``local_vector_store``), for small deployments, CI and benchmarking without
+  a Qdrant container.
+
+The rest of the application uses the module-level functions below, which
+delegate to the configured backend.
+"""
+
+import hashlib
 import uuid
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from typing import Any, Protocol
 
 from app.config import settings
 
-logger = logging.getLogger(__name__)
+# Namespace for deterministic point IDs (see point_id); never change it, or every
+# stored point stops matching its chunk
+POINT_ID_NAMESPACE = uuid.UUID("5b0d4c1e-7f3a-4c8e-9d2b-6a1f0e3c8b47")
 
-# Lazy-initialized client
-_client: QdrantClient | None = None
+# Payload fields that searches can filter on (exact match)
+FILTER_FIELDS = ("document_id", "filename", "file_type")
 
-# text-embedding-3-small produces 1536-dimensional vectors
-VECTOR_DIMENSION = 1536
+# Reciprocal-rank fusion smoothing constant (the value from the original paper)
+RRF_K = 60
 
 
 @dataclass
 class SearchResult:
-    """A single vector search result."""
+    """A single vector search result.
+
+    ``score`` is the cosine similarity for dense searches and the fused
+    reciprocal-rank score for hybrid ones. ``dense_score`` is always the cosine
+    similarity to the query (equal to ``score`` for dense searches), or None if
+    the backend cannot tell for a hybrid search without ``with_vectors``. ``id``
+    is the point ID. ``token_count`` is counted at ingestion (0 for chunks stored
+    before counts were recorded). ``vector`` (the chunk's dense embedding) is only
+    set for searches with ``with_vectors=True``.
+    """
 
     text: str
     score: float
     document_id: str
     filename: str
     chunk_index: int
+    id: str = ""
+    token_count: int = 0
+    vector: list[float] | None = None
+    dense_score: float | None = None
+
+
+class VectorStore(Protocol):
+    """Operations every vector store backend provides.
+
+    Writes may return before they are applied when ``wait`` is False; the next
+    waited write (``set_document_payload``, or ``upsert_chunks`` with
+    ``wait=True``) is a barrier for all earlier ones.
+    """
+
+    async def ensure_collection(self) -> None: ...
+
+    async def upsert_chunks(
+        self,
+        document_id: str,
+        chunks: list[dict],
+        embeddings: list[list[float]],
+        wait: bool = True,
+    ) -> int: ...
+
+    async def set_document_payload(self, document_id: str, payload: dict) -> None: ...
+
+    async def get_document_points(self, document_id: str) -> dict[str, int]: ...
+
+    async def delete_points(self, point_ids: list[str]) -> None: ...
+
+    async def set_chunk_indexes(self, chunk_indexes: dict[str, int]) -> None: ...
+
+    async def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        filters: dict[str, str] | None = None,
+        query_text: str | None = None,
+        with_vectors: bool = False,
+        **params: Any,
+    ) -> list[SearchResult]: ...
 
+    async def delete_by_document(self, document_id: str) -> None: ...
 
-def _get_client() -> QdrantClient:
-    """Get or create the Qdrant client."""
-    global _client  # noqa: PLW0603
-    if _client is None:
-        _client = QdrantClient(
-            host=settings.qdrant_host,
-            port=settings.qdrant_port,
-        )
-    return _client
-
-
-def ensure_collection() -> None:
-    """Create the Qdrant collection if it does not exist."""
-    client = _get_client()
-    collections = [c.name for c in client.get_collections().collections]
-
-    if settings.qdrant_collection_name not in collections:
-        client.create_collection(
-            collection_name=settings.qdrant_collection_name,
-            vectors_config=VectorParams(
-                size=VECTOR_DIMENSION,
-                distance=Distance.COSINE,
-            ),
-        )
-        logger.info("Created Qdrant collection: %s", settings.qdrant_collection_name)
-    else:
-        logger.info("Qdrant collection already exists: %s", settings.qdrant_collection_name)
-
-
-def upsert_chunks(
+    async def begin_bulk_load(self) -> None: ...
+
+    async def end_bulk_load(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+def get_store() -> VectorStore:
+    """Return the configured backend.
+
+    The Qdrant backend is implemented at module level by ``qdrant_store``.
+    """
+    if settings.vector_store_backend == "local":
+        from app.services import local_vector_store
+
+        return local_vector_store.get_store()
+
+    from app.services import qdrant_store
+
+    return qdrant_store
+
+
+def chunk_digest(text: str) -> bytes:
+    """Return the SHA-256 digest of a chunk's text (the content part of its point ID)."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def point_id(document_id: str, text: str, occurrence: int = 0, digest: bytes | None = None) -> str:
+    """Return the deterministic point ID of a chunk.
+
+    The ID depends only on the document and the chunk's content (plus which
+    repetition of that content it is), so re-ingesting a document maps unchanged
+    chunks onto their existing points.
+
+    Args:
+        document_id: UUID of the parent document.
+        text: Chunk text.
+        occurrence: 0 for the first chunk with this text in the document, 1 for the
+            second, and so on.
+        digest: ``chunk_digest(text)``, if the caller already computed it.
+    """
+    content_hash = (digest or chunk_digest(text)).hex()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_id}:{content_hash}:{occurrence}"))
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Hashable]], k: int = RRF_K
+) -> list[tuple[Hashable, float]]:
+    """Merge ranked lists by summing ``1 / (k + rank)`` over the lists for each item.
+
+    Args:
+        rankings: Ranked lists of item keys, best first.
+        k: Smoothing constant; larger values flatten the rank weights.
+
+    Returns:
+        ``(item, fused score)`` pairs, best first.
+    """
+    scores: dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: -pair[1])
+
+
+async def ensure_collection() -> None:
+    """Make sure the backing collection exists and matches the configuration."""
+    await get_store().ensure_collection()
+
+
+async def upsert_chunks(
     document_id: str,
     chunks: list[dict],
     embeddings: list[list[float]],
+    wait: bool = True,
 ) -> int:
-    """Upsert document chunks with their embeddings into Qdrant.
+    """Upsert document chunks with their embeddings.
 
     Args:
         document_id: UUID of the parent document.
-        chunks: List of dicts with 'text', 'chunk_index', 'metadata' keys.
+        chunks: List of dicts with 'text', 'chunk_index', 'metadata' keys, and
+            optionally the point 'id' (defaults to ``point_id(document_id, text)``).
         embeddings: Corresponding embedding vectors.
+        wait: Wait until the points are searchable before returning. Pass False
+            when a later waited operation will serve as the barrier.
 
     Returns:
         Number of points upserted.
     """
-    client = _get_client()
-
-    points = [
-        PointStruct(
-            id=str(uuid.uuid4()),
-            vector=embedding,
-            payload={
-                "text": chunk["text"],
-                "document_id": document_id,
-                "filename": chunk["metadata"].get("filename", ""),
-                "chunk_index": chunk["chunk_index"],
-                "total_chunks": chunk["metadata"].get("total_chunks", 0),
-            },
-        )
-        for chunk, embedding in zip(chunks, embeddings, strict=True)
-    ]
-
-    # Qdrant supports batch upsert — send in batches of 100
-    batch_size = 100
-    for i in range(0, len(points), batch_size):
-        batch = points[i : i + batch_size]
-        client.upsert(
-            collection_name=settings.qdrant_collection_name,
-            points=batch,
-        )
-
-    logger.info(
-        "Upserted %d chunks for document %s into Qdrant",
-        len(points),
-        document_id,
-    )
-    return len(points)
+    return await get_store().upsert_chunks(document_id, chunks, embeddings, wait=wait)
+
+
+async def set_document_payload(document_id: str, payload: dict) -> None:
+    """Set payload fields on every point of a document (waited)."""
+    await get_store().set_document_payload(document_id, payload)
 
 
-def search(query_embedding: list[float], top_k: int = 5) -> list[SearchResult]:
-    """Search for similar chunks in Qdrant.
+async def get_document_points(document_id: str) -> dict[str, int]:
+    """Return a mapping of point ID to ``chunk_index`` for a document's points."""
+    return await get_store().get_document_points(document_id)
+
+
+async def delete_points(point_ids: list[str]) -> None:
+    """Delete points by ID (not waited on; follow with a waited operation)."""
+    await get_store().delete_points(point_ids)
+
+
+async def set_chunk_indexes(chunk_indexes: dict[str, int]) -> None:
+    """Update the ``chunk_index`` of existing points (not waited on)."""
+    await get_store().set_chunk_indexes(chunk_indexes)
+
+
+async def search(
+    query_embedding: list[float],
+    top_k: int = 5,
+    filters: dict[str, str] | None = None,
+    query_text: str | None = None,
+    with_vectors: bool = False,
+    **params: Any,
+) -> list[SearchResult]:
+    """Search for similar chunks.
 
     Args:
         query_embedding: Query vector.
         top_k: Number of results to return.
+        filters: Exact-match conditions on ``FILTER_FIELDS``.
+        query_text: Query text for hybrid search: lexical (BM25) matches are fused
+            with the dense ones when ``settings.hybrid_search_enabled`` is set.
+        with_vectors: Also return each hit's dense embedding.
+        **params: Backend-specific tuning, such as ``hnsw_ef``.
 
     Returns:
         List of SearchResult objects ordered by relevance.
     """
-    client = _get_client()
+    return await get_store().search(
+        query_embedding,
+        top_k=top_k,
+        filters=filters,
+        query_text=query_text,
+        with_vectors=with_vectors,
+        **params,
+    )
 
-    results = client.query_points(
-        collection_name=settings.qdrant_collection_name,
-        query=query_embedding,
-        limit=top_k,
-    ).points
 
-    return [
-        SearchResult(
-            text=hit.payload.get("text", ""),
-            score=hit.score,
-            document_id=hit.payload.get("document_id", ""),
-            filename=hit.payload.get("filename", ""),
-            chunk_index=hit.payload.get("chunk_index", 0),
-        )
-        for hit in results
-    ]
+async def delete_by_document(document_id: str) -> None:
+    """Delete all vectors belonging to a specific document."""
+    await get_store().delete_by_document(document_id)
 
 
-def delete_by_document(document_id: str) -> None:
-    """Delete all vectors belonging to a specific document.
+async def begin_bulk_load() -> None:
+    """Defer index maintenance for a large import (see ``bulk_load``)."""
+    await get_store().begin_bulk_load()
 
-    Args:
-        document_id: UUID of the document whose vectors should be deleted.
+
+async def end_bulk_load() -> None:
+    """Restore index maintenance after ``begin_bulk_load``."""
+    await get_store().end_bulk_load()
+
+
+@asynccontextmanager
+async def bulk_load() -> AsyncIterator[None]:
+    """Run a block with index maintenance deferred until it ends.
+
+    Usage:
+        async with vector_store.bulk_load():
+            for doc in documents: ...
     """
-    from qdrant_client.models import FieldCondition, Filter, MatchValue
-
-    client = _get_client()
-
-    client.delete(
-        collection_name=settings.qdrant_collection_name,
-        points_selector=Filter(
-            must=[
-                FieldCondition(
-                    key="document_id",
-                    match=MatchValue(value=document_id),
-                )
-            ]
-        ),
-    )
-    logger.info("Deleted vectors for document %s from Qdrant", document_id)
+    await begin_bulk_load()
+    try:
+        yield
+    finally:
+        await end_bulk_load()
+
+
+async def close() -> None:
+    """Release the backend's resources (called from the application lifespan)."""
+    await get_store().close()
@@ -0,0 +1,265 @@
+"""Background ingestion workers.
+
+The pool runs inside the API process (see ``settings.ingestion_workers_in_api``)
+or standalone:
+
+    python -m app.worker
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+import uuid
+from pathlib import Path
+
+from app.config import settings
+from app.core.exceptions import DocumentProcessingError, VectorStoreError
+from app.core.logging import setup_logging
+from app.db.models import Document, IngestionJob
+from app.db.session import async_session_factory
+from app.document_processing import pool as extraction_pool
+from app.services import (
+    answer_cache,
+    bulk_load_lease,
+    document_service,
+    embedding_cache,
+    ingestion_queue,
+    llm_clients,
+    vector_store,
+)
+
+logger = logging.getLogger(__name__)
+
+# How often the pool checks the queue backlog to enter or leave bulk-load mode
+BULK_LOAD_CHECK_SECONDS = 10.0
+
+
+class IngestionWorkerPool:
+    """A pool of asyncio workers that drain the ingestion job queue."""
+
+    def __init__(self, concurrency: int | None = None):
+        self.concurrency = concurrency or settings.ingestion_worker_concurrency
+        self._node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker loops and the stale-job recovery loop."""
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self._node_id}:{slot}"))
+            for slot in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._recovery_loop()))
+        if settings.qdrant_bulk_load_min_backlog > 0:
+            self._tasks.append(asyncio.create_task(self._bulk_load_loop()))
+        logger.info("Started %d ingestion workers on %s", self.concurrency, self._node_id)
+
+    async def stop(self) -> None:
+        """Stop all loops. Jobs in flight are abandoned and recovered after their lease."""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped ingestion workers on %s", self._node_id)
+
+    async def _sleep(self, seconds: float) -> None:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+
+    async def _worker_loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once(worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ingestion worker %s crashed while polling", worker_id)
+                processed = False
+            if not processed:
+                await self._sleep(settings.ingestion_poll_interval_seconds)
+
+    async def _recovery_loop(self) -> None:
+        interval = max(settings.ingestion_lease_seconds / 2, 1.0)
+        while not self._stopping.is_set():
+            try:
+                async with async_session_factory() as db:
+                    await ingestion_queue.recover_stale(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Stale job recovery failed")
+            await self._sleep(interval)
+
+    async def _bulk_load_loop(self) -> None:
+        """Disable vector indexing while a large backlog is imported.
+
+        Indexing every micro-batch as it lands makes a big import far slower than
+        storing everything first and building the index once, so the collection is
+        switched to bulk-load mode while at least ``qdrant_bulk_load_min_backlog``
+        jobs are queued, and back once the queue is empty.
+
+        The mode is collection-wide, so only the node holding ``bulk_load_lease``
+        switches it; the others keep ingesting meanwhile.
+        """
+        lease = contextlib.AsyncExitStack()
+        active = False
+        try:
+            while not self._stopping.is_set():
+                try:
+                    async with async_session_factory() as db:
+                        queued = await ingestion_queue.backlog(db)
+                    if not active and queued >= settings.qdrant_bulk_load_min_backlog:
+                        active = await self._begin_bulk_load(lease, queued)
+                    elif active and queued == 0:
+                        await vector_store.end_bulk_load()
+                        active = False
+                        await lease.aclose()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Bulk-load check failed")
+                await self._sleep(BULK_LOAD_CHECK_SECONDS)
+        finally:
+            try:
+                if active:
+                    await vector_store.end_bulk_load()
+            finally:
+                await lease.aclose()
+
+    async def _begin_bulk_load(self, lease: contextlib.AsyncExitStack, queued: int) -> bool:
+        """Take the bulk-load lease and turn indexing off; False if another node holds it."""
+        if not await lease.enter_async_context(bulk_load_lease.hold()):
+            await lease.aclose()
+            logger.debug("%d jobs queued, bulk load already running on another node", queued)
+            return False
+        try:
+            await vector_store.ensure_collection()
+            await vector_store.begin_bulk_load()
+        except BaseException:
+            await lease.aclose()
+            raise
+        logger.info("%d jobs queued, entering bulk-load mode", queued)
+        return True
+
+    async def run_once(self, worker_id: str) -> bool:
+        """Claim and process a single job.
+
+        Returns:
+            True if a job was claimed, False if the queue had nothing due.
+        """
+        async with async_session_factory() as db:
+            job = await ingestion_queue.claim_next(worker_id, db)
+        if job is None:
+            return False
+
+        work = asyncio.create_task(process_job(job, worker_id))
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, worker_id, work))
+        try:
+            await asyncio.wait({work})
+        finally:
+            heartbeat.cancel()
+            if not work.done():
+                # The pool is stopping: abandon the job, it is recovered after its lease
+                work.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await work
+        if not work.cancelled():
+            work.result()
+        return True
+
+    async def _heartbeat(self, job_id: uuid.UUID, worker_id: str, work: asyncio.Task) -> None:
+        """Renew the job's lease while ``work`` runs; cancel it if the lease is lost.
+
+        A worker too slow to renew in time loses the job to ``recover_stale``, and
+        another worker takes it over. Carrying on would embed the document twice and
+        race the new owner's vector writes.
+        """
+        interval = max(settings.ingestion_lease_seconds / 3, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session_factory() as db:
+                    renewed = await ingestion_queue.renew_lease(job_id, worker_id, db)
+            except Exception:
+                logger.warning("Failed to renew lease on job %s", job_id)
+                continue
+            if not renewed:
+                logger.warning("Lost the lease on job %s to another worker, abandoning it", job_id)
+                work.cancel()
+                return
+
+
+async def process_job(job: IngestionJob, worker_id: str) -> None:
+    """Run the ingestion pipeline for a claimed job and record the outcome.
+
+    Args:
+        job: The claimed IngestionJob.
+        worker_id: Identifier of the worker holding the job.
+    """
+    file_path = Path(job.file_path)
+    async with async_session_factory() as db:
+        doc = await db.get(Document, job.document_id)
+        if doc is None:
+            # Document was deleted while the job was queued
+            await ingestion_queue.complete(job.id, worker_id, db)
+            return
+
+        try:
+            if not await asyncio.to_thread(file_path.exists):
+                raise FileNotFoundError(f"Stored upload not found: {file_path}")
+            await document_service.ingest_document(doc, str(file_path), job.content_type)
+            await db.commit()
+        except DocumentProcessingError as e:
+            await db.rollback()
+            await ingestion_queue.fail(job, worker_id, e.message, db, retryable=False)
+            return
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Ingestion of document %s failed", job.document_id)
+            await ingestion_queue.fail(job, worker_id, str(e), db, retryable=True)
+            return
+
+        await ingestion_queue.complete(job.id, worker_id, db)
+
+    await asyncio.to_thread(file_path.unlink, missing_ok=True)
+
+
+async def main() -> None:
+    """Run a standalone worker pool until SIGINT/SIGTERM."""
+    setup_logging()
+    extraction_pool.start_pool()
+    try:
+        await vector_store.ensure_collection()
+    except VectorStoreError:
+        # Misconfigured (e.g. embedding size mismatch): refuse to start
+        raise
+    except Exception:
+        logger.warning("Qdrant collection bootstrap failed, deferring to first use", exc_info=True)
+    pool = IngestionWorkerPool()
+    await pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    await pool.stop()
+    await asyncio.to_thread(extraction_pool.shutdown_pool)
+    embedding_cache.close_cache()
+    answer_cache.close_cache()
+    await llm_clients.close()
+    await vector_store.close()
+
+    from app.db.session import engine
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
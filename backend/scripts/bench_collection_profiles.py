@@ -0,0 +1,159 @@
+"""Collection profile benchmark: memory, latency and recall per profile.
+
+Generates a synthetic clustered corpus of normalized vectors, loads it into a
+scratch collection for each profile in ``app/services/collection_profiles.py``,
+waits for indexing to finish, then reports
+
+- estimated RAM held by vectors (originals unless on disk, plus quantized copies),
+- Qdrant's resident memory growth (from its /metrics endpoint),
+- p50/p99 search latency with the profile's search params,
+- recall@k against exact (NumPy brute-force) cosine neighbours.
+
+Requires a running Qdrant (e.g. ``docker compose up qdrant``) and NumPy.
+
+Usage (from backend/):
+    python scripts/bench_collection_profiles.py --points 50000 --queries 200
+    python scripts/bench_collection_profiles.py --on-disk  # originals memory-mapped
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+COLLECTION = "bench_collection_profiles"
+
+
+def make_corpus(points: int, dims: int, queries: int, seed: int = 0):
+    """Clustered unit vectors (embeddings are far from uniformly distributed)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(points // 500, 8), dims), dtype=np.float32)
+    labels = rng.integers(0, len(centers), points)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((points, dims), dtype=np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    picks = rng.integers(0, points, queries)
+    query_vecs = corpus[picks] + 0.3 * rng.standard_normal((queries, dims), dtype=np.float32)
+    query_vecs /= np.linalg.norm(query_vecs, axis=1, keepdims=True)
+    return corpus, query_vecs
+
+
+def ground_truth(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    truth = []
+    for start in range(0, len(queries), 64):
+        scores = queries[start : start + 64] @ corpus.T
+        top = np.argpartition(-scores, k, axis=1)[:, :k]
+        truth.extend(set(row.tolist()) for row in top)
+    return truth
+
+
+def resident_bytes(host: str, port: int) -> float | None:
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as r:  # noqa: S310
+            text = r.read().decode()
+    except OSError:
+        return None
+    match = re.search(r"^memory_resident_bytes\s+([0-9.e+]+)", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def estimated_vector_ram(profile, points: int, dims: int, on_disk: bool) -> float:
+    from qdrant_client.models import BinaryQuantization, ScalarQuantization
+
+    ram = 0 if on_disk else points * dims * 4
+    if isinstance(profile.quantization, ScalarQuantization):
+        ram += points * dims
+    elif isinstance(profile.quantization, BinaryQuantization):
+        ram += points * dims / 8
+    return ram
+
+
+def run_profile(name: str, args, corpus, queries, truth) -> None:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, HnswConfigDiff, PointStruct, VectorParams
+
+    from app.services.collection_profiles import get_profile, search_params
+
+    profile = get_profile(name)
+    client = QdrantClient(host=args.host, port=args.port, timeout=120)
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    time.sleep(1)
+    baseline = resident_bytes(args.host, args.port)
+
+    client.create_collection(
+        COLLECTION,
+        vectors_config=VectorParams(
+            size=corpus.shape[1], distance=Distance.COSINE, on_disk=args.on_disk
+        ),
+        quantization_config=profile.quantization,
+        hnsw_config=HnswConfigDiff(on_disk=args.on_disk),
+        on_disk_payload=True,
+    )
+    for start in range(0, len(corpus), 1000):
+        client.upsert(
+            COLLECTION,
+            points=[
+                PointStruct(id=i, vector=corpus[i].tolist())
+                for i in range(start, min(start + 1000, len(corpus)))
+            ],
+            wait=False,
+        )
+    while (info := client.get_collection(COLLECTION)).status != "green" or (
+        info.indexed_vectors_count or 0
+    ) < len(corpus) * 0.99:
+        time.sleep(1)
+    loaded = resident_bytes(args.host, args.port)
+
+    params = search_params(profile, hnsw_ef=args.hnsw_ef)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        hits = client.query_points(
+            COLLECTION, query=query.tolist(), limit=args.k, search_params=params
+        ).points
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len({h.id for h in hits} & expected) / args.k)
+    client.delete_collection(COLLECTION)
+    client.close()
+
+    q = statistics.quantiles(latencies, n=100)
+    growth = f"{(loaded - baseline) / 2**20:8.0f} MB" if baseline and loaded else "     n/a"
+    estimate = estimated_vector_ram(profile, len(corpus), corpus.shape[1], args.on_disk)
+    print(
+        f"{name:<18} vector_ram~{estimate / 2**20:7.0f} MB  rss_growth={growth}  "
+        f"p50={q[49] * 1000:6.1f}ms p99={q[98] * 1000:6.1f}ms  "
+        f"recall@{args.k}={statistics.mean(recalls):.3f}"
+    )
+
+
+def main() -> None:
+    from app.services.collection_profiles import COLLECTION_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.environ.get("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("QDRANT_PORT", 6333)))
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--hnsw-ef", type=int, default=0)
+    parser.add_argument("--on-disk", action="store_true", help="memory-map original vectors")
+    parser.add_argument("--profiles", default=",".join(COLLECTION_PROFILES))
+    args = parser.parse_args()
+
+    print(f"Generating {args.points} x {args.dims} corpus and {args.queries} queries...")
+    corpus, queries = make_corpus(args.points, args.dims, args.queries)
+    truth = ground_truth(corpus, queries, args.k)
+    for name in args.profiles.split(","):
+        run_profile(name, args, corpus, queries, truth)
+
+
+if __name__ == "__main__":
+    main()
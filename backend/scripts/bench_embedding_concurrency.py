@@ -0,0 +1,124 @@
+"""Embedding throughput benchmark: embed_texts against a local stub server.
+
+Starts an OpenAI-compatible ``/embeddings`` stub that simulates provider latency
+(a fixed per-request cost plus a per-input cost), points ``embed_texts`` at it via
+``OPENAI_BASE_URL``, and reports throughput for each concurrency level. The
+embedding cache is disabled so every text goes over the wire.
+
+Usage (from backend/):
+    python scripts/bench_embedding_concurrency.py --texts 4096 --batch-size 64
+    python scripts/bench_embedding_concurrency.py --rate-limit-every 10  # inject 429s
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.getcwd())
+
+DIMS = 1536
+
+
+def make_handler(request_ms: float, input_ms: float, rate_limit_every: int):
+    counter = itertools.count(1)
+    vector_b64 = base64.b64encode(array("f", [0.01] * DIMS).tobytes()).decode()
+    vector_list = [0.01] * DIMS
+
+    class StubEmbeddingHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):  # noqa: N802
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if rate_limit_every and next(counter) % rate_limit_every == 0:
+                self._send(429, {"error": {"message": "rate limited"}}, {"retry-after-ms": "50"})
+                return
+            inputs = body["input"]
+            time.sleep((request_ms + input_ms * len(inputs)) / 1000)
+            vector = vector_b64 if body.get("encoding_format") == "base64" else vector_list
+            self._send(
+                200,
+                {
+                    "object": "list",
+                    "model": body["model"],
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": vector}
+                        for i in range(len(inputs))
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                },
+            )
+
+        def _send(self, status: int, payload: dict, headers: dict | None = None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubEmbeddingHandler
+
+
+async def run(texts: list[str], concurrency_levels: list[int]) -> None:
+    from app.services import embedding_service, llm_clients
+
+    for concurrency in concurrency_levels:
+        embedding_service.settings.embedding_max_concurrency = concurrency
+        await llm_clients.close()  # fresh connection pool per level
+        start = time.perf_counter()
+        vectors = await embedding_service.embed_texts(texts)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts)
+        print(
+            f"concurrency={concurrency:<3} time={elapsed:6.2f}s  "
+            f"throughput={len(texts) / elapsed:8.0f} texts/s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=4096)
+    parser.add_argument("--chars", type=int, default=1000, help="characters per text")
+    parser.add_argument("--batch-size", type=int, default=64, help="max inputs per request")
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--request-ms", type=float, default=80.0)
+    parser.add_argument("--input-ms", type=float, default=1.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="429 every Nth request")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.request_ms, args.input_ms, args.rate_limit_every)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    from app.config import settings
+
+    settings.openai_base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    settings.openai_api_key = "stub"
+    settings.embedding_cache_max_entries = 0
+    settings.embedding_batch_max_inputs = args.batch_size
+
+    texts = [f"{i:08d} " + "x" * args.chars for i in range(args.texts)]
+    print(
+        f"{args.texts} texts, {args.batch_size} per request, stub latency "
+        f"{args.request_ms:.0f}ms + {args.input_ms:.1f}ms/input"
+    )
+    asyncio.run(run(texts, [int(c) for c in args.concurrency.split(",")]))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
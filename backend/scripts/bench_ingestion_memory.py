@@ -0,0 +1,136 @@
+"""Peak-memory benchmark: materialized vs streaming ingestion pipeline.
+
+Builds a synthetic spreadsheet holding ~50 MB of text and runs it through
+
+- "materialized": extract_text -> chunk_text -> embed all -> build all points
+  (the pipeline before streaming), and
+- "streaming": segment file -> iter_chunks -> embed/upsert in micro-batches,
+
+each in a fresh subprocess, reporting the peak RSS of that process. Embedding and
+Qdrant are stubbed (1536-float vectors, PointStructs built then dropped), so only
+the pipeline's own memory is measured.
+
+Usage (from backend/):
+    python scripts/bench_ingestion_memory.py --text-mb 50
+"""
+
+import argparse
+import itertools
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.getcwd())
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+DIMS = 1536
+BATCH_SIZE = 64
+WORDS = (
+    "invoice shipment warehouse pallet supplier contract revenue forecast margin "
+    "quarter region customer backlog inventory compliance audit policy manual "
+    "procedure maintenance turbine voltage sensor firmware calibration tolerance"
+).split()
+
+
+def build_document(path: str, text_mb: int) -> None:
+    """Write a spreadsheet whose cells add up to ~text_mb megabytes of text."""
+    from openpyxl import Workbook
+
+    rng = random.Random(42)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data")
+    target = text_mb * 1024 * 1024
+    written = 0
+    while written < target:
+        row = [" ".join(rng.choices(WORDS, k=12)) for _ in range(3)]
+        ws.append(row)
+        written += sum(len(cell) for cell in row) + 6
+    wb.save(path)
+
+
+def _fake_embed(texts: list[str]) -> list[list[float]]:
+    return [[float(len(t) % 7)] * DIMS for t in texts]
+
+
+def _points(document_id: str, chunks, embeddings) -> list:
+    from qdrant_client.models import PointStruct
+
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=embedding,
+            payload={"text": c.text, "document_id": document_id, "chunk_index": c.chunk_index},
+        )
+        for c, embedding in zip(chunks, embeddings, strict=True)
+    ]
+
+
+def run_materialized(path: str) -> int:
+    from app.document_processing.chunker import chunk_text
+    from app.document_processing.extractors import extract_text
+
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    text = extract_text(file_bytes, XLSX)
+    chunks = chunk_text(text, "doc", "bench.xlsx")
+    embeddings = _fake_embed([c.text for c in chunks])
+    points = _points("doc", chunks, embeddings)
+    return len(points)
+
+
+def run_streaming(path: str) -> int:
+    from app.document_processing.chunker import iter_chunks
+    from app.document_processing.extractors import read_segments, write_segments
+
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    with tempfile.TemporaryDirectory() as work_dir:
+        segment_path = os.path.join(work_dir, "segments.jsonl")
+        write_segments(file_bytes, XLSX, segment_path)
+        del file_bytes
+        chunks = iter_chunks(read_segments(segment_path), "doc", "bench.xlsx", separator="\n")
+        total = 0
+        while batch := list(itertools.islice(chunks, BATCH_SIZE)):
+            _points("doc", batch, _fake_embed([c.text for c in batch]))
+            total += len(batch)
+    return total
+
+
+def child(mode: str, path: str) -> None:
+    start = time.perf_counter()
+    chunks = run_materialized(path) if mode == "materialized" else run_streaming(path)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"{mode:<13} chunks={chunks:<7} peak_rss={peak_mb:8.1f} MB  time={elapsed:6.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--text-mb", type=int, default=50)
+    parser.add_argument("--mode", choices=["materialized", "streaming"])
+    parser.add_argument("--input")
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args.mode, args.input)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        print(f"Building synthetic document with ~{args.text_mb} MB of text...")
+        build_document(path, args.text_mb)
+        print(f"File size: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for mode in ("materialized", "streaming"):
+            subprocess.run(  # noqa: S603
+                [sys.executable, __file__, "--mode", mode, "--input", path],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""LLM client setup benchmark: a ChatOpenAI per request vs the shared registry.
+
+Measures, for ``--requests`` sequential chat completions against a local
+OpenAI-compatible stub server,
+
+- client setup time per request: building a ``ChatOpenAI`` (with its OpenAI and
+  HTTP clients) versus looking it up in ``app.services.llm_clients``;
+- end-to-end latency per request, which for fresh clients includes opening a
+  new connection every time.
+
+The stub speaks plain HTTP/1.1 on localhost, so the TLS handshake and network
+round trips a fresh client pays against the real API are not included; the
+savings in production are larger than measured here.
+
+Usage (from backend/):
+    python scripts/bench_llm_clients.py --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.getcwd())
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "rag"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # no delayed-ACK stalls between headers and body
+
+    def do_POST(self):  # noqa: N802
+        self.rfile.read(int(self.headers["Content-Length"]))
+        data = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def run(requests: int) -> None:
+    from langchain_openai import ChatOpenAI
+
+    from app.config import settings
+    from app.services import llm_clients
+
+    def fresh_client():
+        return ChatOpenAI(
+            model=settings.openai_chat_model,
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            temperature=0,
+        )
+
+    def shared_client():
+        return llm_clients.get_chat_model(temperature=0)
+
+    shared_client()  # created once at startup in the application
+    for name, factory in (("per request", fresh_client), ("shared", shared_client)):
+        setup, total = [], []
+        for _ in range(requests):
+            start = time.perf_counter()
+            llm = factory()
+            built = time.perf_counter()
+            await llm.ainvoke("Route this")
+            done = time.perf_counter()
+            setup.append((built - start) * 1000)
+            total.append((done - start) * 1000)
+        print(
+            f"{name:<12} setup p50={percentile(setup, 50):7.3f}ms p99={percentile(setup, 99):7.3f}ms"
+            f"   request p50={percentile(total, 50):7.2f}ms p99={percentile(total, 99):7.2f}ms"
+        )
+    await llm_clients.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    from app.config import settings
+
+    settings.openai_base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    settings.openai_api_key = "stub"
+    settings.openai_http2 = False  # the stub only speaks HTTP/1.1
+
+    print(f"{args.requests} sequential chat completions against a local stub")
+    asyncio.run(run(args.requests))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Local vector store benchmark: exact vs HNSW search on a synthetic corpus.
+
+Loads a clustered corpus of random unit vectors into a scratch
+``LocalVectorStore`` (in bulk-load mode) and reports load throughput, index build
+time and p50/p99 latency and recall@k for exact (NumPy) and HNSW search, with
+and without a document filter.
+
+Usage (from backend/):
+    python scripts/bench_local_vector_store.py --points 200000 --dims 512
+    python scripts/bench_local_vector_store.py --points 1000000 --dims 256
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+DOCUMENTS = 1000
+
+
+def make_corpus(points: int, dims: int, queries: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(points // 500, 8), dims), dtype=np.float32)
+    corpus = centers[rng.integers(0, len(centers), points)]
+    corpus += 0.6 * rng.standard_normal((points, dims), dtype=np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    picks = corpus[rng.integers(0, points, queries)]
+    query_vecs = picks + 0.3 * rng.standard_normal((queries, dims), dtype=np.float32)
+    return corpus, query_vecs
+
+
+async def measure(store, queries, truth, k, filters=None) -> str:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        results = await store.search(query.tolist(), top_k=k, filters=filters)
+        latencies.append(time.perf_counter() - start)
+        found = {(r.document_id, r.chunk_index) for r in results}
+        recalls.append(len(found & expected) / k)
+    q = statistics.quantiles(latencies, n=100)
+    return (
+        f"p50={q[49] * 1000:7.2f}ms p99={q[98] * 1000:7.2f}ms  "
+        f"recall@{k}={statistics.mean(recalls):.3f}"
+    )
+
+
+def location(i: int) -> tuple[str, int]:
+    return f"doc-{i % DOCUMENTS}", i // DOCUMENTS
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.services.local_vector_store import LocalVectorStore
+
+    print(f"Generating {args.points} x {args.dims} corpus...")
+    corpus, queries = make_corpus(args.points, args.dims, args.queries)
+    doc_ids = np.arange(args.points) % DOCUMENTS
+    truth, filtered_truth = [], []
+    for query in queries:
+        scores = corpus @ (query / np.linalg.norm(query))
+        truth.append({location(int(i)) for i in np.argsort(-scores)[: args.k]})
+        # Filter on one document holding 1/DOCUMENTS of the corpus
+        scores[doc_ids != 0] = -np.inf
+        filtered_truth.append({location(int(i)) for i in np.argsort(-scores)[: args.k]})
+
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, args.dims, hnsw_min_points=args.points + 1)
+        start = time.perf_counter()
+        await store.begin_bulk_load()
+        for doc in range(DOCUMENTS):
+            rows = np.arange(doc, args.points, DOCUMENTS)
+            chunks = [
+                {"text": f"chunk {i}", "chunk_index": i // DOCUMENTS, "metadata": {}}
+                for i in rows.tolist()
+            ]
+            await store.upsert_chunks(f"doc-{doc}", chunks, corpus[rows].tolist())
+        await store.end_bulk_load()
+        print(f"loaded {args.points} points in {time.perf_counter() - start:.1f}s")
+
+        print(f"exact            {await measure(store, queries, truth, args.k)}")
+        print(
+            f"exact+filter     "
+            f"{await measure(store, queries, filtered_truth, args.k, {'document_id': 'doc-0'})}"
+        )
+
+        store.hnsw_min_points = 1
+        store.hnsw_ef_search = args.ef
+        start = time.perf_counter()
+        await asyncio.to_thread(store._maybe_build_index)
+        if store._index is None:
+            print("hnswlib not installed; skipping HNSW")
+        else:
+            print(f"built HNSW index in {time.perf_counter() - start:.1f}s")
+            print(f"hnsw(ef={args.ef:<4})     {await measure(store, queries, truth, args.k)}")
+        await store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--dims", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, default=128)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Search latency under concurrent chat load: sync vs async Qdrant client.
+
+Seeds a scratch collection with random vectors, then simulates N concurrent chat
+requests on one event loop. Each request does a short awaited step (standing in
+for the query embedding call) followed by a vector search using either
+
+- "sync":  the blocking ``QdrantClient`` called from the coroutine (the old
+  vector_store behaviour), which stalls the loop for every round trip, or
+- "async": ``vector_store.search`` on the shared ``AsyncQdrantClient``.
+
+Reports per-request search latency percentiles, total wall time and the worst
+event-loop stall seen by a 1 ms heartbeat task.
+
+Requires a running Qdrant (e.g. ``docker compose up qdrant``).
+
+Usage (from backend/):
+    python scripts/bench_vector_search.py --requests 200
+    python scripts/bench_vector_search.py --requests 200 --grpc
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+COLLECTION = "bench_vector_search"
+DIMS = 1536
+
+
+def _random_vector(rng: random.Random) -> list[float]:
+    return [rng.uniform(-1, 1) for _ in range(DIMS)]
+
+
+def seed(host: str, port: int, points: int) -> None:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    client = QdrantClient(host=host, port=port)
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        COLLECTION, vectors_config=VectorParams(size=DIMS, distance=Distance.COSINE)
+    )
+    rng = random.Random(0)
+    for start in range(0, points, 500):
+        client.upsert(
+            COLLECTION,
+            points=[
+                PointStruct(id=i, vector=_random_vector(rng), payload={"text": f"chunk {i}"})
+                for i in range(start, min(start + 500, points))
+            ],
+        )
+    client.close()
+
+
+async def _heartbeat(stop: asyncio.Event, stalls: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(0.001)
+        stalls.append(loop.time() - before - 0.001)
+
+
+async def run(mode: str, args: argparse.Namespace) -> None:
+    from qdrant_client import QdrantClient
+
+    from app.services import vector_store
+
+    vector_store.settings.qdrant_collection_name = COLLECTION
+    vector_store.settings.qdrant_prefer_grpc = args.grpc
+    sync_client = QdrantClient(host=args.host, port=args.port, prefer_grpc=args.grpc)
+    rng = random.Random(1)
+    queries = [_random_vector(rng) for _ in range(args.requests)]
+
+    async def chat_request(query: list[float]) -> float:
+        await asyncio.sleep(args.embed_ms / 1000)  # stand-in for the embedding call
+        start = time.perf_counter()
+        if mode == "sync":
+            sync_client.query_points(COLLECTION, query=query, limit=5)
+        else:
+            await vector_store.search(query, top_k=5)
+        return time.perf_counter() - start
+
+    await vector_store.search(queries[0])  # warm up the shared connection pool
+    stop, stalls = asyncio.Event(), []
+    heartbeat = asyncio.create_task(_heartbeat(stop, stalls))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(chat_request(q) for q in queries))
+    wall = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+    sync_client.close()
+    await vector_store.close()
+
+    q = statistics.quantiles(sorted(latencies), n=100)
+    print(
+        f"{mode:<6} requests={args.requests:<4} wall={wall:6.2f}s  "
+        f"p50={q[49] * 1000:7.1f}ms p95={q[94] * 1000:7.1f}ms p99={q[98] * 1000:7.1f}ms  "
+        f"max_loop_stall={max(stalls, default=0) * 1000:7.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.environ.get("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("QDRANT_PORT", 6333)))
+    parser.add_argument("--grpc", action="store_true", help="use the gRPC transport")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--embed-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    from app.config import settings
+
+    settings.qdrant_host, settings.qdrant_port = args.host, args.port
+    print(f"Seeding {args.points} points into '{COLLECTION}'...")
+    seed(args.host, args.port, args.points)
+    for mode in ("sync", "async"):
+        asyncio.run(run(mode, args))
+
+    from qdrant_client import QdrantClient
+
+    QdrantClient(host=args.host, port=args.port).delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import os
 sys.path.append(os.getcwd())
 
 from app.config import settings
+from app.db.migrations.schema_upgrades import upgrade_schema
 from app.db.models import Base
 from app.db.session import engine
 
@@ -19,6 +20,8 @@ async def init_models():
     logger.info("Creating tables...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips existing tables; add columns introduced since they were created
+        await upgrade_schema(conn)
     logger.info("Tables created successfully.")
 
 if __name__ == "__main__":
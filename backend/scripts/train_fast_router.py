@@ -0,0 +1,115 @@
+"""Train and evaluate the local fast-path router from stored chat history.
+
+Reads the route decisions of assistant messages in ``chat_messages`` (paired with
+the user question they answered, skipping decisions made by the fast path
+itself), embeds the questions (through the embedding cache) and
+
+- ``train``: holds out the most recent ``--holdout`` fraction, reports how often
+  the fast path would decide on it and how often it agrees with the stored
+  (LLM) routes, then fits the centroid model on all examples and saves it to
+  ``FAST_ROUTER_MODEL_PATH``;
+- ``evaluate``: reports the same agreement for the saved model on the most
+  recent ``--last`` examples.
+
+Running API processes pick up a new model on restart.
+
+Usage (from backend/):
+    python scripts/train_fast_router.py train --holdout 0.2
+    python scripts/train_fast_router.py evaluate --last 500 --min-confidence 0.9
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import select
+
+from app.agents import fast_router
+from app.agents.fast_router import CentroidModel
+from app.config import settings
+from app.db.models import ChatMessage
+from app.db.session import async_session_factory, engine
+from app.services import embedding_cache, embedding_service
+
+
+async def load_examples(limit: int | None) -> list[tuple[str, str]]:
+    stmt = select(
+        ChatMessage.session_id,
+        ChatMessage.role,
+        ChatMessage.content,
+        ChatMessage.route_decision,
+        ChatMessage.metadata_,
+    ).order_by(ChatMessage.created_at)
+    async with async_session_factory() as db:
+        rows = [(str(s), role, content, route, meta) for s, role, content, route, meta in await db.execute(stmt)]
+    examples = fast_router.training_examples(rows)
+    return examples[-limit:] if limit else examples
+
+
+def report(title: str, agreement: fast_router.Agreement, min_confidence: float) -> None:
+    print(f"\n{title}: {agreement.examples} examples, min confidence {min_confidence}")
+    print(
+        f"  fast path decides {agreement.decided} ({agreement.coverage:.1%}), "
+        f"agrees with the LLM router on {agreement.agreed} ({agreement.agreement:.1%})"
+    )
+    for source, (decided, agreed) in agreement.by_source.items():
+        rate = agreed / decided if decided else 0.0
+        print(f"  {source:>8}: {decided:5d} decided, {rate:.1%} agreement")
+    if agreement.centroid_accuracy is not None:
+        print(f"  centroid model alone (no threshold): {agreement.centroid_accuracy:.1%} accuracy")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit and save the centroid model")
+    train.add_argument("--holdout", type=float, default=0.2, help="fraction held out for evaluation")
+    train.add_argument("--output", default=settings.fast_router_model_path)
+    evaluate = sub.add_parser("evaluate", help="evaluate the saved model")
+    evaluate.add_argument("--last", type=int, default=None, help="most recent examples to use")
+    for command in (train, evaluate):
+        command.add_argument(
+            "--min-confidence", type=float, default=settings.fast_router_min_confidence
+        )
+    args = parser.parse_args()
+
+    try:
+        examples = await load_examples(args.last if args.command == "evaluate" else None)
+        if not examples:
+            sys.exit("No routed chat messages to learn from")
+        questions = [question for question, _ in examples]
+        labels = [label for _, label in examples]
+        vectors = np.asarray(await embedding_service.embed_texts(questions), dtype=np.float32)
+        namespace = fast_router.embedding_namespace()
+
+        if args.command == "evaluate":
+            model = fast_router.get_model()
+            if model is None:
+                sys.exit(f"No usable model at {settings.fast_router_model_path}")
+            report("Saved model", fast_router.evaluate(model, questions, vectors, labels, args.min_confidence), args.min_confidence)
+            return
+
+        split = int(len(examples) * (1 - args.holdout))
+        if 0 < split < len(examples):
+            held_out = CentroidModel.fit(vectors[:split], labels[:split], namespace)
+            report(
+                f"Held out (trained on the oldest {split})",
+                fast_router.evaluate(held_out, questions[split:], vectors[split:], labels[split:], args.min_confidence),
+                args.min_confidence,
+            )
+        model = CentroidModel.fit(vectors, labels, namespace)
+        model.save(args.output)
+        counts = {label: labels.count(label) for label in model.labels}
+        print(f"\nSaved model trained on {len(labels)} examples {counts} to {args.output}")
+    finally:
+        embedding_cache.close_cache()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
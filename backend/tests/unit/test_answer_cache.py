@@ -0,0 +1,80 @@
+"""Unit tests for the semantic answer cache."""
+
+import time
+
+import pytest
+from app.services import answer_cache
+from app.services.answer_cache import AnswerCache, replay
+
+
+def _cache(tmp_path, max_entries: int = 100, ttl: float = 3600, namespace: str = "ns"):
+    return AnswerCache(str(tmp_path / "answers.sqlite3"), max_entries, ttl, namespace)
+
+
+class TestAnswerCache:
+    """Tests for lookups, invalidation and eviction."""
+
+    def test_similar_question_hits(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.put("How do I prime the pump?", [1.0, 0.0, 0.0], "Open the valve.", ["p1"], ["d1"])
+
+        hit = cache.lookup([0.99, 0.1, 0.0], threshold=0.95)
+
+        assert hit.answer == "Open the valve."
+        assert hit.sources == ["p1"]
+        assert hit.similarity == pytest.approx(0.995, abs=1e-3)
+        assert cache.lookup([0.0, 1.0, 0.0], threshold=0.95) is None
+        cache.close()
+
+    def test_document_invalidation_reaches_other_processes(self, tmp_path):
+        """A worker invalidating a document should drop the entry for the API process too."""
+        api, worker = _cache(tmp_path), _cache(tmp_path)
+        api.put("q1", [1.0, 0.0], "a1", ["p1", "p2"], ["d1", "d2"])
+        api.put("q2", [0.0, 1.0], "a2", ["p3"], ["d3"])
+        assert api.lookup([1.0, 0.0], 0.9) is not None
+
+        assert worker.invalidate_document("d2") == 1
+        assert worker.invalidate_document("d2") == 0
+
+        assert api.lookup([1.0, 0.0], 0.9) is None
+        assert api.lookup([0.0, 1.0], 0.9).answer == "a2"
+        assert len(api) == 1
+        api.close()
+        worker.close()
+
+    def test_expired_entries_are_not_served(self, tmp_path, monkeypatch):
+        cache = _cache(tmp_path, ttl=60)
+        cache.put("q", [1.0, 0.0], "a", ["p1"], ["d1"])
+        now = time.time()
+        monkeypatch.setattr(answer_cache.time, "time", lambda: now + 120)
+
+        assert cache.lookup([1.0, 0.0], 0.9) is None
+        cache.close()
+
+    def test_least_recently_used_evicted(self, tmp_path):
+        cache = _cache(tmp_path, max_entries=3)
+        for i in range(3):
+            cache.put(f"q{i}", [1.0, float(i)], f"a{i}", ["p"], ["d"])
+        cache.lookup([1.0, 0.0], 0.999)  # q0 is now the most recently used
+
+        cache.put("q3", [0.0, -1.0], "a3", ["p"], ["d"])
+
+        assert len(cache) == 2
+        assert cache.lookup([1.0, 0.0], 0.999).answer == "a0"
+        assert cache.lookup([0.0, -1.0], 0.999).answer == "a3"
+        cache.close()
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        """Answers from another chat/embedding model must not be served."""
+        first = _cache(tmp_path, namespace="gpt-4o|text-embedding-3-small:1536")
+        first.put("q", [1.0, 0.0], "a", ["p1"], ["d1"])
+        other = _cache(tmp_path, namespace="gpt-4o-mini|text-embedding-3-small:1536")
+
+        assert other.lookup([1.0, 0.0], 0.9) is None
+        first.close()
+        other.close()
+
+    def test_replay_splits_answer(self):
+        answer = "x" * 600
+
+        assert [len(piece) for piece in replay(answer)] == [256, 256, 88]
@@ -0,0 +1,25 @@
+"""Unit tests for the application's middleware stack."""
+
+from app.config import settings
+from app.core.upload_limit import MULTIPART_OVERHEAD_BYTES
+from app.main import create_app
+from fastapi.testclient import TestClient
+
+
+class TestMiddlewareOrder:
+    """Tests for how the middlewares wrap each other."""
+
+    def test_upload_rejections_carry_cors_headers(self):
+        """The browser must be able to read FILE_TOO_LARGE, not an opaque CORS error."""
+        origin = settings.cors_origins[0]
+        client = TestClient(create_app())  # lifespan not started: no Qdrant or Postgres
+
+        response = client.post(
+            "/api/v1/documents/upload",
+            content=b"x" * (settings.max_upload_size_bytes + MULTIPART_OVERHEAD_BYTES + 1),
+            headers={"Origin": origin},
+        )
+
+        assert response.status_code == 413
+        assert response.json()["error"] == "FILE_TOO_LARGE"
+        assert response.headers["access-control-allow-origin"] == origin
@@ -0,0 +1,60 @@
+"""Unit tests for the cluster-wide bulk-load lease."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.services import bulk_load_lease
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    """Patch the engine with a connection whose try-lock result is configurable."""
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(scalar_one=MagicMock(return_value=True))
+
+    @asynccontextmanager
+    async def connect():
+        yield conn
+
+    monkeypatch.setattr(bulk_load_lease, "engine", MagicMock(connect=connect))
+    return conn
+
+
+def _statements(conn) -> list[str]:
+    return [str(call.args[0]) for call in conn.execute.await_args_list]
+
+
+class TestHold:
+    """Tests for taking and releasing the lease."""
+
+    @pytest.mark.asyncio
+    async def test_acquired_lease_is_released(self, conn):
+        async with bulk_load_lease.hold() as held:
+            assert held is True
+
+        assert _statements(conn) == [
+            "SELECT pg_try_advisory_lock(:key)",
+            "SELECT pg_advisory_unlock(:key)",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_lease_held_elsewhere(self, conn):
+        conn.execute.return_value.scalar_one.return_value = False
+
+        async with bulk_load_lease.hold() as held:
+            assert held is False
+
+        assert _statements(conn) == ["SELECT pg_try_advisory_lock(:key)"]
+
+    @pytest.mark.asyncio
+    async def test_connection_discarded_if_unlock_fails(self, conn):
+        """A connection that may still hold the lock must not go back to the pool."""
+        result = conn.execute.return_value
+        conn.execute.side_effect = [result, OSError("connection lost")]
+
+        with pytest.raises(OSError):
+            async with bulk_load_lease.hold():
+                pass
+
+        conn.invalidate.assert_awaited_once()
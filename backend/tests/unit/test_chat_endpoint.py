@@ -0,0 +1,64 @@
+"""Unit tests for the chat endpoint."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.api.v1.endpoints import chat as chat_endpoint
+from app.api.v1.schemas.chat import ChatRequest
+
+
+class TestNonStreamingChat:
+    """Tests for the JSON (non-streaming) chat path."""
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_and_awaits_pipeline(self, monkeypatch):
+        """The pipeline must be cancelled and finish unwinding before the endpoint returns."""
+        monkeypatch.setattr(chat_endpoint, "DISCONNECT_POLL_SECONDS", 0.01)
+        started = asyncio.Event()
+        cleaned_up = []
+
+        async def slow_stream(**kwargs):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+                yield '{"type": "token", "content": "late"}'
+            finally:
+                await asyncio.sleep(0)  # async cleanup, e.g. invalidating a connection
+                cleaned_up.append(True)
+
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(side_effect=lambda: started.is_set())
+
+        with patch.object(chat_endpoint.chat_service, "process_message_stream", slow_stream):
+            response = await chat_endpoint.chat(
+                ChatRequest(message="How many orders?", stream=False),
+                http_request,
+                _api_key="key",
+                db=AsyncMock(),
+            )
+
+        assert response is None
+        assert cleaned_up == [True]
+
+    @pytest.mark.asyncio
+    async def test_collects_tokens_and_metadata(self):
+        async def stream(**kwargs):
+            yield '{"type": "metadata", "metadata": {"route": "sql"}}'
+            yield '{"type": "token", "content": "42 "}'
+            yield '{"type": "token", "content": "orders"}'
+            yield '{"type": "done", "content": ""}'
+
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(return_value=False)
+
+        with patch.object(chat_endpoint.chat_service, "process_message_stream", stream):
+            response = await chat_endpoint.chat(
+                ChatRequest(message="How many orders?", stream=False),
+                http_request,
+                _api_key="key",
+                db=AsyncMock(),
+            )
+
+        assert response.content == "42 orders"
+        assert response.route_decision == "sql"
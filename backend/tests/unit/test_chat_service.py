@@ -1,5 +1,6 @@
 """Unit tests for chat service RAG pipeline."""
 
+import asyncio
 import json
 import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -7,6 +8,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from app.db.models import ChatSession
 from app.services import chat_service
+from app.services.answer_cache import CachedAnswer
+from app.services.context_packer import PackedContext, Passage
 
 
 @pytest.fixture
@@ -21,6 +24,34 @@ def mock_session():
     return ChatSession(id=uuid.uuid4())
 
 
+@pytest.fixture(autouse=True)
+def no_answer_cache():
+    """Embed queries with a stub and start every test with an empty answer cache."""
+    with (
+        patch("app.services.chat_service.embedding_service") as mock_embedding,
+        patch("app.services.chat_service.answer_cache") as mock_cache,
+    ):
+        mock_embedding.embed_query = AsyncMock(return_value=[1.0, 0.0])
+        mock_cache.lookup = AsyncMock(return_value=None)
+        mock_cache.store = AsyncMock()
+        yield mock_cache
+
+
+def _context(text: str) -> PackedContext:
+    passage = Passage(
+        document_id="doc-1",
+        filename="a.pdf",
+        first_chunk=0,
+        last_chunk=0,
+        text=text,
+        tokens=3,
+        score=0.9,
+        rank=0,
+        chunk_ids=["point-1"],
+    )
+    return PackedContext(text=text, tokens=3, tokens_saved=0, passages=[passage])
+
+
 @pytest.mark.asyncio
 async def test_successful_rag_flow(mock_db, mock_session):
     """Should execute full RAG flow: history -> search -> llm -> save."""
@@ -36,7 +67,7 @@ async def test_successful_rag_flow(mock_db, mock_session):
     with (
         patch("app.services.chat_service.rag_prompt") as mock_rag_prompt,
         patch("app.services.chat_service.history_service") as mock_history,
-        patch("app.services.chat_service.search_documents") as mock_search,
+        patch("app.services.chat_service.find_documents", new_callable=AsyncMock) as mock_search,
         patch("app.services.chat_service.get_router_agent") as mock_get_router,
     ):
         # 1. Setup History
@@ -48,10 +79,11 @@ async def test_successful_rag_flow(mock_db, mock_session):
         mock_router_agent = AsyncMock()
         mock_router_agent.route.return_value.destination = "rag"
         mock_router_agent.route.return_value.reasoning = "test reasoning"
+        mock_router_agent.route.return_value.source = "llm"
         mock_get_router.return_value = mock_router_agent
 
         # 3. Setup Search
-        mock_search.ainvoke = AsyncMock(return_value="[Document 1] Context")
+        mock_search.return_value = _context("[Document 1] Context")
 
         # 4. Setup LLM Chain Pipe
         # prompt | llm -> pipe1; pipe1 | parser -> chain
@@ -75,6 +107,7 @@ async def test_successful_rag_flow(mock_db, mock_session):
         meta_event = next((e for e in events if e["type"] == "metadata"), None)
         assert meta_event is not None
         assert meta_event["metadata"]["route"] == "rag"
+        assert meta_event["metadata"]["route_source"] == "llm"
 
         # Check Tokens
         tokens = [e["content"] for e in events if e["type"] == "token"]
@@ -86,7 +119,7 @@ async def test_successful_rag_flow(mock_db, mock_session):
 
         # Verify calls
         mock_history.get_or_create_session.assert_awaited_once()
-        mock_search.ainvoke.assert_awaited_once_with("Hello")
+        mock_search.assert_awaited_once_with("Hello", query_vector=[1.0, 0.0])
         # History updated twice: user message and assistant message
         assert mock_history.add_message.call_count == 2
 
@@ -104,7 +137,7 @@ async def test_creates_new_session_if_none_provided(mock_db, mock_session):
     with (
         patch("app.services.chat_service.rag_prompt") as mock_rag_prompt,
         patch("app.services.chat_service.history_service") as mock_history,
-        patch("app.services.chat_service.search_documents") as mock_search,
+        patch("app.services.chat_service.find_documents", new_callable=AsyncMock) as mock_search,
         patch("app.services.chat_service.get_router_agent") as mock_get_router,
     ):
         mock_history.get_or_create_session = AsyncMock(return_value=mock_session)
@@ -116,7 +149,7 @@ async def test_creates_new_session_if_none_provided(mock_db, mock_session):
         mock_router_agent.route.return_value.reasoning = "test"
         mock_get_router.return_value = mock_router_agent
 
-        mock_search.ainvoke = AsyncMock(return_value="")
+        mock_search.return_value = PackedContext(text="", tokens=0, tokens_saved=0, passages=[])
 
         mock_pipe1 = MagicMock()
         mock_rag_prompt.__or__.return_value = mock_pipe1
@@ -133,3 +166,189 @@ async def test_creates_new_session_if_none_provided(mock_db, mock_session):
 
         # Assert
         mock_history.get_or_create_session.assert_awaited_once_with(None, mock_db)
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_hit_skips_search(mock_db, mock_session, no_answer_cache):
+    """A cached answer should be replayed without searching or calling the LLM."""
+    no_answer_cache.lookup.return_value = CachedAnswer(
+        answer="Cached answer", sources=["point-1"], question="Hello?", similarity=0.97
+    )
+    no_answer_cache.replay.return_value = iter(["Cached ", "answer"])
+
+    with (
+        patch("app.services.chat_service.history_service") as mock_history,
+        patch("app.services.chat_service.find_documents", new_callable=AsyncMock) as mock_search,
+        patch("app.services.chat_service.get_chat_model") as mock_llm,
+    ):
+        mock_history.get_or_create_session = AsyncMock(return_value=mock_session)
+        mock_history.get_session_history = AsyncMock(return_value=[])
+        mock_history.add_message = AsyncMock()
+
+        events = [
+            json.loads(e)
+            async for e in chat_service.process_message_stream(
+                session_id=None, user_message="Hello", db=mock_db, mode="rag"
+            )
+        ]
+
+    assert [e["content"] for e in events if e["type"] == "token"] == ["Cached ", "answer"]
+    mock_search.assert_not_awaited()
+    mock_llm.assert_not_called()
+    saved = mock_history.add_message.await_args_list[-1].kwargs
+    assert saved["content"] == "Cached answer"
+    assert saved["metadata"]["context_source"] == "answer_cache"
+
+
+@pytest.mark.asyncio
+async def test_follow_ups_not_shared_across_sessions(mock_db, no_answer_cache):
+    """The same follow-up in two conversations must be answered from each one's history."""
+    stored = []
+    no_answer_cache.store = AsyncMock(side_effect=lambda *args: stored.append(args))
+    # Any stored answer would match: the follow-up's embedding is identical in both sessions
+    no_answer_cache.lookup = AsyncMock(
+        side_effect=lambda vector: (
+            CachedAnswer(answer=stored[-1][2], sources=[], question="", similarity=1.0)
+            if stored
+            else None
+        )
+    )
+    no_answer_cache.replay = lambda answer: iter([answer])
+    sessions = {name: ChatSession(id=uuid.uuid4()) for name in ("pumps", "valves")}
+    histories = {
+        str(session.id): [MagicMock(role="user", content=f"List the {name}")]
+        for name, session in sessions.items()
+    }
+
+    async def stream(inputs):
+        yield f"Answer about {inputs['history'][0].content}"
+
+    async def ask(session: ChatSession) -> str:
+        events = [
+            json.loads(e)
+            async for e in chat_service.process_message_stream(
+                session_id=str(session.id),
+                user_message="What about the second one?",
+                db=mock_db,
+                mode="rag",
+            )
+        ]
+        return "".join(e["content"] for e in events if e["type"] == "token")
+
+    with (
+        patch("app.services.chat_service.rag_prompt") as mock_rag_prompt,
+        patch("app.services.chat_service.history_service") as mock_history,
+        patch("app.services.chat_service.find_documents", new_callable=AsyncMock) as mock_search,
+    ):
+        mock_history.get_or_create_session = AsyncMock(
+            side_effect=lambda session_id, db: next(
+                s for s in sessions.values() if str(s.id) == session_id
+            )
+        )
+        mock_history.get_session_history = AsyncMock(
+            side_effect=lambda session_id, db, limit: histories[session_id][:limit]
+        )
+        mock_history.add_message = AsyncMock()
+        mock_search.return_value = _context("Context")
+        mock_rag_prompt.__or__.return_value.__or__.return_value.astream = stream
+
+        answers = [await ask(sessions["pumps"]), await ask(sessions["valves"])]
+
+    assert answers == ["Answer about List the pumps", "Answer about List the valves"]
+    no_answer_cache.lookup.assert_not_awaited()
+    assert stored == []
+
+
+def _router(destination: str) -> AsyncMock:
+    router = AsyncMock()
+    router.route.return_value.destination = destination
+    router.route.return_value.reasoning = "test"
+    router.route.return_value.source = "llm"
+    return router
+
+
+@pytest.mark.asyncio
+async def test_speculative_retrieval_used_for_rag(mock_db, mock_session):
+    """In auto mode the search should start before routing and be reused for RAG."""
+    order = []
+
+    async def search(*args, **kwargs):
+        order.append("search")
+        return _context("Context")
+
+    async def route(query):
+        await asyncio.sleep(0)
+        order.append("route")
+        return _router("rag").route.return_value
+
+    async def stream(*args, **kwargs):
+        yield "answer"
+
+    with (
+        patch("app.services.chat_service.rag_prompt") as mock_rag_prompt,
+        patch("app.services.chat_service.history_service") as mock_history,
+        patch("app.services.chat_service.find_documents", side_effect=search) as mock_search,
+        patch("app.services.chat_service.get_router_agent") as mock_get_router,
+    ):
+        mock_history.get_or_create_session = AsyncMock(return_value=mock_session)
+        mock_history.get_session_history = AsyncMock(return_value=[])
+        mock_history.add_message = AsyncMock()
+        mock_get_router.return_value.route = route
+        mock_rag_prompt.__or__.return_value.__or__.return_value.astream = stream
+
+        events = [
+            json.loads(e)
+            async for e in chat_service.process_message_stream(
+                session_id=None, user_message="What is RAG?", db=mock_db
+            )
+        ]
+
+    assert order == ["search", "route"]
+    assert mock_search.call_count == 1
+    assert events[-1]["type"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_speculative_retrieval_cancelled_for_other_routes(mock_db, mock_session):
+    """A speculative search still running when the route is not RAG is cancelled."""
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_search(*args, **kwargs):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def route(query):
+        await started.wait()
+        return _router("general_chat").route.return_value
+
+    async def stream(*args, **kwargs):
+        yield MagicMock(content="Hi!")
+
+    with (
+        patch("app.services.chat_service.history_service") as mock_history,
+        patch("app.services.chat_service.find_documents", side_effect=slow_search),
+        patch("app.services.chat_service.get_router_agent") as mock_get_router,
+        patch("app.services.chat_service.get_chat_model") as mock_llm,
+        patch("app.services.chat_service.speculative_retrieval_total") as mock_metric,
+    ):
+        mock_history.get_or_create_session = AsyncMock(return_value=mock_session)
+        mock_history.get_session_history = AsyncMock(return_value=[])
+        mock_history.add_message = AsyncMock()
+        mock_get_router.return_value.route = route
+        mock_llm.return_value.astream = stream
+
+        events = [
+            json.loads(e)
+            async for e in chat_service.process_message_stream(
+                session_id=None, user_message="Hello", db=mock_db
+            )
+        ]
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert events[-1]["type"] == "done"
+    mock_metric.labels.assert_called_once_with(outcome="cancelled")
@@ -1,6 +1,13 @@
 """Unit tests for document text chunker."""
 
-from app.document_processing.chunker import CHUNK_OVERLAP, CHUNK_SIZE, TextChunk, chunk_text
+from app.core.tokens import count_tokens
+from app.document_processing.chunker import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    TextChunk,
+    chunk_text,
+    iter_chunks,
+)
 
 
 class TestChunkText:
@@ -47,6 +54,7 @@ class TestChunkText:
             assert chunk.metadata["filename"] == filename
             assert chunk.metadata["total_chunks"] == len(chunks)
             assert chunk.metadata["chunk_index"] == chunk.chunk_index
+            assert chunk.metadata["token_count"] > 0
 
     def test_chunk_returns_text_chunk_dataclass(self):
         """Return type should be list of TextChunk dataclass instances."""
@@ -69,3 +77,49 @@ class TestChunkText:
         """Default chunk_size and chunk_overlap should match module constants."""
         assert CHUNK_SIZE == 2048
         assert CHUNK_OVERLAP == 200
+
+
+class TestIterChunks:
+    """Tests for the streaming iter_chunks function."""
+
+    def test_empty_segments_yield_nothing(self):
+        """Should yield no chunks for no or whitespace-only segments."""
+        assert list(iter_chunks([], "doc-1", "empty.pdf")) == []
+        assert list(iter_chunks(["  ", "\n"], "doc-1", "blank.pdf")) == []
+
+    def test_matches_chunk_text_for_paragraphs(self):
+        """Streaming a segmented text should produce the same chunks as chunk_text."""
+        paragraphs = ["This is a sentence about topic A. " * 40] * 50
+        expected = chunk_text("\n\n".join(paragraphs), "doc-1", "long.pdf")
+        streamed = list(iter_chunks(paragraphs, "doc-1", "long.pdf"))
+
+        assert [c.text for c in streamed] == [c.text for c in expected]
+
+    def test_sequential_indices_and_metadata(self):
+        """Chunk indices should be sequential and metadata should omit total_chunks."""
+        segments = (f"Row {i} | value {i}" for i in range(5000))
+        chunks = list(iter_chunks(segments, "abc-123", "sheet.xlsx", separator="\n"))
+
+        assert len(chunks) > 1
+        for i, chunk in enumerate(chunks):
+            assert chunk.chunk_index == i
+            assert chunk.metadata == {
+                "document_id": "abc-123",
+                "filename": "sheet.xlsx",
+                "chunk_index": i,
+                "token_count": count_tokens(chunk.text),
+            }
+
+    def test_consumes_segments_lazily(self):
+        """Chunks should be produced before the whole input has been read."""
+        consumed = 0
+
+        def segments():
+            nonlocal consumed
+            for _ in range(100_000):
+                consumed += 1
+                yield "Some streamed content. " * 10
+
+        first = next(iter_chunks(segments(), "doc-1", "stream.pdf"))
+        assert first.chunk_index == 0
+        assert consumed < 1000
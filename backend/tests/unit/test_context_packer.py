@@ -0,0 +1,69 @@
+"""Unit tests for token-budgeted context packing."""
+
+import pytest
+from app.core import tokens
+from app.services import context_packer
+from app.services.vector_store import SearchResult
+
+# Two chunks as the chunker produces them: the second repeats the end of the first
+FIRST = "Section 1. The pump must be primed before use. Check the seals every month."
+SECOND = "Check the seals every month. Replace worn seals immediately."
+
+
+def _hit(chunk_index: int, score: float, text: str, document_id: str = "doc-1") -> SearchResult:
+    return SearchResult(
+        text=text,
+        score=score,
+        document_id=document_id,
+        filename=f"{document_id}.pdf",
+        chunk_index=chunk_index,
+        token_count=tokens.count_tokens(text),
+    )
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    """Count tokens with the character estimate so tests need no tokenizer download."""
+    monkeypatch.setattr(tokens, "_get_encoding", lambda: None)
+
+
+class TestStripOverlap:
+    """Tests for removing text repeated between neighbouring chunks."""
+
+    def test_strips_repeated_prefix(self):
+        assert context_packer.strip_overlap(FIRST, SECOND) == " Replace worn seals immediately."
+
+    def test_ignores_short_coincidental_matches(self):
+        assert context_packer.strip_overlap("ends with a", "a new sentence") == "a new sentence"
+
+
+class TestPackContext:
+    """Tests for merging and budgeting search results."""
+
+    def test_merges_consecutive_chunks_once(self):
+        results = [_hit(1, 0.9, SECOND), _hit(5, 0.8, "Unrelated."), _hit(0, 0.7, FIRST)]
+
+        packed = context_packer.pack_context(results, token_budget=1000)
+
+        first, second = packed.passages
+        assert (first.first_chunk, first.last_chunk, first.score) == (0, 1, 0.9)
+        assert first.text == FIRST + " Replace worn seals immediately."
+        assert second.first_chunk == 5
+        assert packed.text.count("Check the seals every month.") == 1
+        assert packed.text.startswith("[Document 1: doc-1.pdf (Score: 0.90)]\n")
+        assert packed.tokens_saved > 0
+
+    def test_chunks_of_different_documents_stay_apart(self):
+        results = [_hit(0, 0.9, FIRST), _hit(1, 0.8, SECOND, document_id="doc-2")]
+
+        assert len(context_packer.merge_passages(results)) == 2
+
+    def test_budget_skips_passages_that_do_not_fit(self):
+        long_text = "word " * 400
+        results = [_hit(0, 0.9, "Short answer."), _hit(3, 0.8, long_text), _hit(7, 0.7, "Tail.")]
+
+        packed = context_packer.pack_context(results, token_budget=60)
+
+        assert [p.first_chunk for p in packed.passages] == [0, 7]
+        assert packed.tokens <= 60
+        assert packed.tokens_saved >= results[1].token_count
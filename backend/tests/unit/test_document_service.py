@@ -1,11 +1,36 @@
 """Unit tests for document service orchestration."""
 
+import hashlib
+import io
 import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from app.core.exceptions import DocumentProcessingError, NotFoundError
-from app.services import document_service
+from app.core.exceptions import (
+    ConflictError,
+    DocumentProcessingError,
+    FileTooLargeError,
+    NotFoundError,
+)
+from app.db.models import Document
+from app.services import document_service, vector_store
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class AsyncBytesReader:
+    """Minimal async upload stream over in-memory bytes."""
+
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = self._buf.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
 
 
 @pytest.fixture
@@ -15,14 +40,30 @@ def mock_db():
     db.add = MagicMock()
     db.flush = AsyncMock()
     db.delete = AsyncMock()
+    db.scalar = AsyncMock(return_value=None)  # no duplicate by default
     return db
 
 
+@pytest.fixture
+def mock_vector():
+    """Patch the vector store; the document has no stored points by default."""
+    with patch("app.services.document_service.vector_store", new_callable=AsyncMock) as mock:
+        mock.point_id = vector_store.point_id
+        mock.chunk_digest = vector_store.chunk_digest
+        mock.get_document_points.return_value = {}
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_answer_cache():
+    """Patch the answer cache so tests never touch its SQLite file."""
+    with patch("app.services.document_service.answer_cache", new_callable=AsyncMock) as mock:
+        yield mock
+
+
 @pytest.fixture
 def sample_docx_bytes():
     """Create a minimal Word document as bytes."""
-    import io
-
     from docx import Document
 
     doc = Document()
@@ -37,7 +78,6 @@ class TestProcessDocument:
     """Tests for the process_document function."""
 
     @pytest.mark.asyncio
-    @patch("app.services.document_service.vector_store")
     @patch("app.services.document_service.embedding_service")
     async def test_successful_processing(
         self, mock_embed_svc, mock_vector, mock_db, sample_docx_bytes
@@ -47,8 +87,7 @@ class TestProcessDocument:
         mock_embed_svc.embed_texts = AsyncMock(return_value=[[0.1] * 1536])
 
         # Mock vector store
-        mock_vector.ensure_collection = MagicMock()
-        mock_vector.upsert_chunks = MagicMock(return_value=1)
+        mock_vector.upsert_chunks = AsyncMock(return_value=1)
 
         content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         doc = await document_service.process_document(
@@ -64,7 +103,42 @@ class TestProcessDocument:
         assert doc.file_type == "docx"
         mock_db.add.assert_called_once()
         mock_embed_svc.embed_texts.assert_awaited_once()
-        mock_vector.upsert_chunks.assert_called_once()
+        mock_vector.upsert_chunks.assert_awaited_once()
+        mock_vector.set_document_payload.assert_awaited_once_with(
+            str(doc.id),
+            {"total_chunks": doc.chunk_count, "filename": "test.docx", "file_type": "docx"},
+        )
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.embedding_service")
+    async def test_embeds_in_micro_batches(self, mock_embed_svc, mock_vector, mock_db, monkeypatch):
+        """Chunks should be embedded and upserted in batches of ingestion_batch_size."""
+        from docx import Document
+
+        monkeypatch.setattr(document_service.settings, "ingestion_batch_size", 2)
+        mock_embed_svc.embed_texts = AsyncMock(side_effect=lambda texts: [[0.1]] * len(texts))
+
+        word_doc = Document()
+        for i in range(5):
+            word_doc.add_paragraph(f"Paragraph {i}. " * 200)  # > 1 chunk each
+        buf = io.BytesIO()
+        word_doc.save(buf)
+
+        content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        doc = await document_service.process_document(
+            filename="big.docx",
+            content_type=content_type,
+            file_bytes=buf.getvalue(),
+            db=mock_db,
+        )
+
+        batch_sizes = [len(call.args[0]) for call in mock_embed_svc.embed_texts.await_args_list]
+        assert max(batch_sizes) == 2
+        assert sum(batch_sizes) == doc.chunk_count
+        assert mock_vector.upsert_chunks.await_count == len(batch_sizes)
+        # Batches are not waited on individually; the final payload update is the barrier
+        assert all(not c.kwargs["wait"] for c in mock_vector.upsert_chunks.await_args_list)
+        mock_vector.set_document_payload.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_unsupported_type_rejected(self, mock_db):
@@ -101,8 +175,8 @@ class TestProcessDocument:
             )
 
     @pytest.mark.asyncio
-    @patch("app.services.document_service.extract_text")
-    async def test_extraction_failure_sets_error_status(self, mock_extract, mock_db):
+    @patch("app.services.document_service.extracted_segments")
+    async def test_extraction_failure_sets_error_status(self, mock_extract, mock_vector, mock_db):
         """On extraction failure, document status should be set to 'error'."""
         mock_extract.side_effect = DocumentProcessingError("Extraction failed")
 
@@ -120,6 +194,302 @@ class TestProcessDocument:
         assert added_doc.status == "error"
 
 
+class TestIncrementalIngestion:
+    """Tests for diffing a re-ingested document against its stored chunks."""
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.embedding_service")
+    async def test_only_changed_chunks_embedded(
+        self, mock_embed_svc, mock_vector, mock_answer_cache
+    ):
+        """Kept chunks are reused, new ones embedded, vanished ones deleted."""
+        # Each segment is long enough to become a chunk of its own
+        keep, moved, gone, new = ("a" * 1500, "b" * 1500, "c" * 1500, "d" * 1500)
+        doc = Document(id=uuid.uuid4(), filename="v2.docx", file_size_bytes=1, status="processing")
+        doc_id = str(doc.id)
+        mock_vector.get_document_points.return_value = {
+            vector_store.point_id(doc_id, keep): 0,
+            vector_store.point_id(doc_id, moved): 1,
+            vector_store.point_id(doc_id, gone): 2,
+        }
+        mock_embed_svc.embed_texts = AsyncMock(side_effect=lambda texts: [[0.1]] * len(texts))
+        saved = document_service.embedding_chunks_saved_total.labels(source="incremental")
+        saved_before = saved._value.get()
+
+        @asynccontextmanager
+        async def segments(source, content_type):
+            yield iter([keep, new, moved])
+
+        with patch("app.services.document_service.extracted_segments", segments):
+            await document_service.ingest_document(doc, b"", DOCX)
+
+        assert doc.status == "ready"
+        assert doc.chunk_count == 3
+        mock_embed_svc.embed_texts.assert_awaited_once_with([new])
+        upserted = mock_vector.upsert_chunks.await_args.args[1]
+        assert [c["id"] for c in upserted] == [vector_store.point_id(doc_id, new)]
+        mock_vector.delete_points.assert_awaited_once_with([vector_store.point_id(doc_id, gone)])
+        mock_vector.set_chunk_indexes.assert_awaited_once_with(
+            {vector_store.point_id(doc_id, moved): 2}
+        )
+        mock_answer_cache.invalidate_document.assert_awaited_once_with(doc_id)
+        assert saved._value.get() == saved_before + 2
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.embedding_service")
+    async def test_repeated_chunks_get_distinct_points(self, mock_embed_svc, mock_vector):
+        """Each repetition of a chunk's text is stored as its own point."""
+        text = "a" * 1500
+        doc = Document(id=uuid.uuid4(), filename="a.docx", file_size_bytes=1, status="processing")
+        doc_id = str(doc.id)
+        mock_embed_svc.embed_texts = AsyncMock(side_effect=lambda texts: [[0.1]] * len(texts))
+
+        @asynccontextmanager
+        async def segments(source, content_type):
+            yield iter([text, text])
+
+        with patch("app.services.document_service.extracted_segments", segments):
+            await document_service.ingest_document(doc, b"", DOCX)
+
+        upserted = mock_vector.upsert_chunks.await_args.args[1]
+        assert [c["id"] for c in upserted] == [
+            vector_store.point_id(doc_id, text, 0),
+            vector_store.point_id(doc_id, text, 1),
+        ]
+
+    def test_point_ids_are_deterministic(self):
+        doc_id = str(uuid.uuid4())
+        assert vector_store.point_id(doc_id, "text") == vector_store.point_id(doc_id, "text")
+        assert vector_store.point_id(doc_id, "text") != vector_store.point_id(doc_id, "text", 1)
+        assert vector_store.point_id(doc_id, "text") != vector_store.point_id("other", "text")
+        digest = vector_store.chunk_digest("text")
+        assert vector_store.point_id(doc_id, "text", digest=digest) == vector_store.point_id(
+            doc_id, "text"
+        )
+        # IDs of points stored by earlier versions must not change
+        legacy = uuid.uuid5(
+            vector_store.POINT_ID_NAMESPACE,
+            f"{doc_id}:{hashlib.sha256(b'text').hexdigest()}:0",
+        )
+        assert vector_store.point_id(doc_id, "text") == str(legacy)
+
+
+class TestReplaceDocument:
+    """Tests for the replace_document function."""
+
+    @pytest.fixture
+    def ready_doc(self, mock_db, sample_docx_bytes):
+        doc = Document(
+            id=uuid.uuid4(),
+            filename="v1.docx",
+            file_type="docx",
+            file_size_bytes=len(sample_docx_bytes),
+            content_hash=hashlib.sha256(sample_docx_bytes).hexdigest(),
+            status="ready",
+        )
+        mock_db.get = AsyncMock(return_value=doc)
+        return doc
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_new_version_queued(self, mock_queue, mock_db, ready_doc, tmp_path, monkeypatch):
+        """A changed file should update the document and queue re-ingestion."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        mock_queue.enqueue = AsyncMock()
+
+        doc = await document_service.replace_document(
+            str(ready_doc.id), "v2.docx", DOCX, AsyncBytesReader(b"new content"), mock_db
+        )
+
+        assert doc is ready_doc
+        assert doc.status == "processing"
+        assert doc.filename == "v2.docx"
+        assert doc.content_hash == hashlib.sha256(b"new content").hexdigest()
+        stored_path = mock_queue.enqueue.await_args.args[1]
+        assert Path(stored_path).read_bytes() == b"new content"
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_unchanged_upload_is_noop(
+        self, mock_queue, mock_db, ready_doc, sample_docx_bytes, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        mock_queue.enqueue = AsyncMock()
+
+        doc = await document_service.replace_document(
+            str(ready_doc.id), "v1.docx", DOCX, AsyncBytesReader(sample_docx_bytes), mock_db
+        )
+
+        assert doc.status == "ready"
+        mock_queue.enqueue.assert_not_called()
+        assert not any(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_document_in_processing_rejected(self, mock_db, ready_doc):
+        ready_doc.status = "processing"
+        stream = AsyncBytesReader(b"x")
+        with pytest.raises(ConflictError):
+            await document_service.replace_document(
+                str(ready_doc.id), "v2.docx", DOCX, stream, mock_db
+            )
+        assert stream.bytes_read == 0
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_row_locked_only_after_spool(
+        self, mock_queue, mock_db, ready_doc, tmp_path, monkeypatch
+    ):
+        """The row lock must not be held while the upload streams in."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        mock_queue.enqueue = AsyncMock()
+        stream = AsyncBytesReader(b"new content")
+        locked_after = []
+
+        async def get(model, ident, **kwargs):
+            if kwargs.get("with_for_update"):
+                locked_after.append(stream.bytes_read)
+            return ready_doc
+
+        mock_db.get = AsyncMock(side_effect=get)
+
+        await document_service.replace_document(str(ready_doc.id), "v2.docx", DOCX, stream, mock_db)
+
+        assert locked_after == [len(b"new content")]
+
+    @pytest.mark.asyncio
+    async def test_processing_started_during_spool_rejected(
+        self, mock_db, ready_doc, tmp_path, monkeypatch
+    ):
+        """A concurrent replacement that wins the lock first must cause a conflict."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        processing = Document(id=ready_doc.id, filename="v1.docx", status="processing")
+        mock_db.get = AsyncMock(side_effect=[ready_doc, processing])
+
+        with pytest.raises(ConflictError):
+            await document_service.replace_document(
+                str(ready_doc.id), "v2.docx", DOCX, AsyncBytesReader(b"new content"), mock_db
+            )
+        assert not any(tmp_path.iterdir())
+
+
+class TestSubmitDocument:
+    """Tests for the submit_document function."""
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_stores_file_and_enqueues_job(
+        self, mock_queue, mock_db, sample_docx_bytes, tmp_path, monkeypatch
+    ):
+        """Should save the upload, leave the document in 'processing' and queue a job."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        mock_queue.enqueue = AsyncMock()
+
+        content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        doc, created = await document_service.submit_document(
+            filename="test.docx",
+            content_type=content_type,
+            stream=AsyncBytesReader(sample_docx_bytes),
+            db=mock_db,
+        )
+
+        assert created is True
+        assert doc.status == "processing"
+        assert doc.content_hash == hashlib.sha256(sample_docx_bytes).hexdigest()
+        stored = tmp_path / str(doc.id)
+        assert stored.read_bytes() == sample_docx_bytes
+        mock_queue.enqueue.assert_awaited_once_with(doc.id, str(stored), content_type, mock_db)
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_duplicate_upload_returns_existing_document(
+        self, mock_queue, mock_db, sample_docx_bytes, tmp_path, monkeypatch
+    ):
+        """Re-uploading identical content should reuse the existing document."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        mock_queue.enqueue = AsyncMock()
+        existing = MagicMock(id=uuid.uuid4(), filename="original.docx", chunk_count=7)
+        mock_db.scalar = AsyncMock(return_value=existing)
+        saved_before = document_service.embedding_chunks_saved_total.labels(
+            source="duplicate_upload"
+        )._value.get()
+
+        doc, created = await document_service.submit_document(
+            filename="copy.docx",
+            content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            stream=AsyncBytesReader(sample_docx_bytes),
+            db=mock_db,
+        )
+
+        assert created is False
+        assert doc is existing
+        assert not any(tmp_path.iterdir())
+        mock_db.add.assert_not_called()
+        mock_queue.enqueue.assert_not_called()
+        assert (
+            document_service.embedding_chunks_saved_total.labels(
+                source="duplicate_upload"
+            )._value.get()
+            == saved_before + 7
+        )
+
+    @pytest.mark.asyncio
+    async def test_duplicate_lookup_matches_only_ready_documents(self, mock_db):
+        """A document still processing may fail, so it must not absorb re-uploads."""
+        await document_service._find_duplicate("ab" * 32, mock_db)
+
+        stmt = mock_db.scalar.await_args.args[0]
+        sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        assert "documents.status = 'ready'" in sql
+        assert "processing" not in sql
+
+    @pytest.mark.asyncio
+    async def test_invalid_upload_not_queued(self, mock_db):
+        """Validation errors should be raised before anything is stored."""
+        with pytest.raises(DocumentProcessingError, match="Unsupported file type"):
+            await document_service.submit_document(
+                filename="test.txt",
+                content_type="text/plain",
+                stream=AsyncBytesReader(b"some text"),
+                db=mock_db,
+            )
+        mock_db.add.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("app.services.document_service.ingestion_queue")
+    async def test_oversized_upload_rejected_while_streaming(
+        self, mock_queue, mock_db, tmp_path, monkeypatch
+    ):
+        """Should stop reading once the running size passes the limit and clean up."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        monkeypatch.setattr(document_service.settings, "max_upload_size_bytes", 3 * 1024 * 1024)
+        stream = AsyncBytesReader(b"x" * (10 * 1024 * 1024))
+
+        with pytest.raises(FileTooLargeError):
+            await document_service.submit_document(
+                filename="huge.pdf",
+                content_type="application/pdf",
+                stream=stream,
+                db=mock_db,
+            )
+
+        assert stream.bytes_read <= 4 * 1024 * 1024
+        assert not any(tmp_path.iterdir())
+        mock_db.add.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_empty_upload_rejected(self, mock_db, tmp_path, monkeypatch):
+        """Empty uploads should be rejected and their stored file removed."""
+        monkeypatch.setattr(document_service.settings, "upload_storage_dir", str(tmp_path))
+        with pytest.raises(DocumentProcessingError, match="empty"):
+            await document_service.submit_document(
+                filename="empty.pdf",
+                content_type="application/pdf",
+                stream=AsyncBytesReader(b""),
+                db=mock_db,
+            )
+        assert not any(tmp_path.iterdir())
+
+
 class TestListDocuments:
     """Tests for the list_documents function."""
 
@@ -151,17 +521,16 @@ class TestDeleteDocument:
     """Tests for the delete_document function."""
 
     @pytest.mark.asyncio
-    @patch("app.services.document_service.vector_store")
-    async def test_delete_calls_vector_store_and_db(self, mock_vector, mock_db):
+    async def test_delete_calls_vector_store_and_db(self, mock_vector, mock_db, mock_answer_cache):
         """Should delete from both Qdrant and PostgreSQL."""
         mock_doc = MagicMock()
         mock_doc.id = uuid.uuid4()
         mock_doc.filename = "test.pdf"
         mock_db.get = AsyncMock(return_value=mock_doc)
-        mock_vector.delete_by_document = MagicMock()
 
         doc_id = str(mock_doc.id)
         await document_service.delete_document(doc_id, mock_db)
 
-        mock_vector.delete_by_document.assert_called_once_with(doc_id)
+        mock_vector.delete_by_document.assert_awaited_once_with(doc_id)
+        mock_answer_cache.invalidate_document.assert_awaited_once_with(doc_id)
         mock_db.delete.assert_awaited_once_with(mock_doc)
@@ -0,0 +1,100 @@
+"""Unit tests for the persistent embedding cache."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.services import embedding_cache, embedding_service
+from app.services.embedding_cache import EmbeddingCache, text_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    yield cache
+    cache.close()
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache storage and eviction."""
+
+    def test_round_trip_as_float32(self, cache):
+        """Stored vectors should come back with float32 precision."""
+        key = text_key("hello")
+        cache.put_many({key: [0.5, -1.25, 0.1]}, "model-a", 0)
+
+        found = cache.get_many([key, text_key("other")], "model-a", 0)
+
+        assert list(found) == [key]
+        assert found[key][:2] == [0.5, -1.25]
+        assert found[key][2] == pytest.approx(0.1, rel=1e-6)
+
+    def test_keyed_by_model_and_dimensions(self, cache):
+        """The same text under another model or dimension count should miss."""
+        key = text_key("hello")
+        cache.put_many({key: [1.0]}, "model-a", 0)
+
+        assert cache.get_many([key], "model-b", 0) == {}
+        assert cache.get_many([key], "model-a", 256) == {}
+
+    def test_persists_across_instances(self, tmp_path):
+        """Entries should survive reopening the cache file."""
+        path = str(tmp_path / "cache.sqlite3")
+        first = EmbeddingCache(path, max_entries=10)
+        first.put_many({text_key("hello"): [1.0, 2.0]}, "model-a", 0)
+        first.close()
+
+        second = EmbeddingCache(path, max_entries=10)
+        assert len(second) == 1
+        assert second.get_many([text_key("hello")], "model-a", 0)[text_key("hello")] == [1.0, 2.0]
+        second.close()
+
+    def test_evicts_least_recently_used(self, cache, monkeypatch):
+        """Filling the cache past max_entries should drop the oldest unused entries."""
+        clock = iter(range(1000))
+        monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock))
+        keys = [text_key(f"text {i}") for i in range(10)]
+        for key in keys:
+            cache.put_many({key: [1.0]}, "m", 0)
+        cache.get_many([keys[0]], "m", 0)  # refresh the oldest entry
+
+        cache.put_many({text_key("new"): [1.0]}, "m", 0)
+
+        assert len(cache) == 9
+        remaining = cache.get_many([*keys, text_key("new")], "m", 0)
+        assert keys[0] in remaining
+        assert text_key("new") in remaining
+        assert keys[1] not in remaining and keys[2] not in remaining
+
+
+class TestEmbedTextsWithCache:
+    """Tests for cache use in embedding_service.embed_texts."""
+
+    @pytest.mark.asyncio
+    async def test_only_misses_sent_to_openai(self, cache, monkeypatch):
+        """Cached texts should be served locally and repeated misses sent once."""
+        monkeypatch.setattr(embedding_cache, "get_cache", lambda: cache)
+        monkeypatch.setattr(embedding_service.settings, "openai_embedding_dimensions", 1)
+        cache.put_many(
+            {text_key("cached"): [9.0]}, embedding_service.settings.openai_embedding_model, 1
+        )
+        client = MagicMock()
+        client.embeddings.create = AsyncMock(
+            return_value=SimpleNamespace(
+                data=[
+                    SimpleNamespace(index=0, embedding=[1.0]),
+                    SimpleNamespace(index=1, embedding=[2.0]),
+                ]
+            )
+        )
+        monkeypatch.setattr(embedding_service, "_get_client", lambda: client)
+
+        vectors = await embedding_service.embed_texts(["a", "cached", "b", "a"])
+
+        assert vectors == [[1.0], [9.0], [2.0], [1.0]]
+        assert client.embeddings.create.await_args.kwargs["input"] == ["a", "b"]
+
+        # Second call is served entirely from the cache
+        client.embeddings.create.reset_mock()
+        assert await embedding_service.embed_texts(["b", "a"]) == [[2.0], [1.0]]
+        client.embeddings.create.assert_not_awaited()
@@ -0,0 +1,193 @@
+"""Unit tests for embedding request batching and retries."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import openai
+import pytest
+from app.core.exceptions import LLMError
+from app.services import embedding_service
+
+
+def _rate_limit_error(headers: dict[str, str]) -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://test/embeddings")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def _response(texts: list[str]):
+    """Embedding response echoing each text's length, in reverse index order."""
+    data = [SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(texts)]
+    return SimpleNamespace(data=list(reversed(data)))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr(embedding_service, "_get_client", lambda: client)
+    monkeypatch.setattr(embedding_service.embedding_cache, "get_cache", lambda: None)
+    monkeypatch.setattr(embedding_service.settings, "openai_embedding_dimensions", 1)
+    return client
+
+
+class TestBatchRanges:
+    """Tests for splitting inputs into requests."""
+
+    def test_bounded_by_input_count(self):
+        assert embedding_service._batch_ranges(["a"] * 5, max_inputs=2, max_tokens=100) == [
+            (0, 2),
+            (2, 4),
+            (4, 5),
+        ]
+
+    def test_bounded_by_estimated_tokens(self):
+        texts = ["x" * 40] * 4  # 11 estimated tokens each
+        assert embedding_service._batch_ranges(texts, max_inputs=100, max_tokens=25) == [
+            (0, 2),
+            (2, 4),
+        ]
+
+    def test_oversized_text_gets_own_batch(self):
+        texts = ["a", "x" * 400, "b"]
+        assert embedding_service._batch_ranges(texts, max_inputs=100, max_tokens=10) == [
+            (0, 1),
+            (1, 2),
+            (2, 3),
+        ]
+
+
+class TestCreateEmbeddings:
+    """Tests for concurrent fan-out and retries."""
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_and_reassemble_in_order(self, client, monkeypatch):
+        """Vectors should come back in input order under the concurrency cap."""
+        monkeypatch.setattr(embedding_service.settings, "embedding_batch_max_inputs", 2)
+        monkeypatch.setattr(embedding_service.settings, "embedding_max_concurrency", 2)
+        in_flight = peak = 0
+
+        async def create(model, input, dimensions):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Earlier batches finish last
+            await asyncio.sleep(0.01 * (10 - len(input[0])))
+            in_flight -= 1
+            return _response(input)
+
+        client.embeddings.create = create
+        texts = ["x" * n for n in range(1, 8)]
+
+        vectors = await embedding_service.embed_texts(texts)
+
+        assert vectors == [[float(n)] for n in range(1, 8)]
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_retried_after_retry_after(self, client, monkeypatch):
+        """A 429 should be retried after the delay the server asked for."""
+        sleep = AsyncMock()
+        monkeypatch.setattr(embedding_service.asyncio, "sleep", sleep)
+        client.embeddings.create = AsyncMock(
+            side_effect=[_rate_limit_error({"retry-after": "3"}), _response(["hello"])]
+        )
+
+        assert await embedding_service.embed_texts(["hello"]) == [[5.0]]
+        sleep.assert_awaited_once_with(3.0)
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, client, monkeypatch):
+        """Persistent rate limiting should surface after the configured retries."""
+        monkeypatch.setattr(embedding_service.asyncio, "sleep", AsyncMock())
+        monkeypatch.setattr(embedding_service.settings, "embedding_max_retries", 2)
+        client.embeddings.create = AsyncMock(side_effect=_rate_limit_error({}))
+
+        with pytest.raises(openai.RateLimitError):
+            await embedding_service.embed_texts(["hello"])
+        assert client.embeddings.create.await_count == 3
+
+    def test_retry_delay_prefers_retry_after_ms(self, monkeypatch):
+        error = _rate_limit_error({"retry-after-ms": "250", "retry-after": "9"})
+        assert embedding_service._retry_delay(error, attempt=1) == 0.25
+
+
+class TestEmbeddingDimensions:
+    """Tests for requesting reduced-dimension embeddings."""
+
+    @pytest.mark.asyncio
+    async def test_dimensions_requested_from_text_embedding_3(self, client, monkeypatch):
+        monkeypatch.setattr(
+            embedding_service.settings, "openai_embedding_model", "text-embedding-3-large"
+        )
+        client.embeddings.create = AsyncMock(return_value=_response(["a"]))
+
+        await embedding_service.embed_texts(["a"])
+
+        assert client.embeddings.create.await_args.kwargs["dimensions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dimensions_omitted_for_older_models(self, client, monkeypatch):
+        monkeypatch.setattr(
+            embedding_service.settings, "openai_embedding_model", "text-embedding-ada-002"
+        )
+        client.embeddings.create = AsyncMock(return_value=_response(["a"]))
+
+        await embedding_service.embed_texts(["a"])
+
+        assert client.embeddings.create.await_args.kwargs["dimensions"] is openai.NOT_GIVEN
+
+    @pytest.mark.asyncio
+    async def test_wrong_size_rejected(self, client, monkeypatch):
+        """Vectors of another size must not reach the cache or the collection."""
+        monkeypatch.setattr(embedding_service.settings, "openai_embedding_dimensions", 256)
+        client.embeddings.create = AsyncMock(return_value=_response(["a"]))
+
+        with pytest.raises(LLMError, match="expected 256"):
+            await embedding_service.embed_texts(["a"])
+
+
+class TestEmbeddingCoalescer:
+    """Tests for coalescing concurrent embed_query calls."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_request(self, monkeypatch):
+        """Queries in the same window should go out as one deduplicated batch."""
+        embed_texts = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+        monkeypatch.setattr(embedding_service, "embed_texts", embed_texts)
+        coalescer = embedding_service.EmbeddingCoalescer(window_seconds=0.01, max_batch_size=10)
+
+        vectors = await asyncio.gather(
+            coalescer.embed("a"), coalescer.embed("bb"), coalescer.embed("a")
+        )
+
+        assert vectors == [[1.0], [2.0], [1.0]]
+        embed_texts.assert_awaited_once_with(["a", "bb"])
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_immediately(self, monkeypatch):
+        """Reaching max_batch_size should send without waiting for the window."""
+        embed_texts = AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts))
+        monkeypatch.setattr(embedding_service, "embed_texts", embed_texts)
+        coalescer = embedding_service.EmbeddingCoalescer(window_seconds=60, max_batch_size=2)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(coalescer.embed(t) for t in ["a", "b", "c", "d"])), timeout=1
+        )
+
+        assert [call.args[0] for call in embed_texts.await_args_list] == [["a", "b"], ["c", "d"]]
+
+    @pytest.mark.asyncio
+    async def test_failure_reaches_every_caller(self, monkeypatch):
+        """A failed batch request should raise in each waiting caller."""
+        monkeypatch.setattr(
+            embedding_service, "embed_texts", AsyncMock(side_effect=RuntimeError("down"))
+        )
+        coalescer = embedding_service.EmbeddingCoalescer(window_seconds=0.001, max_batch_size=10)
+
+        results = await asyncio.gather(
+            coalescer.embed("a"), coalescer.embed("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,181 @@
+"""Unit tests for the extraction process pool."""
+
+import asyncio
+import io
+import time
+from unittest.mock import patch
+
+import pytest
+from app.core.exceptions import DocumentProcessingError
+from app.document_processing import pool
+from app.document_processing.extractors import SEGMENT_SEPARATORS, extract_text, get_file_type
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _make_pdf(page_texts: list[str]) -> bytes:
+    """Build a minimal PDF with one line of text per page ("" = blank page)."""
+    n = len(page_texts)
+    font_ref = 3 + 2 * n
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(n))}] /Count {n} >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET" if text else ""
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    buf = io.BytesIO()
+    buf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(buf.tell())
+        buf.write(f"{number} 0 obj\n{obj}\nendobj\n".encode())
+    xref = buf.tell()
+    buf.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        buf.write(f"{offset:010d} 00000 n \n".encode())
+    buf.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    )
+    return buf.getvalue()
+
+
+def _slow_extract(file_bytes: bytes, content_type: str, out_path: str) -> int:
+    """Stand-in extractor that never finishes in time."""
+    time.sleep(30)
+    return 0
+
+
+def _sleep_then_return(seconds: float) -> str:
+    """Stand-in task that finishes, given the time."""
+    time.sleep(seconds)
+    return "done"
+
+
+@pytest.fixture
+def docx_bytes():
+    """Create a minimal Word document as bytes."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("Extracted in a worker process.")
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    """Run a single small pool per test and tear it down afterwards."""
+    monkeypatch.setattr(pool.settings, "extraction_pool_workers", 1)
+    monkeypatch.setattr(pool.settings, "extraction_timeout_seconds", 60.0)
+    yield pool.settings
+    pool.shutdown_pool()
+
+
+async def _extract(file_bytes: bytes, content_type: str) -> str:
+    """Extract through the pool and join the segments like extract_text does."""
+    separator = SEGMENT_SEPARATORS[get_file_type(content_type)]
+    async with pool.extracted_segments(file_bytes, content_type) as segments:
+        return separator.join(segments)
+
+
+class TestExtractedSegments:
+    """Tests for extracted_segments."""
+
+    @pytest.mark.asyncio
+    async def test_extracts_in_worker_process(self, pool_settings, docx_bytes):
+        """Should return the same text as the in-process extractor."""
+        text = await _extract(docx_bytes, DOCX)
+        assert "Extracted in a worker process." in text
+
+    @pytest.mark.asyncio
+    async def test_extraction_errors_propagate(self, pool_settings):
+        """DocumentProcessingError raised in the worker should reach the caller."""
+        with pytest.raises(DocumentProcessingError, match="Failed to extract"):
+            await _extract(b"not a real pdf", "application/pdf")
+
+    @pytest.mark.asyncio
+    async def test_timeout_recycles_pool(self, pool_settings, docx_bytes):
+        """A parse exceeding the timeout should fail and leave a working pool behind."""
+        pool_settings.extraction_timeout_seconds = 0.5
+        with (
+            patch("app.document_processing.pool.write_segments", _slow_extract),
+            pytest.raises(DocumentProcessingError, match="timed out"),
+        ):
+            await _extract(docx_bytes, DOCX)
+
+        pool_settings.extraction_timeout_seconds = 60.0
+        text = await _extract(docx_bytes, DOCX)
+        assert "Extracted in a worker process." in text
+
+    @pytest.mark.asyncio
+    async def test_timeout_spares_concurrent_tasks(self, pool_settings):
+        """Tasks killed along with a timed-out one are retried on a fresh pool."""
+        pool_settings.extraction_pool_workers = 2
+
+        timed_out, collateral = await asyncio.gather(
+            pool._run(_slow_extract, b"", DOCX, "unused", timeout=1.0),
+            pool._run(_sleep_then_return, 2.0, timeout=60.0),
+            return_exceptions=True,
+        )
+
+        assert isinstance(timed_out, DocumentProcessingError)
+        assert "timed out after 1.0s" in timed_out.message
+        assert collateral == "done"
+
+    @pytest.mark.asyncio
+    async def test_thread_fallback_when_disabled(self, pool_settings, docx_bytes):
+        """With zero workers extraction should run in a thread instead."""
+        pool_settings.extraction_pool_workers = 0
+        text = await _extract(docx_bytes, DOCX)
+        assert "Extracted in a worker process." in text
+        assert pool._executor is None
+
+    @pytest.mark.asyncio
+    async def test_temp_files_removed(self, pool_settings, docx_bytes, tmp_path, monkeypatch):
+        """Segment files should be cleaned up when the context exits."""
+        monkeypatch.setattr(pool.tempfile, "tempdir", str(tmp_path))
+        async with pool.extracted_segments(docx_bytes, DOCX) as segments:
+            assert list(segments) == ["Extracted in a worker process."]
+            assert any(tmp_path.iterdir())
+        assert not any(tmp_path.iterdir())
+
+
+class TestParallelPdf:
+    """Tests for page-parallel PDF extraction."""
+
+    def test_page_ranges_cover_all_pages(self):
+        """Ranges should be consecutive, bounded and cover every page exactly once."""
+        assert pool._page_ranges(5, 2) == [(0, 2), (2, 4), (4, 5)]
+        assert pool._page_ranges(3, 50) == [(0, 3)]
+        assert pool._page_ranges(0, 50) == []
+
+    @pytest.mark.asyncio
+    async def test_matches_sequential_output(self, pool_settings):
+        """Parallel extraction should reproduce the sequential markers and order exactly."""
+        pool_settings.extraction_pool_workers = 2
+        pool_settings.pdf_parallel_min_pages = 2
+        pool_settings.pdf_pages_per_task = 2
+        pdf_bytes = _make_pdf(["Alpha", "", "Gamma", "Delta", "Epsilon"])
+
+        text = await _extract(pdf_bytes, "application/pdf")
+
+        assert text == extract_text(pdf_bytes, "application/pdf")
+        assert text.startswith("--- Page 1 ---\nAlpha")
+        assert "--- Page 2 ---" not in text
+        assert text.index("--- Page 4 ---") < text.index("--- Page 5 ---")
+
+    @pytest.mark.asyncio
+    async def test_corrupted_pdf_raises_error(self, pool_settings):
+        """Unreadable PDFs should surface as DocumentProcessingError."""
+        pool_settings.extraction_pool_workers = 2
+        pool_settings.pdf_parallel_min_pages = 2
+        with pytest.raises(DocumentProcessingError, match="Failed to extract"):
+            await _extract(b"not a real pdf", "application/pdf")
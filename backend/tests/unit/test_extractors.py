@@ -4,7 +4,13 @@ import io
 
 import pytest
 from app.core.exceptions import DocumentProcessingError
-from app.document_processing.extractors import SUPPORTED_TYPES, extract_text
+from app.document_processing.extractors import (
+    SUPPORTED_TYPES,
+    extract_text,
+    iter_segments,
+    read_segments,
+    write_segments,
+)
 
 
 class TestExtractText:
@@ -148,3 +154,69 @@ class TestExtractPptx:
 
         assert "Slide Title" in result
         assert "Bullet point content" in result
+
+
+class TestSegments:
+    """Tests for segment streaming."""
+
+    def test_xlsx_segments_are_rows(self):
+        """Spreadsheets should stream a sheet header followed by one segment per row."""
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Sales"
+        ws.append(["Product", "Revenue"])
+        ws.append(["Widget A", 1500])
+
+        buf = io.BytesIO()
+        wb.save(buf)
+
+        content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        segments = list(iter_segments(buf.getvalue(), content_type))
+
+        assert segments == ["--- Sheet: Sales ---", "Product | Revenue", "Widget A | 1500"]
+
+    def test_segment_file_round_trip(self, tmp_path):
+        """Segments written to a segment file should read back unchanged."""
+        from pptx import Presentation
+
+        prs = Presentation()
+        for title in ("First", "Second\nline"):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            slide.shapes.title.text = title
+
+        buf = io.BytesIO()
+        prs.save(buf)
+        content_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        out_path = str(tmp_path / "segments.jsonl")
+
+        count = write_segments(buf.getvalue(), content_type, out_path)
+
+        assert count == 2
+        assert list(read_segments(out_path)) == list(iter_segments(buf.getvalue(), content_type))
+
+
+class TestPathSources:
+    """Extractors should accept a file path as well as bytes."""
+
+    def test_docx_from_path_matches_bytes(self, tmp_path):
+        """Extracting from a stored file should give the same text as from bytes."""
+        from docx import Document
+
+        doc = Document()
+        doc.add_paragraph("Read straight from disk")
+        path = tmp_path / "doc.docx"
+        doc.save(path)
+
+        content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        assert extract_text(str(path), content_type) == extract_text(
+            path.read_bytes(), content_type
+        )
+
+    def test_corrupted_pdf_path_raises_error(self, tmp_path):
+        """Memory-mapped PDF paths should surface parse errors the same way."""
+        path = tmp_path / "bad.pdf"
+        path.write_bytes(b"not a real pdf")
+        with pytest.raises(DocumentProcessingError, match="Failed to extract"):
+            extract_text(str(path), "application/pdf")
@@ -0,0 +1,122 @@
+"""Unit tests for the local fast-path router."""
+
+import numpy as np
+import pytest
+from app.agents import fast_router
+from app.agents.fast_router import CentroidModel, evaluate, match_rules, training_examples
+
+
+def _vector(*hot: int, dims: int = 8) -> np.ndarray:
+    vector = np.full(dims, 0.01, dtype=np.float32)
+    vector[list(hot)] = 1.0
+    return vector
+
+
+class TestRules:
+    """Tests for the keyword rules."""
+
+    @pytest.mark.parametrize(
+        ("query", "route"),
+        [
+            ("Hello there!", "general_chat"),
+            ("thanks", "general_chat"),
+            ("Summarize the uploaded PDF.", "rag"),
+            ("How many customers in London?", "sql"),
+            ("Top 5 products by revenue", "sql"),
+        ],
+    )
+    def test_unambiguous_queries(self, query, route):
+        decision = match_rules(query)
+        assert decision.destination == route
+        assert decision.confidence == 1.0
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "What is IPython?",
+            "Which products does the document list as most popular?",
+            "How many orders are mentioned in the uploaded file?",
+        ],
+    )
+    def test_no_match_or_conflict_defers(self, query):
+        assert match_rules(query) is None
+
+
+class TestCentroidModel:
+    """Tests for the nearest-centroid classifier."""
+
+    def _model(self) -> CentroidModel:
+        vectors = np.stack([_vector(0), _vector(0, 1), _vector(4), _vector(4, 5)])
+        return CentroidModel.fit(vectors, ["rag", "rag", "sql", "sql"], "model:8")
+
+    def test_predicts_nearest_centroid_with_confidence(self):
+        model = self._model()
+
+        confident = model.predict(_vector(0))
+        assert confident.destination == "rag"
+        assert confident.confidence > 0.99
+        assert confident.source == "centroid"
+
+        # Equally close to both centroids
+        assert model.predict(_vector(0, 4)).confidence == pytest.approx(0.5, abs=0.05)
+
+    def test_save_and_load(self, tmp_path):
+        model = self._model()
+        path = str(tmp_path / "router.npz")
+        model.save(path)
+
+        loaded = CentroidModel.load(path)
+        assert loaded.labels == ["rag", "sql"]
+        assert loaded.embedding_model == "model:8"
+        assert loaded.examples == 4
+        np.testing.assert_allclose(loaded.centroids, model.centroids)
+
+    def test_model_for_another_embedding_model_is_ignored(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "router.npz")
+        self._model().save(path)
+        monkeypatch.setattr(fast_router.settings, "fast_router_model_path", path)
+        fast_router.reset_model()
+        try:
+            assert fast_router.get_model() is None
+            monkeypatch.setattr(fast_router, "embedding_namespace", lambda: "model:8")
+            fast_router.reset_model()
+            assert fast_router.get_model().labels == ["rag", "sql"]
+        finally:
+            fast_router.reset_model()
+
+
+class TestTraining:
+    """Tests for training data extraction and evaluation."""
+
+    def test_pairs_questions_with_routes(self):
+        rows = [
+            ("s1", "user", "How many orders?", None, None),
+            ("s2", "user", "Hi", None, None),
+            ("s1", "assistant", "42", "sql", {"context_source": "northwind_db"}),
+            ("s2", "assistant", "Hello!", "general_chat", {"route_source": "llm"}),
+            ("s1", "user", "Top customer?", None, None),
+            ("s1", "assistant", "ALFKI", "text_to_sql", None),
+            ("s1", "user", "Summarize the PDF", None, None),
+            ("s1", "assistant", "...", "rag", {"route_source": "rules"}),
+            ("s2", "assistant", "orphan", "rag", None),
+        ]
+
+        assert training_examples(rows) == [
+            ("How many orders?", "sql"),
+            ("Hi", "general_chat"),
+            ("Top customer?", "sql"),
+        ]
+
+    def test_evaluate_reports_coverage_and_agreement(self):
+        model = CentroidModel.fit(np.stack([_vector(0), _vector(4)]), ["rag", "sql"], "model:8")
+        questions = ["Hello", "What is python?", "Explain invoices", "Something vague"]
+        vectors = np.stack([_vector(0), _vector(0), _vector(0), _vector(0, 4)])
+        labels = ["general_chat", "rag", "sql", "rag"]
+
+        result = evaluate(model, questions, vectors, labels, min_confidence=0.8)
+
+        assert result.examples == 4
+        assert result.by_source == {"rules": (1, 1), "centroid": (2, 1)}
+        assert result.coverage == 0.75
+        assert result.agreement == pytest.approx(2 / 3)
+        assert result.centroid_accuracy == 0.5  # the tie goes to the first label
@@ -0,0 +1,278 @@
+"""Unit tests for the ingestion queue and worker."""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app import worker
+from app.core.exceptions import DocumentProcessingError
+from app.db.models import Document, IngestionJob
+from app.services import ingestion_queue
+
+
+@pytest.fixture
+def mock_db():
+    """Create a mock async database session."""
+    db = AsyncMock()
+    db.add = MagicMock()
+    return db
+
+
+@pytest.fixture
+def session_factory(mock_db):
+    """Patch the worker's session factory to yield the mock session."""
+
+    @asynccontextmanager
+    async def factory():
+        yield mock_db
+
+    with patch("app.worker.async_session_factory", factory):
+        yield factory
+
+
+@pytest.fixture
+def job(tmp_path):
+    """A claimed job whose upload exists on disk."""
+    file_path = tmp_path / "upload"
+    file_path.write_bytes(b"file content")
+    return IngestionJob(
+        id=uuid.uuid4(),
+        document_id=uuid.uuid4(),
+        file_path=str(file_path),
+        content_type="application/pdf",
+        status="processing",
+        attempts=1,
+        max_attempts=3,
+    )
+
+
+class TestBackoffDelay:
+    """Tests for the retry backoff schedule."""
+
+    def test_exponential_growth(self, monkeypatch):
+        """Delay should double with every attempt."""
+        monkeypatch.setattr(ingestion_queue.settings, "ingestion_retry_backoff_seconds", 10.0)
+        monkeypatch.setattr(ingestion_queue.settings, "ingestion_retry_backoff_max_seconds", 1e6)
+        assert ingestion_queue.backoff_delay(1) == 10.0
+        assert ingestion_queue.backoff_delay(2) == 20.0
+        assert ingestion_queue.backoff_delay(4) == 80.0
+
+    def test_capped(self, monkeypatch):
+        """Delay should never exceed the configured maximum."""
+        monkeypatch.setattr(ingestion_queue.settings, "ingestion_retry_backoff_seconds", 10.0)
+        monkeypatch.setattr(ingestion_queue.settings, "ingestion_retry_backoff_max_seconds", 60.0)
+        assert ingestion_queue.backoff_delay(10) == 60.0
+
+
+class TestProcessJob:
+    """Tests for process_job."""
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    @patch("app.worker.document_service")
+    async def test_success_completes_job_and_removes_file(
+        self, mock_doc_svc, mock_queue, mock_db, session_factory, job
+    ):
+        """A successful run should commit, complete the job and drop the stored upload."""
+        doc = Document(id=job.document_id, filename="a.pdf", status="processing")
+        mock_db.get = AsyncMock(return_value=doc)
+        mock_doc_svc.ingest_document = AsyncMock(return_value=doc)
+        mock_queue.complete = AsyncMock()
+
+        await worker.process_job(job, "worker-1")
+
+        mock_doc_svc.ingest_document.assert_awaited_once_with(doc, job.file_path, "application/pdf")
+        mock_db.commit.assert_awaited()
+        mock_queue.complete.assert_awaited_once_with(job.id, "worker-1", mock_db)
+        assert not worker.Path(job.file_path).exists()
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    @patch("app.worker.document_service")
+    async def test_transient_error_is_retryable(
+        self, mock_doc_svc, mock_queue, mock_db, session_factory, job
+    ):
+        """Unexpected errors should fail the attempt as retryable and keep the upload."""
+        mock_db.get = AsyncMock(return_value=Document(id=job.document_id, filename="a.pdf"))
+        mock_doc_svc.ingest_document = AsyncMock(side_effect=ConnectionError("qdrant down"))
+        mock_queue.fail = AsyncMock(return_value=True)
+
+        await worker.process_job(job, "worker-1")
+
+        mock_queue.fail.assert_awaited_once_with(
+            job, "worker-1", "qdrant down", mock_db, retryable=True
+        )
+        assert worker.Path(job.file_path).exists()
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    @patch("app.worker.document_service")
+    async def test_processing_error_is_permanent(
+        self, mock_doc_svc, mock_queue, mock_db, session_factory, job
+    ):
+        """DocumentProcessingError means bad content and should not be retried."""
+        mock_db.get = AsyncMock(return_value=Document(id=job.document_id, filename="a.pdf"))
+        mock_doc_svc.ingest_document = AsyncMock(
+            side_effect=DocumentProcessingError("No text content found in document")
+        )
+        mock_queue.fail = AsyncMock(return_value=False)
+
+        await worker.process_job(job, "worker-1")
+
+        mock_queue.fail.assert_awaited_once_with(
+            job, "worker-1", "No text content found in document", mock_db, retryable=False
+        )
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    async def test_deleted_document_completes_job(self, mock_queue, mock_db, session_factory, job):
+        """Jobs for documents deleted while queued should simply be completed."""
+        mock_db.get = AsyncMock(return_value=None)
+        mock_queue.complete = AsyncMock()
+
+        await worker.process_job(job, "worker-1")
+
+        mock_queue.complete.assert_awaited_once_with(job.id, "worker-1", mock_db)
+
+
+class TestFail:
+    """Tests for ingestion_queue.fail."""
+
+    @pytest.mark.asyncio
+    async def test_retries_until_max_attempts(self, mock_db, job):
+        """Jobs under max_attempts should be requeued."""
+        assert await ingestion_queue.fail(job, "worker-1", "boom", mock_db) is True
+
+        job.attempts = job.max_attempts
+        assert await ingestion_queue.fail(job, "worker-1", "boom", mock_db) is False
+
+    @pytest.mark.asyncio
+    async def test_permanent_error_not_retried(self, mock_db, job):
+        """Non-retryable failures should give up immediately."""
+        assert await ingestion_queue.fail(job, "worker-1", "bad", mock_db, retryable=False) is False
+
+
+def _assert_held(lease) -> None:
+    assert lease.held, "bulk-load mode switched without holding the lease"
+
+
+class TestBulkLoadLoop:
+    """Tests for switching the collection to bulk-load mode under the shared lease."""
+
+    @pytest.fixture
+    def lease(self, monkeypatch):
+        """Patch the bulk-load lease; ``available=False`` means another node holds it."""
+        state = SimpleNamespace(available=True, held=False, released=0)
+
+        @asynccontextmanager
+        async def hold():
+            state.held = state.available
+            try:
+                yield state.available
+            finally:
+                state.held = False
+                state.released += 1
+
+        monkeypatch.setattr(worker.bulk_load_lease, "hold", hold)
+        return state
+
+    @pytest.fixture
+    def mock_vector(self, lease):
+        with patch("app.worker.vector_store") as mock:
+            mock.ensure_collection = AsyncMock()
+            # Indexing may only be switched while the lease is held
+            mock.begin_bulk_load = AsyncMock(side_effect=lambda: _assert_held(lease))
+            mock.end_bulk_load = AsyncMock(side_effect=lambda: _assert_held(lease))
+            yield mock
+
+    @staticmethod
+    async def _run(backlogs: list[int], monkeypatch) -> None:
+        """Run the loop over the given backlog readings, stopping after the last."""
+        monkeypatch.setattr(worker, "BULK_LOAD_CHECK_SECONDS", 0)
+        pool = worker.IngestionWorkerPool(concurrency=1)
+
+        async def backlog(db):
+            if len(backlogs) == 1:
+                pool._stopping.set()
+            return backlogs.pop(0)
+
+        monkeypatch.setattr(worker.ingestion_queue, "backlog", backlog)
+        await pool._bulk_load_loop()
+
+    @pytest.mark.asyncio
+    async def test_lease_holder_toggles_indexing(
+        self, lease, mock_vector, session_factory, monkeypatch
+    ):
+        await self._run([100, 5, 0], monkeypatch)
+
+        mock_vector.begin_bulk_load.assert_awaited_once()
+        mock_vector.end_bulk_load.assert_awaited_once()
+        assert lease.released == 1
+        assert not lease.held
+
+    @pytest.mark.asyncio
+    async def test_other_nodes_leave_indexing_alone(
+        self, lease, mock_vector, session_factory, monkeypatch
+    ):
+        """While another node holds the lease, a backlog does not start a bulk load."""
+        lease.available = False
+
+        await self._run([100, 100, 0], monkeypatch)
+
+        mock_vector.begin_bulk_load.assert_not_awaited()
+        mock_vector.end_bulk_load.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stopping_restores_indexing_and_releases_lease(
+        self, lease, mock_vector, session_factory, monkeypatch
+    ):
+        await self._run([100], monkeypatch)
+
+        mock_vector.end_bulk_load.assert_awaited_once()
+        assert lease.released == 1
+
+
+class TestHeartbeat:
+    """Tests for lease renewal while a job is processed."""
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    async def test_lost_lease_cancels_processing(
+        self, mock_queue, session_factory, job, monkeypatch
+    ):
+        """Once another worker owns the job, this one must stop working on it."""
+        monkeypatch.setattr(worker.settings, "ingestion_lease_seconds", 1)
+        mock_queue.claim_next = AsyncMock(return_value=job)
+        mock_queue.renew_lease = AsyncMock(return_value=False)
+        cancelled = asyncio.Event()
+
+        async def slow_process_job(job, worker_id):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        monkeypatch.setattr(worker, "process_job", slow_process_job)
+
+        processed = await asyncio.wait_for(
+            worker.IngestionWorkerPool(concurrency=1).run_once("worker-1"), 5
+        )
+
+        assert processed is True
+        assert cancelled.is_set()
+        mock_queue.renew_lease.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("app.worker.ingestion_queue")
+    async def test_processing_errors_still_propagate(
+        self, mock_queue, session_factory, job, monkeypatch
+    ):
+        mock_queue.claim_next = AsyncMock(return_value=job)
+        monkeypatch.setattr(worker, "process_job", AsyncMock(side_effect=RuntimeError("boom")))
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await worker.IngestionWorkerPool(concurrency=1).run_once("worker-1")
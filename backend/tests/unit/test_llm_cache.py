@@ -0,0 +1,118 @@
+"""Unit tests for the deterministic LLM call cache."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from app.services import llm_cache
+from app.services.llm_cache import LLMCache, cache_key
+
+
+class TestCacheKey:
+    """Tests for cache key construction."""
+
+    def test_inputs_are_normalized(self):
+        assert cache_key("route", "prompt", "gpt-4o", input="How many  orders?\n") == cache_key(
+            "route", "prompt", "gpt-4o", input=" How many orders?"
+        )
+
+    def test_prompt_model_and_context_are_part_of_the_key(self):
+        base = cache_key("sql", "prompt v1", "gpt-4o", question="q", schema="abc")
+
+        assert base != cache_key("sql", "prompt v2", "gpt-4o", question="q", schema="abc")
+        assert base != cache_key("sql", "prompt v1", "gpt-4o-mini", question="q", schema="abc")
+        assert base != cache_key("sql", "prompt v1", "gpt-4o", question="q", schema="abd")
+        assert base.startswith("sql:")
+
+
+class TestLLMCache:
+    """Tests for the two cache tiers and single flight."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_served_from_memory(self):
+        cache = LLMCache(max_entries=2, ttl_seconds=60)
+        call = AsyncMock(return_value="SELECT 1")
+
+        assert await cache.get_or_call("k", call) == "SELECT 1"
+        assert await cache.get_or_call("k", call) == "SELECT 1"
+        call.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_lru_and_ttl(self, monkeypatch):
+        cache = LLMCache(max_entries=2, ttl_seconds=60)
+        for key in ("a", "b", "c"):
+            await cache.get_or_call(key, AsyncMock(return_value=key))
+        assert list(cache._entries) == ["b", "c"]
+
+        now = llm_cache.time.time()
+        monkeypatch.setattr(llm_cache.time, "time", lambda: now + 61)
+        call = AsyncMock(return_value="fresh")
+        assert await cache.get_or_call("c", call) == "fresh"
+        call.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_request(self):
+        release = asyncio.Event()
+        calls = 0
+
+        async def call() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "general_chat"
+
+        cache = LLMCache(max_entries=10, ttl_seconds=60)
+        tasks = [asyncio.create_task(cache.get_or_call("k", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["general_chat"] * 5
+        assert calls == 1
+        assert not cache._inflight
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_but_not_cached(self):
+        release = asyncio.Event()
+
+        async def failing() -> str:
+            await release.wait()
+            raise RuntimeError("rate limited")
+
+        cache = LLMCache(max_entries=10, ttl_seconds=60)
+        tasks = [asyncio.create_task(cache.get_or_call("k", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get_or_call("k", AsyncMock(return_value="ok")) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_hands_over_to_waiter(self):
+        started = asyncio.Event()
+
+        async def slow() -> str:
+            started.set()
+            await asyncio.sleep(10)
+            return "never"
+
+        cache = LLMCache(max_entries=10, ttl_seconds=60)
+        leader = asyncio.create_task(cache.get_or_call("k", slow))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_call("k", AsyncMock(return_value="mine")))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "mine"
+
+    @pytest.mark.asyncio
+    async def test_persistent_tier_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / "llm.sqlite3")
+        first, second = LLMCache(10, 60, path), LLMCache(10, 60, path)
+        await first.get_or_call("k", AsyncMock(return_value="SELECT 1"))
+
+        call = AsyncMock(return_value="other")
+        assert await second.get_or_call("k", call) == "SELECT 1"
+        call.assert_not_awaited()
+        first.close()
+        second.close()
@@ -0,0 +1,44 @@
+"""Unit tests for the shared LLM client registry."""
+
+import pytest
+from app.services import llm_clients
+
+
+@pytest.fixture(autouse=True)
+async def fresh_registry(monkeypatch):
+    """Start every test without clients and close the ones it created."""
+    monkeypatch.setattr(llm_clients.settings, "openai_api_key", "test-key")
+    await llm_clients.close()
+    yield
+    await llm_clients.close()
+
+
+class TestLLMClients:
+    """Tests for client reuse and shutdown."""
+
+    def test_one_chat_model_per_profile(self):
+        router = llm_clients.get_chat_model(temperature=0)
+
+        assert llm_clients.get_chat_model(temperature=0) is router
+        assert llm_clients.get_chat_model(temperature=0, streaming=True) is not router
+        assert llm_clients.get_chat_model(temperature=0.7, streaming=True).temperature == 0.7
+
+    def test_clients_share_one_connection_pool(self, monkeypatch):
+        monkeypatch.setattr(llm_clients.settings, "openai_http_max_connections", 7)
+        http_client = llm_clients.get_http_client()
+
+        assert llm_clients.get_chat_model().http_async_client is http_client
+        assert llm_clients.get_openai_client()._client is http_client
+        assert llm_clients.get_openai_client().max_retries == 0
+        assert http_client._transport._pool._max_connections == 7
+
+    @pytest.mark.asyncio
+    async def test_close_releases_clients(self):
+        http_client = llm_clients.get_http_client()
+        llm = llm_clients.get_chat_model()
+
+        await llm_clients.close()
+
+        assert http_client.is_closed
+        assert llm_clients.get_chat_model() is not llm
+        assert llm_clients.get_http_client() is not http_client
@@ -0,0 +1,197 @@
+"""Unit tests for the in-process (NumPy/HNSW) vector store backend."""
+
+import numpy as np
+import pytest
+from app.core.exceptions import VectorStoreError
+from app.services import local_vector_store, vector_store
+from app.services.local_vector_store import LocalVectorStore
+
+DIMS = 8
+
+
+def _vector(hot: int) -> list[float]:
+    vector = [0.0] * DIMS
+    vector[hot % DIMS] = 1.0
+    return vector
+
+
+def _chunks(count: int, filename: str = "a.pdf") -> list[dict]:
+    return [
+        {"text": f"chunk {i}", "chunk_index": i, "metadata": {"filename": filename}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = LocalVectorStore(tmp_path / "vectors", DIMS, hnsw_min_points=0)
+    yield store
+    await store.close()
+
+
+class TestLocalVectorStore:
+    """Round trips through the local backend."""
+
+    @pytest.mark.asyncio
+    async def test_upsert_search_delete(self, store):
+        await store.upsert_chunks("doc-1", _chunks(3), [_vector(i) for i in range(3)])
+        await store.upsert_chunks("doc-2", _chunks(1, "b.pdf"), [_vector(5)])
+
+        results = await store.search(_vector(1), top_k=2)
+
+        assert (results[0].document_id, results[0].chunk_index) == ("doc-1", 1)
+        assert results[0].score == pytest.approx(1.0)
+        assert results[0].filename == "a.pdf"
+        assert results[0].vector is None
+        with_vectors = await store.search(_vector(1), top_k=1, with_vectors=True)
+        assert with_vectors[0].vector == pytest.approx(_vector(1))
+
+        await store.delete_by_document("doc-1")
+        remaining = await store.search(_vector(1), top_k=10)
+        assert {r.document_id for r in remaining} == {"doc-2"}
+
+    @pytest.mark.asyncio
+    async def test_filters(self, store):
+        """Searches should only return points matching every filter."""
+        await store.upsert_chunks("doc-1", _chunks(2), [_vector(0), _vector(1)])
+        await store.upsert_chunks("doc-2", _chunks(2), [_vector(0), _vector(1)])
+        await store.set_document_payload("doc-2", {"file_type": "docx"})
+
+        results = await store.search(_vector(0), top_k=5, filters={"file_type": "docx"})
+
+        assert {r.document_id for r in results} == {"doc-2"}
+        assert await store.search(_vector(0), filters={"document_id": "missing"}) == []
+        with pytest.raises(ValueError, match="Cannot filter on text"):
+            await store.search(_vector(0), filters={"text": "x"})
+
+    @pytest.mark.asyncio
+    async def test_diff_helpers_and_slot_reuse(self, store):
+        """Deleted slots should be reused and IDs stay stable across updates."""
+        await store.upsert_chunks("doc-1", _chunks(3), [_vector(i) for i in range(3)])
+        ids = [vector_store.point_id("doc-1", f"chunk {i}") for i in range(3)]
+
+        await store.delete_points([ids[0]])
+        await store.set_chunk_indexes({ids[2]: 7})
+        await store.upsert_chunks("doc-2", _chunks(1), [_vector(4)])
+
+        assert await store.get_document_points("doc-1") == {ids[1]: 1, ids[2]: 7}
+        assert store._size == 3  # doc-2 took the freed slot
+
+    @pytest.mark.asyncio
+    async def test_persists_across_reopen(self, tmp_path):
+        path = tmp_path / "vectors"
+        first = LocalVectorStore(path, DIMS, hnsw_min_points=0)
+        await first.upsert_chunks("doc-1", _chunks(2000), [_vector(i) for i in range(2000)])
+        await first.set_document_payload("doc-1", {"total_chunks": 2000})
+        await first.close()
+
+        second = LocalVectorStore(path, DIMS, hnsw_min_points=0)
+        results = await second.search(_vector(3), top_k=1)
+        await second.close()
+
+        assert results[0].document_id == "doc-1"
+        assert results[0].chunk_index % DIMS == 3
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_rejected(self, store, tmp_path):
+        await store.upsert_chunks("doc-1", _chunks(1), [_vector(0)])
+        await store.close()
+
+        with pytest.raises(VectorStoreError, match="8-dimensional"):
+            await LocalVectorStore(tmp_path / "vectors", 16).ensure_collection()
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search(self, store):
+        """Full-text matches should be fused with the dense ranking."""
+        texts = ["general maintenance overview", "torque spec for part XJ-900", "warranty"]
+        chunks = [{"text": t, "chunk_index": i, "metadata": {}} for i, t in enumerate(texts)]
+        await store.upsert_chunks("doc-1", chunks, [_vector(i) for i in range(3)])
+        await store.upsert_chunks("doc-2", _chunks(1), [_vector(0)])
+
+        hybrid = await store.search(_vector(0), top_k=1, query_text="XJ-900 torque")
+        filtered = await store.search(
+            _vector(0), top_k=1, filters={"document_id": "doc-2"}, query_text="xj-900"
+        )
+
+        assert (hybrid[0].document_id, hybrid[0].chunk_index) == ("doc-1", 1)
+        assert hybrid[0].dense_score == pytest.approx(0.0)  # lexical-only match
+        assert filtered[0].document_id == "doc-2"
+
+        await store.delete_by_document("doc-1")
+        assert store._lexical_hits("xj-900", 10, None) == []
+
+    @pytest.mark.asyncio
+    async def test_facade_selects_local_backend(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vector_store.settings, "vector_store_backend", "local")
+        monkeypatch.setattr(vector_store.settings, "openai_embedding_dimensions", DIMS)
+        monkeypatch.setattr(vector_store.settings, "local_vector_store_path", str(tmp_path))
+        monkeypatch.setattr(local_vector_store, "_store", None)
+
+        await vector_store.upsert_chunks("doc-1", _chunks(1), [_vector(2)])
+
+        assert isinstance(vector_store.get_store(), LocalVectorStore)
+        assert (await vector_store.search(_vector(2)))[0].document_id == "doc-1"
+        await vector_store.close()
+
+
+class TestLocalHnsw:
+    """Tests for the HNSW index used by larger local stores."""
+
+    @pytest.fixture(autouse=True)
+    def require_hnswlib(self):
+        pytest.importorskip("hnswlib")
+
+    @staticmethod
+    def _corpus(count: int) -> np.ndarray:
+        return np.random.default_rng(0).standard_normal((count, DIMS)).astype(np.float32)
+
+    @pytest.mark.asyncio
+    async def test_index_matches_exact_search(self, tmp_path):
+        """Past the threshold, searches should use HNSW and agree with brute force."""
+        corpus = self._corpus(500)
+        store = LocalVectorStore(tmp_path, DIMS, hnsw_min_points=100)
+        await store.upsert_chunks("doc", _chunks(500), corpus.tolist())
+        assert store._index is not None
+
+        query = corpus[42].tolist()
+        unit = np.asarray(query) / np.linalg.norm(query)
+        approx = await store.search(query, top_k=5)
+        exact = store._results(store._search_exact(unit, 5, store._alive[: store._size]), unit)
+
+        assert [r.chunk_index for r in approx] == [r.chunk_index for r in exact]
+        assert approx[0].chunk_index == 42
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_bulk_load_defers_indexing(self, tmp_path):
+        """Points written during a bulk load are searchable and indexed at the end."""
+        corpus = self._corpus(300)
+        store = LocalVectorStore(tmp_path, DIMS, hnsw_min_points=100)
+        await store.upsert_chunks("doc-1", _chunks(200), corpus[:200].tolist())
+
+        await store.begin_bulk_load()
+        await store.upsert_chunks("doc-2", _chunks(100), corpus[200:].tolist())
+        assert len(store._unindexed) == 100
+        hit = (await store.search(corpus[250].tolist(), top_k=1))[0]
+        assert (hit.document_id, hit.chunk_index) == ("doc-2", 50)
+        await store.end_bulk_load()
+
+        assert not store._unindexed
+        assert store._index.get_current_count() == 300
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_index_reloaded_or_rebuilt_on_open(self, tmp_path):
+        corpus = self._corpus(200)
+        store = LocalVectorStore(tmp_path, DIMS, hnsw_min_points=100)
+        await store.upsert_chunks("doc", _chunks(200), corpus.tolist())
+        await store.delete_points([vector_store.point_id("doc", "chunk 7")])
+        await store.close()
+        assert (tmp_path / "hnsw.bin").exists()
+
+        reopened = LocalVectorStore(tmp_path, DIMS, hnsw_min_points=100)
+        results = await reopened.search(corpus[7].tolist(), top_k=3)
+
+        assert reopened._index is not None
+        assert 7 not in [r.chunk_index for r in results]
+        await reopened.close()
@@ -0,0 +1,114 @@
+"""Unit tests for post-retrieval selection (adaptive cutoff and MMR)."""
+
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from app.services import retrieval
+from app.services.local_vector_store import LocalVectorStore
+from app.services.vector_store import SearchResult
+
+
+def _hit(chunk_index: int, score: float, vector: list[float]) -> SearchResult:
+    return SearchResult(
+        text=f"chunk {chunk_index}",
+        score=score,
+        document_id="doc-1",
+        filename="a.pdf",
+        chunk_index=chunk_index,
+        vector=vector,
+    )
+
+
+class TestAdaptiveCutoff:
+    """Tests for the relevance-based cutoff."""
+
+    def test_relative_threshold(self):
+        relevance = retrieval.relative_scores([0.8, 0.6, 0.35, 0.3])
+
+        assert retrieval.adaptive_cutoff(relevance, 0.5, None) == 2
+
+    def test_score_gap(self):
+        relevance = np.array([1.0, 0.95, 0.5, 0.45])
+
+        assert retrieval.adaptive_cutoff(relevance, 0.0, 0.3) == 2
+        assert retrieval.adaptive_cutoff(relevance, 0.0, None) == 4
+
+    def test_best_hit_always_kept(self):
+        assert retrieval.adaptive_cutoff(np.array([1.0, 0.1]), 2.0, None) == 1
+        assert retrieval.adaptive_cutoff(np.array([]), 0.5, 0.1) == 0
+
+
+class TestMmr:
+    """Tests for maximal marginal relevance selection."""
+
+    VECTORS = np.array([[1.0, 0.0], [0.99, 0.14], [0.0, 1.0]])
+
+    def test_skips_near_duplicates(self):
+        relevance = np.array([1.0, 0.98, 0.7])
+
+        assert retrieval.mmr(self.VECTORS, relevance, 2, 0.5) == [0, 2]
+
+    def test_lambda_one_keeps_relevance_order(self):
+        relevance = np.array([1.0, 0.98, 0.7])
+
+        assert retrieval.mmr(self.VECTORS, relevance, 3, 1.0) == [0, 1, 2]
+
+
+class TestRetrieve:
+    """Tests for the full retrieval pipeline."""
+
+    @pytest.fixture
+    def search(self, monkeypatch):
+        search = AsyncMock(
+            return_value=[
+                _hit(0, 0.9, [1.0, 0.0]),
+                _hit(1, 0.89, [1.0, 0.05]),  # overlapping chunk of the first
+                _hit(2, 0.8, [0.0, 1.0]),
+                _hit(3, 0.2, [0.7, 0.7]),  # weak hit
+            ]
+        )
+        monkeypatch.setattr(
+            retrieval.embedding_service, "embed_query", AsyncMock(return_value=[1.0])
+        )
+        monkeypatch.setattr(retrieval.vector_store, "search", search)
+        return search
+
+    @pytest.mark.asyncio
+    async def test_diversifies_and_cuts_off(self, search):
+        results = await retrieval.retrieve("question", top_k=3, mmr_lambda=0.5)
+
+        assert [r.chunk_index for r in results] == [0, 2, 1]
+        kwargs = search.await_args.kwargs
+        assert kwargs["query_text"] == "question"
+        assert kwargs["with_vectors"] is True
+        assert kwargs["top_k"] == retrieval.settings.retrieval_candidates
+
+    @pytest.mark.asyncio
+    async def test_relevance_only(self, search, monkeypatch):
+        monkeypatch.setattr(retrieval.settings, "hybrid_search_enabled", False)
+        results = await retrieval.retrieve("question", top_k=2, mmr_lambda=1.0)
+
+        assert [r.chunk_index for r in results] == [0, 1]
+        assert search.await_args.kwargs["with_vectors"] is False
+
+    @pytest.mark.asyncio
+    async def test_hybrid_cutoff_uses_dense_scores(self, tmp_path, monkeypatch):
+        """Fused (RRF) scores only encode rank; the cutoff must use cosine similarity."""
+        store = LocalVectorStore(tmp_path / "vectors", 2, hnsw_min_points=0)
+        texts = ["pump overview", "pump maintenance", "torque table for part XJ-900"]
+        chunks = [{"text": t, "chunk_index": i, "metadata": {}} for i, t in enumerate(texts)]
+        await store.upsert_chunks("doc-1", chunks, [[1.0, 0.0], [0.9, 0.44], [0.0, 1.0]])
+        monkeypatch.setattr(retrieval.settings, "hybrid_search_enabled", True)
+        monkeypatch.setattr(retrieval.vector_store, "search", store.search)
+
+        fused = await store.search([1.0, 0.0], top_k=3, query_text="torque")
+        results = await retrieval.retrieve(
+            "torque", top_k=3, mmr_lambda=1.0, query_vector=[1.0, 0.0]
+        )
+        await store.close()
+
+        # The lexical-only match leads the fused ranking but is semantically unrelated
+        assert fused[0].chunk_index == 2
+        assert fused[0].dense_score == pytest.approx(0.0)
+        assert [r.chunk_index for r in results] == [0, 1]
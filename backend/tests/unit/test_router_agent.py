@@ -2,15 +2,26 @@
 
 from unittest.mock import AsyncMock, patch
 
+import numpy as np
 import pytest
-from app.agents.router_agent import RouterAgent
+from app.agents import fast_router
+from app.agents.fast_router import CentroidModel
+from app.agents.router_agent import RouteQuery, RouterAgent
+from app.config import settings
+from app.services import llm_cache, llm_clients
+from app.services.llm_cache import LLMCache
 
 
 class TestRouterAgent:
     """Tests for the RouterAgent."""
 
+    @pytest.fixture(autouse=True)
+    def llm_only(self, monkeypatch):
+        """These tests cover the LLM router; the fast path is tested below."""
+        monkeypatch.setattr(settings, "fast_router_enabled", False)
+
     @pytest.mark.asyncio
-    @patch("app.agents.router_agent.ChatOpenAI")
+    @patch("app.agents.router_agent.get_chat_model")
     async def test_route_rag_query(self, mock_llm_cls):
         """Should route queries about documents to RAG."""
         # Mock the structured output chain
@@ -38,7 +49,7 @@ class TestRouterAgent:
             assert decision.reasoning == "User asks about a file."
 
     @pytest.mark.asyncio
-    @patch("app.agents.router_agent.ChatOpenAI")
+    @patch("app.agents.router_agent.get_chat_model")
     async def test_route_sql_query(self, mock_llm_cls):
         """Should route analytics queries to SQL."""
         mock_pipe = AsyncMock()
@@ -53,7 +64,7 @@ class TestRouterAgent:
         assert decision.destination == "sql"
 
     @pytest.mark.asyncio
-    @patch("app.agents.router_agent.ChatOpenAI")
+    @patch("app.agents.router_agent.get_chat_model")
     async def test_route_general_chat(self, mock_llm_cls):
         """Should route generic queries to general_chat."""
         mock_pipe = AsyncMock()
@@ -68,7 +79,7 @@ class TestRouterAgent:
         assert decision.destination == "general_chat"
 
     @pytest.mark.asyncio
-    @patch("app.agents.router_agent.ChatOpenAI")
+    @patch("app.agents.router_agent.get_chat_model")
     async def test_router_fallback_on_error(self, mock_llm_cls):
         """Should fallback to general_chat on exception."""
         mock_pipe = AsyncMock()
@@ -81,3 +92,97 @@ class TestRouterAgent:
 
         assert decision.destination == "general_chat"
         assert "Router error" in decision.reasoning
+
+    @pytest.mark.asyncio
+    @patch("app.agents.router_agent.get_chat_model")
+    async def test_repeated_query_served_from_cache(self, mock_llm_cls, monkeypatch):
+        """Identical queries (up to whitespace) should reach the model once."""
+        monkeypatch.setattr(llm_cache, "_cache", LLMCache(max_entries=10, ttl_seconds=60))
+        mock_pipe = AsyncMock()
+        mock_pipe.ainvoke.return_value.destination = "sql"
+        mock_pipe.ainvoke.return_value.reasoning = "Query about orders."
+
+        agent = RouterAgent()
+        agent.router = mock_pipe
+
+        first = await agent.route("How many orders shipped?")
+        second = await agent.route("  How many orders   shipped? ")
+
+        assert first == second
+        assert second.destination == "sql"
+        mock_pipe.ainvoke.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_uses_recreated_clients_after_close(self, monkeypatch):
+        """A router built before llm_clients.close() must not keep the closed model."""
+        monkeypatch.setattr(llm_clients.settings, "openai_api_key", "test-key")
+        agent = RouterAgent()
+        closed = agent._llm
+        await llm_clients.close()
+
+        with patch.object(RouterAgent, "_build_router", return_value=AsyncMock()) as build:
+            build.return_value.ainvoke.return_value = RouteQuery(
+                destination="sql", reasoning="Query about orders."
+            )
+            decision = RouteQuery.model_validate_json(await agent._decide("How many orders?"))
+
+        assert decision.destination == "sql"
+        assert agent._llm is llm_clients.get_chat_model(temperature=0)
+        assert agent._llm is not closed
+        assert not agent._llm.http_async_client.is_closed
+        await llm_clients.close()
+
+
+class TestFastPath:
+    """Tests for the local fast path in front of the LLM router."""
+
+    @pytest.fixture
+    def agent(self):
+        with patch("app.agents.router_agent.get_chat_model"):
+            agent = RouterAgent()
+            agent.router = AsyncMock()
+            agent.router.ainvoke.return_value.destination = "rag"
+            agent.router.ainvoke.return_value.reasoning = "From the LLM."
+            yield agent
+
+    @pytest.fixture
+    def model(self, monkeypatch):
+        model = CentroidModel.fit(np.eye(2, dtype=np.float32), ["rag", "sql"], "model:2")
+        monkeypatch.setattr(fast_router, "_model", model)
+        return model
+
+    @pytest.mark.asyncio
+    async def test_keyword_rule_skips_llm(self, agent, monkeypatch):
+        monkeypatch.setattr(fast_router, "_model", False)
+
+        decision = await agent.route("How many orders shipped to Germany?")
+
+        assert decision.destination == "sql"
+        assert decision.source == "rules"
+        agent.router.ainvoke.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_confident_centroid_skips_llm(self, agent, model):
+        with patch(
+            "app.agents.router_agent.embedding_service.embed_query",
+            AsyncMock(return_value=[0.0, 1.0]),
+        ):
+            decision = await agent.route("Which shipper handles Brazil?")
+
+        assert decision.destination == "sql"
+        assert decision.source == "centroid"
+        agent.router.ainvoke.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_falls_back_to_llm(self, agent, model, monkeypatch):
+        monkeypatch.setattr(llm_cache, "_cache", None)
+        monkeypatch.setattr(settings, "llm_cache_max_entries", 0)
+        with patch(
+            "app.agents.router_agent.embedding_service.embed_query",
+            AsyncMock(return_value=[1.0, 1.0]),
+        ):
+            decision = await agent.route("Tell me about Brazil")
+
+        assert decision.destination == "rag"
+        assert decision.source == "llm"
+        agent.router.ainvoke.assert_awaited_once()
@@ -0,0 +1,31 @@
+"""Unit tests for the idempotent schema upgrades."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from app.db.migrations import schema_upgrades
+from app.db.models import Document
+
+
+class TestSchemaUpgrades:
+    """Tests for upgrade_schema."""
+
+    def test_statements_are_idempotent(self):
+        """Every statement must be safe to run against an up-to-date database."""
+        for statement in schema_upgrades.UPGRADES:
+            assert "IF NOT EXISTS" in statement
+
+    def test_index_name_matches_model(self):
+        """The upgrade must create the same index create_all would, not a second one."""
+        index_names = {index.name for index in Document.__table__.indexes}
+        assert "ix_documents_content_hash" in index_names
+        assert any("ix_documents_content_hash" in s for s in schema_upgrades.UPGRADES)
+
+    @pytest.mark.asyncio
+    async def test_runs_all_statements(self):
+        """Should execute each statement on the given connection."""
+        conn = AsyncMock()
+        await schema_upgrades.upgrade_schema(conn)
+
+        executed = [str(call.args[0]) for call in conn.execute.await_args_list]
+        assert executed == schema_upgrades.UPGRADES
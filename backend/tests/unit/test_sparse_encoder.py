@@ -0,0 +1,36 @@
+"""Unit tests for the BM25 sparse encoder."""
+
+from app.services import sparse_encoder
+
+
+class TestSparseEncoder:
+    """Tests for tokenization and sparse vector encoding."""
+
+    def test_tokenize_keeps_compounds_and_drops_stopwords(self):
+        assert sparse_encoder.tokenize("What is the XJ-900 torque?") == [
+            "xj-900",
+            "xj",
+            "900",
+            "torque",
+        ]
+
+    def test_query_vector_is_binary(self):
+        indices, values = sparse_encoder.encode_query("torque torque spec")
+
+        assert indices == sorted(
+            {sparse_encoder.term_index("torque"), sparse_encoder.term_index("spec")}
+        )
+        assert values == [1.0, 1.0]
+        assert sparse_encoder.encode_query("the of and") == ([], [])
+
+    def test_document_term_frequency_saturates(self):
+        """Repeated terms should gain weight, but less than linearly."""
+        torque = sparse_encoder.term_index("torque")
+
+        def weight(text: str) -> float:
+            indices, values = sparse_encoder.encode_document(text)
+            return values[indices.index(torque)]
+
+        once, twice, many = weight("torque"), weight("torque torque"), weight("torque " * 20)
+        assert once < twice < many < 20 * once
+        assert many < sparse_encoder.settings.bm25_k1 + 1
@@ -0,0 +1,138 @@
+"""Unit tests for async Northwind query execution."""
+
+import asyncio
+import contextlib
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncpg
+import pytest
+from app.agents.tools.sql_db import NorthwindDatabase, QueryResult
+from app.core.exceptions import SQLQueryError
+
+
+class FakeDriver:
+    """Stands in for an asyncpg connection."""
+
+    def __init__(self, records=(), columns=("id",), error: BaseException | None = None):
+        self.records = list(records)
+        self.columns = columns
+        self.error = error
+        self.transactions = []
+        self.settings = []
+
+    @contextlib.asynccontextmanager
+    async def _transaction(self):
+        yield
+
+    def transaction(self, **kwargs):
+        self.transactions.append(kwargs)
+        return self._transaction()
+
+    async def fetchval(self, query, *args):
+        self.settings.append(args)
+
+    async def prepare(self, query):
+        if self.error is not None:
+            raise self.error
+        cursor = SimpleNamespace(fetch=AsyncMock(side_effect=lambda n: self.records[:n]))
+        return SimpleNamespace(
+            get_attributes=lambda: [SimpleNamespace(name=c) for c in self.columns],
+            cursor=AsyncMock(return_value=cursor),
+        )
+
+
+@pytest.fixture
+def nw_db(monkeypatch):
+    """A NorthwindDatabase whose pools are fakes (no PostgreSQL needed)."""
+    with (
+        patch("app.agents.tools.sql_db.create_engine"),
+        patch("app.agents.tools.sql_db.SQLDatabase"),
+    ):
+        db = NorthwindDatabase()
+
+    def use(driver: FakeDriver):
+        conn = MagicMock()
+        conn.get_raw_connection = AsyncMock(return_value=SimpleNamespace(driver_connection=driver))
+        conn.invalidate = AsyncMock()
+
+        @contextlib.asynccontextmanager
+        async def connect():
+            yield conn
+
+        db._async_engine = SimpleNamespace(connect=connect)
+        return conn
+
+    db.use = use
+    return db
+
+
+class TestExecute:
+    """Tests for NorthwindDatabase.execute."""
+
+    @pytest.mark.asyncio
+    async def test_returns_typed_rows_under_timeout(self, nw_db, monkeypatch):
+        monkeypatch.setattr("app.agents.tools.sql_db.settings.northwind_statement_timeout_ms", 250)
+        driver = FakeDriver(
+            records=[("ALFKI", Decimal("12.50"), date(1997, 1, 2))],
+            columns=("customer_id", "freight", "order_date"),
+        )
+        nw_db.use(driver)
+
+        result = await nw_db.execute("SELECT customer_id, freight, order_date FROM orders")
+
+        assert result.columns == ["customer_id", "freight", "order_date"]
+        assert result.rows == [("ALFKI", Decimal("12.50"), date(1997, 1, 2))]
+        assert not result.truncated
+        assert driver.transactions == [{"readonly": True}]
+        assert driver.settings == [("250",)]
+
+    @pytest.mark.asyncio
+    async def test_truncates_to_max_rows(self, nw_db, monkeypatch):
+        monkeypatch.setattr("app.agents.tools.sql_db.settings.northwind_max_rows", 2)
+        nw_db.use(FakeDriver(records=[(1,), (2,), (3,)]))
+
+        result = await nw_db.execute("SELECT id FROM products")
+
+        assert result.rows == [(1,), (2,)]
+        assert result.truncated
+
+    @pytest.mark.asyncio
+    async def test_blocked_query_never_reaches_the_database(self, nw_db):
+        conn = nw_db.use(FakeDriver())
+
+        with pytest.raises(SQLQueryError, match="safety policy"):
+            await nw_db.execute("DELETE FROM orders")
+        conn.get_raw_connection.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_errors(self, nw_db):
+        nw_db.use(FakeDriver(error=asyncpg.QueryCanceledError("canceling statement")))
+        with pytest.raises(SQLQueryError, match="time limit"):
+            await nw_db.execute("SELECT * FROM orders")
+
+        nw_db.use(FakeDriver(error=asyncpg.UndefinedTableError('relation "x" does not exist')))
+        with pytest.raises(SQLQueryError, match="does not exist"):
+            await nw_db.execute("SELECT * FROM x")
+
+    @pytest.mark.asyncio
+    async def test_cancellation_discards_connection(self, nw_db):
+        conn = nw_db.use(FakeDriver(error=asyncio.CancelledError()))
+
+        with pytest.raises(asyncio.CancelledError):
+            await nw_db.execute("SELECT * FROM orders")
+        conn.invalidate.assert_awaited_once()
+
+
+class TestQueryResult:
+    """Tests for rendering query results."""
+
+    def test_to_text(self):
+        result = QueryResult(
+            columns=["name", "units"], rows=[("Chai", 39), ("Tofu", None)], truncated=True
+        )
+
+        assert result.to_text() == "name | units\nChai | 39\nTofu | NULL\n... (first 2 rows)"
+        assert QueryResult(columns=["a"], rows=[], truncated=False).to_text() == "(no rows)"
@@ -0,0 +1,50 @@
+"""Unit tests for the text-to-SQL service."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.agents.tools.sql_db import QueryResult
+from app.core.exceptions import SQLQueryError
+from app.services import sql_service
+
+
+@pytest.fixture
+def nw_db():
+    db = MagicMock()
+    db.schema = AsyncMock(return_value="CREATE TABLE orders (...)")
+    db.execute = AsyncMock()
+    with (
+        patch.object(sql_service, "get_northwind_db", return_value=db),
+        patch.object(
+            sql_service, "generate_sql", AsyncMock(return_value="SELECT COUNT(*) FROM orders")
+        ),
+    ):
+        yield db
+
+
+class TestAnswerSqlQuestion:
+    """Tests for answer_sql_question."""
+
+    @pytest.mark.asyncio
+    async def test_answer_includes_rows_and_shape(self, nw_db):
+        nw_db.execute.return_value = QueryResult(columns=["count"], rows=[(830,)], truncated=False)
+
+        answer, metadata = await sql_service.answer_sql_question("How many orders?")
+
+        assert answer.endswith("Result:\ncount\n830")
+        assert metadata == {
+            "query": "SELECT COUNT(*) FROM orders",
+            "context_source": "northwind_db",
+            "columns": ["count"],
+            "row_count": 1,
+            "truncated": False,
+        }
+
+    @pytest.mark.asyncio
+    async def test_query_errors_are_reported_in_the_answer(self, nw_db):
+        nw_db.execute.side_effect = SQLQueryError("Query exceeded the 15000 ms time limit")
+
+        answer, metadata = await sql_service.answer_sql_question("How many orders?")
+
+        assert answer.endswith("Error: Query exceeded the 15000 ms time limit")
+        assert metadata["error"] == "Query exceeded the 15000 ms time limit"
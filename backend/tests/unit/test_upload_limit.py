@@ -0,0 +1,88 @@
+"""Unit tests for the upload size limit middleware."""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from app.core.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+LIMIT = 1024
+
+
+@pytest.fixture
+def client():
+    """App that echoes the body size of uploads, behind a 1 KB limit."""
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=LIMIT, path_prefix="/upload")
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+class TestUploadSizeLimitMiddleware:
+    """Tests for UploadSizeLimitMiddleware."""
+
+    def test_small_body_passes(self, client):
+        """Bodies under the limit should reach the endpoint."""
+        response = client.post("/upload", content=b"x" * 100)
+        assert response.status_code == 200
+        assert response.json() == {"size": 100}
+
+    def test_declared_oversize_rejected(self, client):
+        """A Content-Length over the limit should be refused with 413."""
+        response = client.post("/upload", content=b"x" * (LIMIT + MULTIPART_OVERHEAD_BYTES + 1))
+        assert response.status_code == 413
+        assert response.json()["error"] == "FILE_TOO_LARGE"
+
+    def test_streamed_oversize_rejected(self, client):
+        """Chunked bodies without Content-Length should be cut off once over the limit."""
+
+        def chunks():
+            for _ in range(100):
+                yield b"x" * 1024
+
+        response = client.post("/upload", content=chunks())
+        assert "content-length" not in response.request.headers
+        assert response.status_code == 413
+        assert (
+            response.json()
+            == client.post("/upload", content=b"x" * (LIMIT + MULTIPART_OVERHEAD_BYTES + 1)).json()
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("value", [b"abc", b"-5"])
+    async def test_malformed_content_length_rejected(self, value):
+        """A Content-Length that is not a non-negative integer should get a 400."""
+        middleware = UploadSizeLimitMiddleware(
+            AsyncMock(), max_body_bytes=LIMIT, path_prefix="/upload"
+        )
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/upload",
+            "headers": [(b"content-length", value)],
+        }
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(scope, AsyncMock(), send)
+
+        assert sent[0]["status"] == 400
+        assert json.loads(sent[1]["body"])["error"] == "INVALID_CONTENT_LENGTH"
+        middleware.app.assert_not_awaited()
+
+    def test_other_paths_unaffected(self, client):
+        """Paths outside the prefix should not be limited."""
+        response = client.post("/other", content=b"x" * (LIMIT + MULTIPART_OVERHEAD_BYTES + 1))
+        assert response.status_code == 200
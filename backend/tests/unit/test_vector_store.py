@@ -0,0 +1,458 @@
+"""Unit tests for the vector store facade and its Qdrant backend (in-memory Qdrant)."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from app.core.exceptions import VectorStoreError
+from app.services import bulk_load_lease, qdrant_store, vector_store
+from app.services.collection_profiles import get_profile, search_params
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    client = AsyncQdrantClient(location=":memory:")
+    monkeypatch.setattr(qdrant_store, "_client", client)
+    yield client
+    await vector_store.close()
+
+
+def _vector(hot: int) -> list[float]:
+    vector = [0.0] * vector_store.settings.openai_embedding_dimensions
+    vector[hot] = 1.0
+    return vector
+
+
+def _chunks(count: int) -> list[dict]:
+    return [
+        {"text": f"chunk {i}", "chunk_index": i, "metadata": {"filename": "a.pdf"}}
+        for i in range(count)
+    ]
+
+
+class TestVectorStore:
+    """Round trips through the async vector store functions."""
+
+    @pytest.mark.asyncio
+    async def test_upsert_search_delete(self, client):
+        """Upserted chunks should be searchable and removed with their document."""
+        await vector_store.ensure_collection()
+        await vector_store.ensure_collection()  # idempotent
+        await vector_store.upsert_chunks("doc-1", _chunks(3), [_vector(i) for i in range(3)])
+        await vector_store.upsert_chunks("doc-2", _chunks(1), [_vector(5)])
+        await vector_store.set_document_payload("doc-1", {"total_chunks": 3})
+
+        results = await vector_store.search(_vector(1), top_k=2)
+
+        assert results[0].document_id == "doc-1"
+        assert results[0].chunk_index == 1
+        assert results[0].filename == "a.pdf"
+
+        filtered = await vector_store.search(_vector(1), top_k=5, filters={"document_id": "doc-2"})
+        assert [r.document_id for r in filtered] == ["doc-2"]
+
+        await vector_store.delete_by_document("doc-1")
+        remaining = await vector_store.search(_vector(1), top_k=10)
+        assert {r.document_id for r in remaining} == {"doc-2"}
+
+    @pytest.mark.asyncio
+    async def test_diff_helpers(self, client):
+        """Stored points can be listed, renumbered and deleted by deterministic ID."""
+        await vector_store.ensure_collection()
+        await vector_store.upsert_chunks("doc-1", _chunks(3), [_vector(i) for i in range(3)])
+        ids = [vector_store.point_id("doc-1", f"chunk {i}") for i in range(3)]
+
+        assert await vector_store.get_document_points("doc-1") == {
+            ids[0]: 0,
+            ids[1]: 1,
+            ids[2]: 2,
+        }
+
+        await vector_store.delete_points([ids[0]])
+        await vector_store.set_chunk_indexes({ids[2]: 7})
+
+        assert await vector_store.get_document_points("doc-1") == {ids[1]: 1, ids[2]: 7}
+
+    @pytest.mark.asyncio
+    async def test_close_client_drops_shared_client(self, client):
+        await vector_store.close()
+        assert qdrant_store._client is None
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    client = AsyncMock()
+    monkeypatch.setattr(qdrant_store, "_client", client)
+    return client
+
+
+class TestParallelUpsert:
+    """Tests for batched, unwaited upserts with a final barrier."""
+
+    @pytest.mark.asyncio
+    async def test_only_last_batch_waits(self, mock_client, monkeypatch):
+        """All batches but the last should be sent with wait=False."""
+        monkeypatch.setattr(vector_store.settings, "qdrant_upsert_batch_size", 2)
+
+        count = await vector_store.upsert_chunks("doc", _chunks(5), [_vector(0)] * 5)
+
+        assert count == 5
+        calls = mock_client.upsert.await_args_list
+        assert [len(c.kwargs["points"]) for c in calls] == [2, 2, 1]
+        assert [c.kwargs["wait"] for c in calls] == [False, False, True]
+
+    @pytest.mark.asyncio
+    async def test_no_wait_at_all_when_caller_defers_barrier(self, mock_client):
+        await vector_store.upsert_chunks("doc", _chunks(3), [_vector(0)] * 3, wait=False)
+        assert all(not c.kwargs["wait"] for c in mock_client.upsert.await_args_list)
+
+
+class TestBulkLoad:
+    """Tests for toggling collection indexing around large imports."""
+
+    @staticmethod
+    def _collection(threshold: int, metadata: dict | None = None):
+        return SimpleNamespace(
+            config=SimpleNamespace(
+                optimizer_config=SimpleNamespace(indexing_threshold=threshold), metadata=metadata
+            )
+        )
+
+    @staticmethod
+    def _thresholds(client) -> list[int]:
+        return [
+            c.kwargs["optimizers_config"].indexing_threshold
+            for c in client.update_collection.await_args_list
+            if "optimizers_config" in c.kwargs
+        ]
+
+    @pytest.mark.asyncio
+    async def test_disables_and_restores_indexing(self, mock_client):
+        """Nested bulk loads should touch the collection only at the outermost level."""
+        mock_client.get_collection.return_value = self._collection(20000)
+
+        async with vector_store.bulk_load():
+            async with vector_store.bulk_load():
+                pass
+            assert self._thresholds(mock_client) == [0]
+
+        assert self._thresholds(mock_client) == [0, 20000]
+        # Recorded so that it survives this process
+        mock_client.update_collection.assert_any_await(
+            collection_name=vector_store.settings.qdrant_collection_name,
+            metadata={qdrant_store.SAVED_THRESHOLD_KEY: 20000},
+        )
+
+    @pytest.mark.asyncio
+    async def test_restores_recorded_threshold_if_already_disabled(self, mock_client, monkeypatch):
+        """A collection left at 0 by a dead loader gets the threshold that loader recorded."""
+        monkeypatch.setattr(vector_store.settings, "qdrant_indexing_threshold_kb", 12345)
+        mock_client.get_collection.return_value = self._collection(
+            0, {qdrant_store.SAVED_THRESHOLD_KEY: 777}
+        )
+
+        async with vector_store.bulk_load():
+            pass
+
+        assert self._thresholds(mock_client) == [0, 777]
+
+    @pytest.mark.asyncio
+    async def test_restores_configured_threshold_if_unrecorded(self, mock_client, monkeypatch):
+        monkeypatch.setattr(vector_store.settings, "qdrant_indexing_threshold_kb", 12345)
+        mock_client.get_collection.return_value = self._collection(0)
+
+        async with vector_store.bulk_load():
+            pass
+
+        assert self._thresholds(mock_client) == [0, 12345]
+
+    @pytest.mark.asyncio
+    async def test_failed_toggle_can_be_retried(self, mock_client):
+        """A failed collection update must not leave the nesting depth counted."""
+        mock_client.get_collection.return_value = self._collection(20000)
+
+        async def update_collection(**kwargs):
+            if "optimizers_config" in kwargs and failures:
+                failures.pop()
+                raise RuntimeError("unavailable")
+
+        mock_client.update_collection.side_effect = update_collection
+
+        failures = [True]
+        with pytest.raises(RuntimeError):
+            await vector_store.begin_bulk_load()
+        assert qdrant_store._bulk_load_depth == 0
+
+        await vector_store.begin_bulk_load()
+        assert qdrant_store._bulk_load_depth == 1
+
+        failures = [True]
+        with pytest.raises(RuntimeError):
+            await vector_store.end_bulk_load()
+        assert qdrant_store._bulk_load_depth == 1  # indexing is still off
+        await vector_store.end_bulk_load()
+
+        assert self._thresholds(mock_client) == [0, 0, 20000, 20000]
+        assert qdrant_store._bulk_load_depth == 0
+
+
+class TestBootstrap:
+    """Tests for collection bootstrap and schema upgrades."""
+
+    @pytest.fixture(autouse=True)
+    def not_ready(self, monkeypatch):
+        monkeypatch.setattr(qdrant_store, "_collection_ready", False)
+
+    @staticmethod
+    def _info(
+        payload_schema: dict,
+        metadata: dict | None = None,
+        size: int | None = None,
+        indexing_threshold: int | None = None,
+    ):
+        vectors = VectorParams(
+            size=size or vector_store.settings.openai_embedding_dimensions,
+            distance=Distance.COSINE,
+        )
+        return SimpleNamespace(
+            config=SimpleNamespace(
+                metadata=metadata,
+                params=SimpleNamespace(vectors=vectors, sparse_vectors=None),
+                optimizer_config=SimpleNamespace(indexing_threshold=indexing_threshold),
+            ),
+            payload_schema=payload_schema,
+        )
+
+    @pytest.mark.asyncio
+    async def test_adds_missing_indexes_to_existing_collection(self, mock_client):
+        """An older collection should get the indexes it lacks and the schema version."""
+        mock_client.get_aliases.return_value = SimpleNamespace(aliases=[])
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = self._info({"document_id": object()})
+
+        await vector_store.ensure_collection()
+
+        mock_client.create_collection.assert_not_called()
+        created = [c.kwargs["field_name"] for c in mock_client.create_payload_index.await_args_list]
+        assert created == ["filename", "file_type"]
+        mock_client.update_collection.assert_awaited_once_with(
+            vector_store.settings.qdrant_collection_name,
+            metadata={"schema_version": qdrant_store.SCHEMA_VERSION},
+        )
+
+    @pytest.mark.asyncio
+    async def test_runs_once_per_process(self, mock_client):
+        """After a successful bootstrap, ensure_collection should not touch Qdrant."""
+        mock_client.get_aliases.return_value = SimpleNamespace(aliases=[])
+        mock_client.collection_exists.return_value = False
+        mock_client.get_collection.return_value = self._info(
+            {}, {"schema_version": qdrant_store.SCHEMA_VERSION}
+        )
+
+        await vector_store.ensure_collection()
+        await vector_store.ensure_collection()
+
+        mock_client.create_collection.assert_awaited_once()
+        mock_client.get_collection.assert_awaited_once()
+        assert mock_client.create_payload_index.await_count == len(qdrant_store.PAYLOAD_INDEXES)
+        mock_client.update_collection.assert_not_called()
+
+    @pytest.fixture
+    def lease(self, monkeypatch):
+        """Patch the bulk-load lease; set ``lease.held_elsewhere`` to simulate a loader."""
+        state = SimpleNamespace(held_elsewhere=False)
+
+        @asynccontextmanager
+        async def hold():
+            yield not state.held_elsewhere
+
+        monkeypatch.setattr(bulk_load_lease, "hold", hold)
+        return state
+
+    def _abandoned(self, mock_client, metadata: dict) -> None:
+        mock_client.get_aliases.return_value = SimpleNamespace(aliases=[])
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = self._info(
+            dict.fromkeys(qdrant_store.PAYLOAD_INDEXES),
+            {"schema_version": qdrant_store.SCHEMA_VERSION, **metadata},
+            indexing_threshold=0,
+        )
+
+    @pytest.mark.asyncio
+    async def test_restores_indexing_left_off_by_dead_loader(self, mock_client, lease):
+        """Indexing at 0 with nobody holding the lease was abandoned by a killed loader."""
+        self._abandoned(mock_client, {qdrant_store.SAVED_THRESHOLD_KEY: 777})
+
+        await vector_store.ensure_collection()
+
+        call = mock_client.update_collection.await_args
+        assert call.kwargs["optimizers_config"].indexing_threshold == 777
+
+    @pytest.mark.asyncio
+    async def test_leaves_indexing_off_while_lease_held(self, mock_client, lease):
+        lease.held_elsewhere = True
+        self._abandoned(mock_client, {})
+
+        await vector_store.ensure_collection()
+
+        mock_client.update_collection.assert_not_called()
+
+
+class TestEmbeddingCollections:
+    """Tests for per-model/size collections behind the collection alias."""
+
+    @pytest.fixture(autouse=True)
+    def not_ready(self, monkeypatch):
+        monkeypatch.setattr(qdrant_store, "_collection_ready", False)
+
+    async def _collections(self, client) -> dict[str, int]:
+        response = await client.get_collections()
+        return {
+            c.name: (await client.get_collection(c.name)).config.params.vectors.size
+            for c in response.collections
+        }
+
+    @pytest.mark.asyncio
+    async def test_alias_follows_configured_dimensions(self, client, monkeypatch):
+        """Changing the embedding size should switch the alias to a new collection."""
+        alias = vector_store.settings.qdrant_collection_name
+        await vector_store.ensure_collection()
+        first = qdrant_store.embedding_collection_name()
+
+        monkeypatch.setattr(vector_store.settings, "openai_embedding_dimensions", 256)
+        monkeypatch.setattr(qdrant_store, "_collection_ready", False)
+        await vector_store.ensure_collection()
+        second = qdrant_store.embedding_collection_name()
+
+        assert second.endswith("__text-embedding-3-small__256")
+        assert await self._collections(client) == {first: 1536, second: 256}
+        aliases = (await client.get_aliases()).aliases
+        assert [(a.alias_name, a.collection_name) for a in aliases] == [(alias, second)]
+        assert len(await vector_store.search([1.0] + [0.0] * 255)) == 0
+
+    @pytest.mark.asyncio
+    async def test_legacy_collection_used_in_place(self, client):
+        """A pre-alias collection with the right size should be kept as-is."""
+        name = vector_store.settings.qdrant_collection_name
+        await client.create_collection(name, VectorParams(size=1536, distance=Distance.COSINE))
+
+        await vector_store.ensure_collection()
+
+        assert list(await self._collections(client)) == [name]
+
+    @pytest.mark.asyncio
+    async def test_size_mismatch_rejected(self, client, monkeypatch):
+        """A legacy collection of another size should fail startup, not searches."""
+        name = vector_store.settings.qdrant_collection_name
+        await client.create_collection(name, VectorParams(size=1536, distance=Distance.COSINE))
+        monkeypatch.setattr(vector_store.settings, "openai_embedding_dimensions", 512)
+
+        with pytest.raises(VectorStoreError, match="1536-dimensional"):
+            await vector_store.ensure_collection()
+        assert qdrant_store._collection_ready is False
+
+
+class TestHybridSearch:
+    """Tests for dense + BM25 search fused by reciprocal rank."""
+
+    TEXTS = ["general maintenance overview", "torque spec for part XJ-900", "warranty terms"]
+
+    async def _load(self) -> None:
+        chunks = [
+            {"text": text, "chunk_index": i, "metadata": {"filename": "a.pdf"}}
+            for i, text in enumerate(self.TEXTS)
+        ]
+        await vector_store.ensure_collection()
+        await vector_store.upsert_chunks("doc-1", chunks, [_vector(i) for i in range(3)])
+
+    @pytest.mark.asyncio
+    async def test_exact_identifier_outranks_dense_neighbour(self, client):
+        """A literal part number should win even when its embedding is far away."""
+        await self._load()
+
+        dense = await vector_store.search(_vector(0), top_k=1)
+        hybrid = await vector_store.search(_vector(0), top_k=1, query_text="xj-900 torque")
+
+        assert dense[0].chunk_index == 0
+        assert dense[0].dense_score == pytest.approx(1.0)
+        assert hybrid[0].chunk_index == 1
+        assert hybrid[0].dense_score is None  # RRF scores do not carry the cosine
+
+        with_vectors = await vector_store.search(
+            _vector(0), top_k=1, query_text="xj-900", with_vectors=True
+        )
+        assert with_vectors[0].vector == pytest.approx(_vector(1))
+        assert with_vectors[0].dense_score == pytest.approx(0.0)
+
+    @pytest.mark.asyncio
+    async def test_disabled_or_no_terms_is_dense_only(self, client, monkeypatch):
+        await self._load()
+
+        stopwords_only = await vector_store.search(_vector(0), top_k=1, query_text="what is the")
+        monkeypatch.setattr(vector_store.settings, "hybrid_search_enabled", False)
+        disabled = await vector_store.search(_vector(0), top_k=1, query_text="xj-900")
+
+        assert stopwords_only[0].chunk_index == 0
+        assert disabled[0].chunk_index == 0
+
+    @pytest.mark.asyncio
+    async def test_legacy_collection_falls_back_to_dense(self, client):
+        """Collections created without sparse vectors keep working, dense-only."""
+        name = vector_store.settings.qdrant_collection_name
+        await client.create_collection(name, VectorParams(size=1536, distance=Distance.COSINE))
+        await self._load()
+
+        results = await vector_store.search(
+            _vector(0), top_k=1, query_text="xj-900", with_vectors=True
+        )
+
+        assert qdrant_store._sparse_ready is False
+        assert results[0].chunk_index == 0
+        assert results[0].vector == pytest.approx(_vector(0))
+
+    def test_reciprocal_rank_fusion(self):
+        fused = vector_store.reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=0)
+
+        assert [item for item, _ in fused] == ["a", "c", "b"]
+        assert fused[0][1] == pytest.approx(1 + 1 / 2)
+
+
+class TestCollectionProfiles:
+    """Tests for collection profiles and the search params they imply."""
+
+    def test_fast_profile_uses_server_defaults(self):
+        assert search_params(get_profile("fast-in-ram")) is None
+
+    def test_quantized_profile_rescores_with_oversampling(self):
+        params = search_params(get_profile("int8-rescore"), hnsw_ef=128)
+        assert params.hnsw_ef == 128
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_per_call_overrides(self):
+        params = search_params(get_profile("binary-oversample"), rescore=False, oversampling=5)
+        assert params.quantization.rescore is False
+        assert params.quantization.oversampling == 5
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(ValueError, match="Unknown collection profile"):
+            get_profile("tiny")
+
+    @pytest.mark.asyncio
+    async def test_collection_created_with_profile(self, mock_client, monkeypatch):
+        """A new collection should get the profile's quantization and on-disk options."""
+        monkeypatch.setattr(qdrant_store, "_collection_ready", False)
+        monkeypatch.setattr(vector_store.settings, "qdrant_collection_profile", "int8-rescore")
+        monkeypatch.setattr(vector_store.settings, "qdrant_vectors_on_disk", True)
+        mock_client.get_aliases.return_value = SimpleNamespace(aliases=[])
+        mock_client.collection_exists.return_value = False
+        mock_client.get_collection.return_value = TestBootstrap._info({})
+
+        await vector_store.ensure_collection()
+
+        kwargs = mock_client.create_collection.await_args.kwargs
+        assert kwargs["vectors_config"].on_disk is True
+        assert kwargs["quantization_config"] == get_profile("int8-rescore").quantization